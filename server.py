@@ -5,9 +5,20 @@ _CLIENT_LOADED = False
 from src.bypass import transport_names, neftcfg_search, init_bypass, IGNORE_LIST, restart_all_adapters, get_adapter_name, rand0m_hex
 from flask import Flask, jsonify, send_from_directory, redirect, request, Response, stream_with_context
 from hypercorn.asyncio import serve as hypercorn_serve
-from src.ping import scan_network, get_default_gateway
+from src.ping import scan_network, passive_scan, get_default_gateway, get_local_network, get_local_networks, parse_network
 from src.netman import GarpSpoofer, ping_manager
-from src.monitor import connection_monitor, ConnectionMonitor
+from src.monitor import connection_monitor
+from src.portscan import port_scanner, parse_ports
+from src.inventory import DeviceInventory
+from src.enrichcache import enrichment_cache
+from src.passive_os import passive_os
+from src.passive_hosts import passive_hosts
+from src.neighbor_watch import neighbor_watcher
+from src.presence import presence_tracker
+from src.oui import get_oui_index
+from src.vendorsearch import VendorSearchIndex
+from src.scheduler import ScanScheduler
+from src.singleflight import SingleFlight
 from werkzeug.exceptions import NotFound 
 from hypercorn.config import Config
 from getmac import get_mac_address
@@ -27,6 +38,7 @@ import win32gui
 import pystray
 import random
 import socket
+import queue
 import ctypes
 import winreg
 import signal
@@ -62,7 +74,12 @@ BYPASS_HISTORY_FILE = os.path.join(os.getenv('APPDATA'), "ayosbypasser", "bypass
 APPDATA_LOCATION = os.path.join(os.getenv('APPDATA'), "ayosbypasser")
 OUI_FILE = os.path.join(APPDATA_LOCATION, "oui.txt")
 OUI_URL = "https://standards-oui.ieee.org/"
+OUI_EXTRA_SOURCES = [
+    ("https://standards-oui.ieee.org/oui28/mam.txt", "mam.txt"),
+    ("https://standards-oui.ieee.org/oui36/oui36.txt", "oui36.txt")
+]
 TUTORIAL_FILE = os.path.join(APPDATA_LOCATION, "tutorial_completed.json")
+INVENTORY_DB_FILE = os.path.join(APPDATA_LOCATION, "inventory.db")
 
 VERSION_FILE = os.path.join(APPDATA_LOCATION, "version.txt")
 APP_VERSION = "1.7"
@@ -126,7 +143,24 @@ DEFAULT_SETTINGS = {
     "allow_bypass_ignored": False,
     "separate_scan_methods": False,  
     "basic_scan_method": "divide_and_conquer", 
-    "full_scan_method": "divide_and_conquer"  
+    "full_scan_method": "divide_and_conquer",
+    "scan_cidr": "",
+    "delta_full_scans": False,
+    "delta_enrich_ttl": 3600,
+    "passive_os_fingerprinting": False,
+    "scheduled_scans": False,
+    "scheduled_basic_interval": 300,
+    "scheduled_full_interval": 3600,
+    "scheduled_scan_jitter": 0.1,
+    "passive_discovery": False,
+    "passive_max_silence": 600,
+    "neighbor_watch": False,
+    "presence_tracking": False,
+    "presence_probe_budget": 20,
+    "port_scan_max_sockets": 512,
+    "port_scan_host_rate": 20000,
+    "scan_all_interfaces": False,
+    "ipv6_discovery": False
 }
 
 # --- Globals for Console Hiding ---
@@ -212,6 +246,9 @@ def get_console_status():
     return jsonify({"status": "visible" if is_visible else "hidden"})
 
 network_controller = GarpSpoofer()
+device_inventory = DeviceInventory(INVENTORY_DB_FILE)
+oui_index = get_oui_index()
+vendor_search = VendorSearchIndex(oui_index)
 
 DISABLED_DEVICES = []
 DISABLED_DEVICES_FILE = os.path.join(APPDATA_LOCATION, "disabled_devices.json")
@@ -414,57 +451,12 @@ def auto_configure():
     except Exception as e:
         return jsonify({'error': f'Failed to configure task: {str(e)}'}), 500
 
-_VENDOR_CACHE = {}
-_VENDOR_CACHE_MTIME = 0
-_VENDOR_CACHE_LOCK = threading.Lock()
-
-def _parse_oui_line(line: str):
-    if "(hex)" in line:
-        parts = line.split("(hex)")
-    elif "(base 16)" in line:
-        parts = line.split("(base 16)")
-    else:
-        return None, None
-    oui_raw = parts[0].strip()
-    vendor = parts[1].strip()
-    oui = oui_raw.replace("-", "").replace(":", "").upper()
-    if len(oui) != 6 or not all(c in "0123456789ABCDEF" for c in oui):
-        return None, None
-    return oui, vendor
-
-def _load_vendor_cache(force: bool = False):
-    # BUGFIX: correct global name (_VENDOR_CACHE_MTIME), not "__VENDOR_CACHE_MTIME"
-    global _VENDOR_CACHE, _VENDOR_CACHE_MTIME
-    with _VENDOR_CACHE_LOCK:
-        try:
-            mtime = os.path.getmtime(OUI_FILE)
-        except FileNotFoundError:
-            _VENDOR_CACHE = {}
-            _VENDOR_CACHE_MTIME = 0
-            return
-
-        # cache hit
-        if not force and _VENDOR_CACHE and _VENDOR_CACHE_MTIME == mtime:
-            return
-
-        vendors = {}
-        # errors='ignore' to tolerate weird encodings in large files
-        with open(OUI_FILE, "r", encoding="utf-8", errors="ignore") as f:
-            for line in f:
-                oui, vendor = _parse_oui_line(line)
-                if oui and vendor and oui not in vendors:
-                    vendors[oui] = vendor
-
-        _VENDOR_CACHE = vendors
-        _VENDOR_CACHE_MTIME = mtime
-
 @app.route('/bypass/vendors', methods=['GET'])
 def get_vendors():
-    # cached, filterable, limited result set
+    # indexed prefix search over vendor names and OUIs, already sorted by vendor
     if not os.path.exists(OUI_FILE):
         return jsonify({"error": "OUI file not found. Please download it from the settings."}), 404
 
-    _load_vendor_cache()
     q = (request.args.get('q') or '').strip().lower()
     try:
         limit = int(request.args.get('limit', '100'))
@@ -472,16 +464,10 @@ def get_vendors():
     except ValueError:
         limit = 100
 
-    items = _VENDOR_CACHE.items()
-    if q:
-        q_oui = q.replace(":", "").replace("-", "")
-        items = (
-            (oui, vendor) for (oui, vendor) in items
-            if q in vendor.lower() or oui.lower().startswith(q_oui)
-        )
-
-    # Sort by vendor name for stable UI, then apply limit
-    items = sorted(items, key=lambda kv: kv[1])[:limit]
+    try:
+        items = vendor_search.search(q, limit)
+    except (OSError, ValueError) as e:
+        return jsonify({"error": f"Failed to load OUI index: {str(e)}"}), 500
 
     return jsonify({oui: vendor for (oui, vendor) in items})
 
@@ -561,6 +547,19 @@ def download_oui():
         response.raise_for_status()
         with open(OUI_FILE, "w", encoding="utf-8") as f:
             f.write(response.text)
+
+        # MA-M/MA-S registries are optional extras for longest-prefix matching
+        for url, filename in OUI_EXTRA_SOURCES:
+            try:
+                extra = requests.get(url, headers=headers, timeout=10)
+                extra.raise_for_status()
+                with open(os.path.join(APPDATA_LOCATION, filename), "w", encoding="utf-8") as f:
+                    f.write(extra.text)
+            except Exception as e:
+                print(f"\033[93m[WARN] Skipping {filename}: {e}\033[0m")
+
+        prefix_count = oui_index.compile()
+        print(f"\033[94m[INFO] Compiled OUI index with {prefix_count} prefixes.\033[0m")
         
         return jsonify({"message": f"OUI file downloaded successfully to {OUI_FILE}."})
     except Exception as e:
@@ -596,6 +595,10 @@ def clear_history():
             if os.path.exists(BYPASS_HISTORY_FILE):
                 os.remove(BYPASS_HISTORY_FILE)
 
+        if option in ["inventory", "all"]:
+            device_inventory.clear()
+            enrichment_cache.clear()
+
         return jsonify({"message": f"History cleared for: {option}"})
     except Exception as e:
         return jsonify({"error": f"Failed to clear history: {str(e)}"}), 500
@@ -606,8 +609,7 @@ def get_oui_info():
         return jsonify({"exists": False})
     
     try:
-        _load_vendor_cache() 
-        vendor_count = len(set(_VENDOR_CACHE.values())) if _VENDOR_CACHE else 0
+        vendor_count = oui_index.vendor_count()
         file_size = os.path.getsize(OUI_FILE)
         last_modified = os.path.getmtime(OUI_FILE)
         
@@ -673,11 +675,22 @@ def clear_disabled_devices_on_startup():
         disabled_devices_cleared = True
         print("\033[93m[INFO] Disabled devices list loaded on server startup.\033[0m")
 
-def get_subnet():
+def get_subnet(cidr=None):
+    # Explicit CIDR (query param or "scan_cidr" setting) wins over auto-detection;
+    # several CIDRs can be given separated by commas and are scanned together
+    cidr = (cidr or settings.get("scan_cidr") or "").strip()
+    if cidr:
+        return ",".join(dict.fromkeys(str(parse_network(part)) for part in cidr.split(",") if part.strip()))
+
     default_gateway = get_default_gateway()
+    if settings.get("scan_all_interfaces", False):
+        # Every attached subnet (wired, Wi-Fi, VPN...), the gateway's first
+        networks = get_local_networks(default_gateway)
+        if networks:
+            return ",".join(network for _, network in networks)
     if default_gateway:
-        subnet = '.'.join(default_gateway.split('.')[:3])
-        return f"{subnet}.0/24"
+        # Derive the real prefix from the interface netmask instead of assuming /24
+        return get_local_network(default_gateway)
     else:
         raise ValueError("Unable to determine default gateway")
     
@@ -743,7 +756,105 @@ def save_history(file_path, data):
     with open(file_path, "w") as f:
         json.dump(data, f, indent=4)
 
-def log_scan_history(scan_type, device_count, results, scanning_method, duration):
+def load_last_scan_results(scan_type="Full"):
+    # Newest stored result set of the given type, used as the baseline for delta scans
+    history = load_history(SCAN_HISTORY_FILE)
+    for entry in reversed(history):
+        if entry.get("type") != scan_type:
+            continue
+        raw_json_path = os.path.join(HISTORY_FOLDER, os.path.basename(entry.get("rawJsonUrl", "")))
+        if os.path.exists(raw_json_path):
+            try:
+                with open(raw_json_path, "r") as f:
+                    data = json.load(f)
+                return data if isinstance(data, list) else []
+            except (OSError, json.JSONDecodeError):
+                continue
+    return []
+
+def use_delta_scan():
+    mode = request.args.get('mode')
+    if mode:
+        return mode == "delta"
+    return bool(settings.get("delta_full_scans", False))
+
+def apply_passive_os_setting():
+    # Start/stop the optional passive OS fingerprinting sniffer to match settings
+    if settings.get("passive_os_fingerprinting", False):
+        if not passive_os.active:
+            passive_os.start()
+    elif passive_os.active:
+        passive_os.stop()
+
+def _run_scheduled_scan(scan_type):
+    # Background scans refresh the in-memory results and the inventory, but stay out of the scan history
+    delta = scan_type == "full" and bool(settings.get("delta_full_scans", False))
+    passive = scan_type == "basic" and _passive_discovery_ready()
+    subnet = get_subnet()
+
+    def job(publish):
+        scan = _perform_scan(scan_type, subnet, delta=delta, on_event=publish, passive=passive)
+        try:
+            device_inventory.upsert_scan(scan["results"])
+        except Exception as e:
+            print(f"\033[93m[WARN] Failed to update device inventory: {e}\033[0m")
+        return scan
+
+    # Keyed apart from user scans: a request joining this run would get results that never reach the history
+    return inflight.run(_scan_key(scan_type, subnet, delta, passive, origin="scheduled"), job)["results"]
+
+scan_scheduler = ScanScheduler(_run_scheduled_scan)
+# Scans, port scans and deep dives with identical parameters share one run
+inflight = SingleFlight()
+
+# Seconds of capture before the passive host table is trusted to answer basic scans
+PASSIVE_DISCOVERY_WARMUP = 120
+
+def apply_passive_discovery_setting():
+    # Start/stop the optional passive host discovery capture to match settings
+    if settings.get("passive_discovery", False):
+        if not passive_hosts.active:
+            passive_hosts.start()
+    elif passive_hosts.active:
+        passive_hosts.stop()
+
+def _passive_discovery_ready():
+    return bool(settings.get("passive_discovery", False)) and passive_hosts.ready(PASSIVE_DISCOVERY_WARMUP)
+
+def apply_neighbor_watch_setting():
+    # Start/stop the kernel neighbour change watcher to match settings
+    if settings.get("neighbor_watch", False):
+        if not neighbor_watcher.active:
+            neighbor_watcher.start()
+    elif neighbor_watcher.active:
+        neighbor_watcher.stop()
+
+def apply_presence_tracking_setting():
+    # Start/stop the per-device liveness checks to match settings; the budget is probes per second
+    presence_tracker.configure(budget=max(1, int(settings.get("presence_probe_budget", 20))))
+    if settings.get("presence_tracking", False):
+        if not presence_tracker.active:
+            presence_tracker.start()
+    elif presence_tracker.active:
+        presence_tracker.stop()
+
+def apply_port_scan_setting():
+    # Global cap on in-flight connects and per-host connects per second for every port scan
+    port_scanner.configure(
+        max_sockets=max(1, int(settings.get("port_scan_max_sockets", 512))),
+        host_rate=max(1, int(settings.get("port_scan_host_rate", 20000)))
+    )
+
+def apply_scan_schedule_setting():
+    # Start/stop background scans to match settings; an interval of 0 disables that scan type
+    scan_scheduler.configure(
+        bool(settings.get("scheduled_scans", False)),
+        basic_interval=max(0, int(settings.get("scheduled_basic_interval", 300))),
+        full_interval=max(0, int(settings.get("scheduled_full_interval", 3600))),
+        jitter=min(0.5, max(0.0, float(settings.get("scheduled_scan_jitter", 0.1))))
+    )
+
+def log_scan_history(scan_type, device_count, results, scanning_method, duration, scan_mode=None, timing=None):
     history = load_history(SCAN_HISTORY_FILE) or [] 
     scan_id = str(uuid.uuid4())
     filename = f"{scan_id}.json"
@@ -757,10 +868,17 @@ def log_scan_history(scan_type, device_count, results, scanning_method, duration
         "deviceCount": device_count,
         "rawJsonUrl": f"/history/json/{filename}",
         "scanning_method": scanning_method,
-        "duration": duration
+        "duration": duration,
+        "scan_mode": scan_mode or "standard",
+        "timing": timing
     })
     save_history(SCAN_HISTORY_FILE, history)
 
+    try:
+        device_inventory.upsert_scan(results, scan_id=scan_id)
+    except Exception as e:
+        print(f"\033[93m[WARN] Failed to update device inventory: {e}\033[0m")
+
 def log_bypass_history(previous_mac, new_mac, method, transport, mac_mode=None):
     history = load_history(BYPASS_HISTORY_FILE) or []
     history.append({
@@ -862,7 +980,7 @@ def monitor_deep_dive():
     if not ip:
         return jsonify({"success": False, "error": "Missing ip parameter"}), 400
     try:
-        result = connection_monitor.perform_deep_dive(ip)
+        result = inflight.run(("deep-dive", ip), lambda publish: connection_monitor.perform_deep_dive(ip))
         return jsonify({"success": True, "result": result})
     except Exception as e:
         app.logger.error(f"/monitor/deep-dive error ({ip}): {e}")
@@ -1076,15 +1194,68 @@ def scan_ports_route():
     ip = request.args.get('ip')
     if not ip:
         return jsonify({"error": "IP address is required"}), 400
-    
+    spec = request.args.get('ports', 'common')
+    try:
+        ports = parse_ports(spec)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid port selection: {e}"}), 400
+
     try:
-        monitor = ConnectionMonitor()
-        open_ports = monitor._scan_common_ports(ip)
+        open_ports = inflight.run(("ports", ip, spec), _port_scan_job(ip, ports))
+        presence_tracker.remember_ports(ip, open_ports)
         return jsonify({"ports": open_ports})
     except Exception as e:
         print(f"\033[91m[ERROR] Port scan for {ip} failed: {e}\033[0m")
         return jsonify({"error": str(e)}), 500
 
+def _port_scan_job(ip, ports):
+    def job(publish):
+        return port_scanner.scan(ip, ports, on_open=lambda port: publish("port", port))
+    return job
+
+@app.route('/scan/ports/stream')
+def scan_ports_stream():
+    ip = request.args.get('ip')
+    if not ip:
+        return jsonify({"error": "IP address is required"}), 400
+    spec = request.args.get('ports', 'common')
+    try:
+        ports = parse_ports(spec)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid port selection: {e}"}), 400
+
+    def event_stream():
+        # Open ports are sent as they answer; a second request for the same scan joins the running one
+        started = time.time()
+        flight = inflight.do(("ports", ip, spec), _port_scan_job(ip, ports), background=True)
+        events = flight.subscribe()
+        yield 'event: started\ndata: ' + json.dumps({"ip": ip, "port_count": len(ports)}) + '\n\n'
+
+        while True:
+            try:
+                kind, data = events.get(timeout=15)
+            except queue.Empty:
+                yield ': keepalive\n\n'
+                continue
+
+            if kind == "port":
+                yield 'event: port\ndata: ' + json.dumps({"port": data}) + '\n\n'
+            elif kind == "failed":
+                print(f"\033[91m[ERROR] Port scan for {ip} failed: {data}\033[0m")
+                yield 'event: scan_error\ndata: ' + json.dumps({"error": "Port scan failed"}) + '\n\n'
+                break
+            elif kind == "done":
+                presence_tracker.remember_ports(ip, data)
+                yield 'event: summary\ndata: ' + json.dumps({
+                    "ip": ip, "ports": data, "duration": round(time.time() - started, 2)
+                }) + '\n\n'
+                break
+
+    response = Response(stream_with_context(event_stream()), mimetype="text/event-stream")
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/bypass/adapters')
 def get_adapters():
     try:
@@ -1604,6 +1775,38 @@ def delete_scan_history(scan_id):
     save_history(SCAN_HISTORY_FILE, updated_history)
     return jsonify({"message": "Scan history deleted successfully."})
 
+@app.route('/inventory', methods=['GET'])
+def query_inventory():
+    try:
+        limit = max(1, min(500, int(request.args.get('limit', '50'))))
+        offset = max(0, int(request.args.get('offset', '0')))
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers"}), 400
+
+    try:
+        return jsonify(device_inventory.query(
+            ip=request.args.get('ip'),
+            mac=request.args.get('mac'),
+            hostname=request.args.get('hostname'),
+            vendor=request.args.get('vendor'),
+            os_name=request.args.get('os'),
+            since=request.args.get('since'),
+            limit=limit,
+            offset=offset
+        ))
+    except Exception as e:
+        return jsonify({"error": f"Failed to query inventory: {str(e)}"}), 500
+
+@app.route('/inventory/<mac>', methods=['GET'])
+def get_inventory_device(mac):
+    try:
+        device = device_inventory.get(mac)
+    except Exception as e:
+        return jsonify({"error": f"Failed to query inventory: {str(e)}"}), 500
+    if not device:
+        return jsonify({"error": "Device not found"}), 404
+    return jsonify(device)
+
 @app.route('/tutorial/status', methods=['GET'])
 def get_tutorial_status():
     try:
@@ -1664,51 +1867,143 @@ def get_hostname_route():
     
     return jsonify({"ip": ip, "hostname": hostname})
 
-@app.route('/scan/basic')
-def basic_scan():
-    try:
-        start_time = time.time()  
-        subnet = get_subnet()
-        if settings.get("debug_mode", "off") in ["basic", "full"]:
-            print(f"\033[94m[DEBUG] Performing basic scan on subnet: {subnet}\033[0m")
-        
-        # NEW: Check if separate scan methods are enabled
-        use_separate = settings.get("separate_scan_methods", False)
-        if use_separate:
-            scanning_method = settings.get("basic_scan_method", "divide_and_conquer")
-        else:
-            scanning_method = settings.get("scanning_method", "divide_and_conquer")
-            
-        parallel_scans = settings.get("parallel_scans", True)
-        multiplier = int(settings.get("override_multiplier", 2))
-        
+def _timing_collector(timing):
+    # Captures the sweep parameters the pipeline settled on (its "timing" event) into `timing`
+    def on_event(kind, data):
+        if kind == "timing":
+            if not timing or timing.get("subnet") == data.get("subnet"):
+                timing.update(data)
+            else:
+                # Multi-interface scans: one summary per additional subnet
+                timing.setdefault("others", []).append(data)
+    return on_event
+
+def _scan_method_for(scan_type):
+    if settings.get("separate_scan_methods", False):
+        return settings.get(f"{scan_type}_scan_method", "divide_and_conquer")
+    return settings.get("scanning_method", "divide_and_conquer")
+
+def _perform_scan(scan_type, subnet, delta=False, on_event=None, passive=False):
+    """
+    Runs one basic/full scan with the current settings; shared by the routes and the scheduler.
+    `passive` answers a basic scan from the passive host table instead of sweeping.
+    """
+    is_full = scan_type == "full"
+    start_time = time.time()
+    scanning_method = _scan_method_for(scan_type)
+    oui_file_missing = is_full and not os.path.exists(OUI_FILE)
+    local_ip = get_local_ip()
+    local_mac = get_mac_address()
+    timing = {}
+    collect_timing = _timing_collector(timing)
+
+    def forward(kind, data):
+        collect_timing(kind, data)
+        # The local adapter MAC is not in the ARP table, patch it into streamed events too
+        if data.get("ip") == local_ip and "mac" in data:
+            data["mac"] = local_mac
+        if on_event:
+            on_event(kind, data)
+
+    if passive and not is_full:
+        scanning_method = "passive"
+        results = passive_scan(subnet, max_silence=int(settings.get("passive_max_silence", 600)))
+        for result in results:
+            forward("device", result)
+    else:
         results = scan_network(
-            subnet=subnet, 
-            scan_hostname=False, 
-            scan_vendor=False,
+            subnet=subnet,
+            scan_hostname=is_full,
+            scan_vendor=is_full and not oui_file_missing,
             scanning_method=scanning_method,
-            parallel_scans=parallel_scans,
-            parallel_multiplier=multiplier
+            parallel_scans=settings.get("parallel_scans", True),
+            parallel_multiplier=int(settings.get("override_multiplier", 2)),
+            on_event=forward,
+            previous_results=load_last_scan_results("Full") if delta else None,
+            enrich_ttl=int(settings.get("delta_enrich_ttl", 3600)),
+            ipv6=bool(settings.get("ipv6_discovery", False))
         ) or []
-        local_ip = get_local_ip()
-        local_mac = get_mac_address()
-        for result in results:
-            if result["ip"] == local_ip:
-                result["mac"] = local_mac
-                break
-        
+
+    for result in results:
+        if result["ip"] == local_ip:
+            result["mac"] = local_mac
+            break
+    # Every device a scan finds stays under presence checks until the next one
+    presence_tracker.track_results(results)
+    if not is_full:
         for result in results:
-            result["hostname"] = "Skipped"
+            # Names heard passively (DHCP option 12, mDNS, NetBIOS) come for free, so they are kept
+            if result.get("source") != "passive":
+                result["hostname"] = "Skipped"
             result["vendor"] = "Skipped"
 
-        end_time = time.time()
-        duration = end_time - start_time
-        log_scan_history("Basic", len(results), results, scanning_method, duration)
-        print(f"\033[92m[INFO] Basic Scan completed. {len(results)} devices found.\033[0m")
-        
-        print(f"\033[94m[DEBUG] Basic scan duration: {duration:.2f} seconds\033[0m")
-        
-        return jsonify(results)
+    return {
+        "results": results,
+        "duration": time.time() - start_time,
+        "scanning_method": scanning_method,
+        "timing": timing or None,
+        "oui_file_missing": oui_file_missing
+    }
+
+def _scan_key(scan_type, subnet, delta=False, passive=False, origin="user"):
+    # User and scheduled scans never share a run: only the user job writes the scan history
+    return ("scan", scan_type, subnet, bool(delta), bool(passive), origin)
+
+def _wants_passive(scan_type):
+    # Basic scans come from the passive host table once it is warm, unless ?source=active asks for a sweep
+    return scan_type == "basic" and request.args.get('source') != "active" and _passive_discovery_ready()
+
+def _scan_job(scan_type, subnet, delta=False, store=True, passive=False):
+    # Single-flight job for a user-requested scan: logged to history once, however many requests share it
+    def job(publish):
+        scan = _perform_scan(scan_type, subnet, delta=delta, on_event=publish, passive=passive)
+        results = scan["results"]
+        log_scan_history(scan_type.capitalize(), len(results), results, scan["scanning_method"], scan["duration"],
+                         scan_mode="delta" if delta else None, timing=scan["timing"])
+        if store:
+            scan_scheduler.store(scan_type, results, scan["duration"])
+        print(f"\033[92m[INFO] {scan_type.capitalize()} Scan completed. {len(results)} devices found.\033[0m")
+        print(f"\033[94m[DEBUG] {scan_type.capitalize()} scan duration: {scan['duration']:.2f} seconds\033[0m")
+        return scan
+    return job
+
+def _requested_max_age():
+    # ?max_age=<seconds>: answer from the scheduler's latest results when they are at least this fresh
+    try:
+        return max(0.0, float(request.args['max_age']))
+    except (KeyError, ValueError):
+        return None
+
+def _cached_scan(scan_type):
+    max_age = _requested_max_age()
+    if max_age is None or request.args.get('cidr'):
+        return None
+    cached = scan_scheduler.fresh(scan_type, max_age)
+    if cached and scan_type == "basic" and cached['kind'] == "full":
+        cached['results'] = [dict(result, hostname="Skipped", vendor="Skipped") for result in cached['results']]
+    return cached
+
+@app.route('/scan/basic')
+def basic_scan():
+    scan_scheduler.touch()
+    cached = _cached_scan("basic")
+    if cached:
+        response = jsonify(cached['results'])
+        response.headers['X-Scan-Age'] = f"{cached['age']:.1f}"
+        return response
+    try:
+        try:
+            subnet = get_subnet(request.args.get('cidr'))
+        except ValueError as e:
+            return jsonify({"error": f"Unable to determine subnet: {e}"}), 400
+        if settings.get("debug_mode", "off") in ["basic", "full"]:
+            print(f"\033[94m[DEBUG] Performing basic scan on subnet: {subnet}\033[0m")
+
+        # Identical scans already running (another tab, the scheduler) are joined instead of duplicated
+        passive = _wants_passive("basic")
+        scan = inflight.run(_scan_key("basic", subnet, passive=passive),
+                            _scan_job("basic", subnet, store=not request.args.get('cidr'), passive=passive))
+        return jsonify(scan["results"])
     except Exception as e:
         print(f"\033[91m[ERROR] Basic scan failed: {e}\033[0m")
         return jsonify({"error": "Basic scan failed"}), 500
@@ -1724,55 +2019,102 @@ def clear_console():
 
 @app.route('/scan/full')
 def full_scan():
+    scan_scheduler.touch()
+    cached = _cached_scan("full")
+    if cached:
+        return jsonify({
+            "results": cached['results'],
+            "message": f"Full scan served from results {cached['age']:.0f}s old.",
+            "age": cached['age'],
+            "warning": None
+        })
     try:
-        start_time = time.time()
-        subnet = get_subnet()
+        try:
+            subnet = get_subnet(request.args.get('cidr'))
+        except ValueError as e:
+            return jsonify({"error": f"Unable to determine subnet: {e}"}), 400
         if settings.get("debug_mode", "off") in ["basic", "full"]:
             print(f"\033[94m[DEBUG] Performing full scan on subnet: {subnet}\033[0m")
 
-        oui_file_missing = not os.path.exists(OUI_FILE)
-        
-        # NEW: Check if separate scan methods are enabled
-        use_separate = settings.get("separate_scan_methods", False)
-        if use_separate:
-            scanning_method = settings.get("full_scan_method", "divide_and_conquer")
-        else:
-            scanning_method = settings.get("scanning_method", "divide_and_conquer")
-            
-        parallel_scans = settings.get("parallel_scans", True)
-        multiplier = int(settings.get("override_multiplier", 2))
-        
-        results = scan_network(
-            subnet=subnet,
-            scan_hostname=True,
-            scan_vendor=not oui_file_missing,
-            scanning_method=scanning_method,
-            parallel_scans=parallel_scans,
-            parallel_multiplier=multiplier
-        )
-        local_ip = get_local_ip()
-        local_mac = get_mac_address()  
-        for result in results:
-            if result["ip"] == local_ip:
-                result["mac"] = local_mac
-                break
-        
-        end_time = time.time()
-        duration = end_time - start_time
-        log_scan_history("Full", len(results), results, scanning_method, duration)
-        print(f"\033[92m[INFO] Full Scan completed. {len(results)} devices found.\033[0m")
-        
-        print(f"\033[94m[DEBUG] Full scan duration: {duration:.2f} seconds\033[0m")
+        delta = use_delta_scan()
+        scan = inflight.run(_scan_key("full", subnet, delta),
+                            _scan_job("full", subnet, delta=delta, store=not request.args.get('cidr')))
         
         return jsonify({
-            "results": results,
+            "results": scan["results"],
             "message": "Full scan completed successfully.",
-            "warning": "OUI file is missing. No vendor information. You can download it in the misc tab." if oui_file_missing else None
+            "timing": scan["timing"],
+            "warning": "OUI file is missing. No vendor information. You can download it in the misc tab." if scan["oui_file_missing"] else None
         })
     except Exception as e:
         print(f"\033[91m[ERROR] Full scan failed: {e}\033[0m")
         return jsonify({"error": "Full scan failed"}), 500
 
+@app.route('/scan/stream')
+def stream_scan():
+    scan_type = request.args.get('type', 'basic').lower()
+    if scan_type not in ("basic", "full"):
+        return jsonify({"error": "type must be 'basic' or 'full'"}), 400
+    is_full = scan_type == "full"
+    scan_scheduler.touch()
+
+    try:
+        subnet = get_subnet(request.args.get('cidr'))
+    except ValueError as e:
+        print(f"\033[91m[ERROR] Streaming scan failed: {e}\033[0m")
+        return jsonify({"error": f"Unable to determine subnet: {e}"}), 400
+
+    scanning_method = _scan_method_for(scan_type)
+    delta = is_full and use_delta_scan()
+    custom_cidr = bool(request.args.get('cidr'))
+    passive = _wants_passive(scan_type)
+    key = _scan_key(scan_type, subnet, delta, passive)
+
+    if settings.get("debug_mode", "off") in ["basic", "full"]:
+        print(f"\033[94m[DEBUG] Performing streaming {scan_type} scan on subnet: {subnet}\033[0m")
+
+    def event_stream():
+        # A second tab asking for the same scan replays the events so far and then follows the running one
+        flight = inflight.do(key, _scan_job(scan_type, subnet, delta=delta, store=not custom_cidr, passive=passive),
+                             background=True)
+        events = flight.subscribe()
+        yield 'event: started\ndata: ' + json.dumps({"type": scan_type, "subnet": subnet, "scanning_method": scanning_method}) + '\n\n'
+
+        while True:
+            try:
+                kind, data = events.get(timeout=15)
+            except queue.Empty:
+                yield ': keepalive\n\n'
+                continue
+
+            if kind == "device":
+                yield 'event: device\ndata: ' + json.dumps(data) + '\n\n'
+            elif kind == "update":
+                yield 'event: patch\ndata: ' + json.dumps(data) + '\n\n'
+            elif kind == "progress":
+                yield 'event: progress\ndata: ' + json.dumps(data) + '\n\n'
+            elif kind == "failed":
+                print(f"\033[91m[ERROR] Streaming {scan_type} scan failed: {data}\033[0m")
+                yield 'event: scan_error\ndata: ' + json.dumps({"error": f"{scan_type.capitalize()} scan failed"}) + '\n\n'
+                break
+            elif kind == "done":
+                results = data["results"]
+                yield 'event: summary\ndata: ' + json.dumps({
+                    "type": scan_type,
+                    "device_count": len(results),
+                    "duration": data["duration"],
+                    "scanning_method": data["scanning_method"],
+                    "timing": data["timing"],
+                    "results": results,
+                    "warning": "OUI file is missing. No vendor information. You can download it in the misc tab." if data["oui_file_missing"] else None
+                }) + '\n\n'
+                break
+
+    response = Response(stream_with_context(event_stream()), mimetype="text/event-stream")
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/misc/history-sizes', methods=['GET'])
 def get_history_sizes():
     try:
@@ -1879,7 +2221,8 @@ def settings_route():
 @app.route('/settings', methods=['POST'])
 def update_settings():
     global settings
-    updated_settings = request.json
+    # Keep server-side keys the settings page does not render (e.g. scan_cidr, delta_enrich_ttl)
+    updated_settings = {**settings, **(request.json or {})}
     with open(SETTINGS_FILE, "w") as f:
         json.dump(updated_settings, f, indent=4)
     
@@ -1894,6 +2237,13 @@ def update_settings():
     # Update logging level dynamically if debug mode changes
     update_logging_level(updated_settings.get("debug_mode", "off"))
 
+    apply_passive_os_setting()
+    apply_passive_discovery_setting()
+    apply_neighbor_watch_setting()
+    apply_presence_tracking_setting()
+    apply_port_scan_setting()
+    apply_scan_schedule_setting()
+
     return jsonify({"message": "Settings updated successfully"})
 
 @app.route('/exit', methods=['POST'])
@@ -2051,6 +2401,62 @@ def stream_ping():
     response.headers['X-Accel-Buffering'] = 'no'
     return response
 
+@app.route('/api/neighbors', methods=['GET'])
+def get_neighbors():
+    return jsonify({"active": neighbor_watcher.active, "devices": neighbor_watcher.snapshot()})
+
+@app.route('/api/neighbors/stream', methods=['GET'])
+def stream_neighbors():
+    if not neighbor_watcher.active:
+        return jsonify({"error": "Neighbour watching is disabled. Enable it in settings."}), 409
+
+    def event_stream():
+        events = neighbor_watcher.subscribe()
+        try:
+            yield 'event: snapshot\ndata: ' + json.dumps(neighbor_watcher.snapshot()) + '\n\n'
+            while True:
+                try:
+                    event = events.get(timeout=15)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f'event: {event["event"]}\ndata: ' + json.dumps(event) + '\n\n'
+        finally:
+            neighbor_watcher.unsubscribe(events)
+
+    response = Response(stream_with_context(event_stream()), mimetype="text/event-stream")
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/presence', methods=['GET'])
+def get_presence():
+    return jsonify({**presence_tracker.stats(), "hosts": presence_tracker.snapshot()})
+
+@app.route('/api/presence/stream', methods=['GET'])
+def stream_presence():
+    if not presence_tracker.active:
+        return jsonify({"error": "Presence tracking is disabled. Enable it in settings."}), 409
+
+    def event_stream():
+        events = presence_tracker.subscribe()
+        try:
+            yield 'event: snapshot\ndata: ' + json.dumps(presence_tracker.snapshot()) + '\n\n'
+            while True:
+                try:
+                    event = events.get(timeout=15)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f'event: {event["event"]}\ndata: ' + json.dumps(event) + '\n\n'
+        finally:
+            presence_tracker.unsubscribe(events)
+
+    response = Response(stream_with_context(event_stream()), mimetype="text/event-stream")
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/api/ping/stop', methods=['POST'])
 def stop_ping_stream():
     client_id = request.json.get('client')
@@ -2454,6 +2860,13 @@ if __name__ == '__main__':
                 print(f"\033[91m[ERROR] Failed to open browser: {e}\033[0m")
         threading.Thread(target=open_browser, daemon=True).start()
 
+    apply_passive_os_setting()
+    apply_passive_discovery_setting()
+    apply_neighbor_watch_setting()
+    apply_presence_tracking_setting()
+    apply_port_scan_setting()
+    apply_scan_schedule_setting()
+
     try:
         backend = settings.get("server_backend", "waitress")
         
@@ -0,0 +1,125 @@
+import os
+import json
+import threading
+import time
+
+from src.inventory import normalize_mac
+
+# Seconds a field stays fresh at "high" confidence
+FIELD_TTLS = {
+    "hostname": 24 * 3600,
+    "workgroup": 7 * 24 * 3600,
+    "vendor": 30 * 24 * 3600,
+    "os": 7 * 24 * 3600
+}
+
+# Weaker guesses expire sooner so they get re-probed
+CONFIDENCE_SCALE = {
+    "high": 1.0,
+    "medium": 0.5,
+    "low": 0.05
+}
+
+
+def _default_path():
+    appdata = os.getenv('APPDATA')
+    if not appdata:
+        return None
+    return os.path.join(appdata, "ayosbypasser", "enrichment_cache.json")
+
+
+class EnrichmentCache:
+    """
+    Enrichment results (hostname, workgroup, vendor, OS) keyed by normalised
+    MAC so they survive DHCP renumbering and restarts. Every field carries a
+    confidence level and expires after its TTL scaled by that confidence. The
+    JSON file in APPDATA is only read on first use and written back by save().
+    """
+
+    def __init__(self, path=None, field_ttls=None):
+        self.path = path
+        self.field_ttls = dict(FIELD_TTLS, **(field_ttls or {}))
+        self.lock = threading.Lock()
+        self._entries = None
+        self._dirty = False
+
+    def _load(self):
+        # Caller holds the lock
+        if self._entries is not None:
+            return self._entries
+        self._entries = {}
+        path = self.path or _default_path()
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"\033[93m[WARN] Ignoring unreadable enrichment cache: {e}\033[0m")
+        return self._entries
+
+    def _fresh(self, field, record, now):
+        ttl = self.field_ttls.get(field, 0) * CONFIDENCE_SCALE.get(record.get('confidence'), CONFIDENCE_SCALE['low'])
+        return now - record.get('updated_at', 0) <= ttl
+
+    def lookup(self, mac):
+        """Returns {field: (value, confidence)} for every fresh field cached for `mac`."""
+        mac = normalize_mac(mac)
+        if not mac:
+            return {}
+        now = time.time()
+        with self.lock:
+            entry = self._load().get(mac, {})
+            return {
+                field: (record['value'], record.get('confidence'))
+                for field, record in entry.items()
+                if self._fresh(field, record, now)
+            }
+
+    def put(self, mac, field, value, confidence="high"):
+        mac = normalize_mac(mac)
+        if not mac or value is None:
+            return
+        with self.lock:
+            self._load().setdefault(mac, {})[field] = {
+                'value': value,
+                'confidence': confidence,
+                'updated_at': time.time()
+            }
+            self._dirty = True
+
+    def save(self):
+        path = self.path or _default_path()
+        with self.lock:
+            if not self._dirty or not path:
+                return
+            now = time.time()
+            # Drop fields that have expired so the file doesn't grow forever
+            entries = {}
+            for mac, fields in self._load().items():
+                kept = {f: r for f, r in fields.items() if self._fresh(f, r, now)}
+                if kept:
+                    entries[mac] = kept
+            self._entries = entries
+            data = json.dumps(entries)
+            self._dirty = False
+        try:
+            folder = os.path.dirname(path)
+            if folder and not os.path.exists(folder):
+                os.makedirs(folder, exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"\033[93m[WARN] Failed to save enrichment cache: {e}\033[0m")
+
+    def clear(self):
+        path = self.path or _default_path()
+        with self.lock:
+            self._entries = {}
+            self._dirty = False
+        if path and os.path.exists(path):
+            os.remove(path)
+
+
+enrichment_cache = EnrichmentCache()
@@ -0,0 +1,256 @@
+import socket
+import struct
+import select
+import platform
+import time
+import os
+import threading
+import itertools
+from collections import OrderedDict, deque
+
+# ICMP message types
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+
+# Not exported by the socket module on every platform (value is Linux specific)
+_IP_RECVTTL = getattr(socket, 'IP_RECVTTL', 12)
+
+_ENGINE_LOCK = threading.Lock()
+_ENGINE_KIND = None  # "raw", "dgram" or "" (unavailable) once probed
+
+
+def _checksum(data):
+    if len(data) % 2:
+        data += b'\x00'
+    total = sum(struct.unpack('!%dH' % (len(data) // 2), data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _build_echo(ident, seq, payload=b'nrt-sweep'):
+    header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    csum = _checksum(header + payload)
+    return struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, csum, ident, seq) + payload
+
+
+def _open_socket(kind, source=None):
+    # `source` pins the local address, and with it the interface probes leave from
+    if kind == "raw":
+        sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+        if source or platform.system() == 'Windows':
+            # Windows only delivers ICMP to raw sockets that are bound
+            sock.bind((source or '0.0.0.0', 0))
+        return sock
+
+    # Unprivileged "ping socket" (Linux net.ipv4.ping_group_range)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+    try:
+        sock.setsockopt(socket.IPPROTO_IP, _IP_RECVTTL, 1)
+    except OSError:
+        pass
+    return sock
+
+
+# Raw sockets see every echo reply on the host; concurrent sweeps tell theirs apart by identifier
+_IDENTS = itertools.count(os.getpid())
+
+
+def _next_ident():
+    return next(_IDENTS) & 0xFFFF
+
+
+def engine_kind():
+    """Returns the ICMP socket flavour usable by this process ("raw", "dgram" or "")."""
+    global _ENGINE_KIND
+    with _ENGINE_LOCK:
+        if _ENGINE_KIND is not None:
+            return _ENGINE_KIND
+        kinds = ["raw"]
+        if platform.system() == 'Linux':
+            kinds.append("dgram")
+        _ENGINE_KIND = ""
+        for kind in kinds:
+            try:
+                _open_socket(kind).close()
+                _ENGINE_KIND = kind
+                break
+            except (OSError, AttributeError):
+                continue
+        return _ENGINE_KIND
+
+
+def icmp_available():
+    return bool(engine_kind())
+
+
+class IcmpSweeper:
+    """
+    Sends echo requests to many targets from a single ICMP socket and matches
+    replies by identifier/sequence, recording RTT (ms) and TTL per host.
+
+    Targets may be any iterable (e.g. a lazy CIDR host generator). At most
+    `window` probes are outstanding at once and sends are paced to `rate`
+    packets/second, so memory stays bounded regardless of how many targets
+    are swept. With a `timing` controller (src/pacing.py) the window and the
+    probe timeout follow its AIMD/RTT estimates instead. `source` binds the
+    socket to one local address so a multi-homed host sweeps each subnet from
+    its own interface.
+    """
+
+    def __init__(self, timeout=1.0, retries=1, rate=2000, window=4096, timing=None, source=None):
+        self.source = source
+        self.timeout = timeout
+        self.retries = retries
+        self.rate = rate
+        self.window = window
+        self.timing = timing
+        self.kind = engine_kind()
+
+    def _limits(self):
+        if self.timing:
+            return min(self.window, self.timing.window()), self.timing.timeout()
+        return self.window, self.timeout
+
+    def sweep(self, targets, on_reply=None, on_progress=None):
+        if not self.kind:
+            raise OSError("No ICMP socket available (requires admin/root or ping_group_range)")
+
+        results = {}
+        sock = _open_socket(self.kind, self.source)
+        try:
+            sock.setblocking(False)
+            # For dgram sockets the kernel rewrites the identifier with the local port
+            ident = _next_ident()
+            if self.kind == "dgram":
+                sock.bind((self.source or '0.0.0.0', 0))
+                ident = sock.getsockname()[1] & 0xFFFF
+
+            targets = iter(targets)
+            outstanding = OrderedDict()  # seq -> (ip, sent_at, attempt), in send order
+            expired = OrderedDict()      # recently timed-out probes, so late replies still count
+            retry_queue = deque()
+            seq = 0
+            probed = 0
+            exhausted = False
+            next_send = time.perf_counter()
+            send_gap = 1.0 / self.rate if self.rate else 0
+
+            while True:
+                window, timeout = self._limits()
+                # Send while the in-flight window has room and pacing allows
+                while len(outstanding) < window:
+                    now = time.perf_counter()
+                    if now < next_send:
+                        break
+                    if retry_queue:
+                        ip, attempt = retry_queue.popleft()
+                    elif not exhausted:
+                        ip = next(targets, None)
+                        if ip is None:
+                            exhausted = True
+                            continue
+                        ip, attempt = str(ip), 0
+                        probed += 1
+                        if on_progress and probed % 256 == 0:
+                            on_progress(probed)
+                    else:
+                        break
+                    if ip in results:
+                        continue
+                    seq = (seq + 1) & 0xFFFF
+                    outstanding.pop(seq, None)
+                    expired.pop(seq, None)
+                    outstanding[seq] = (ip, now, attempt)
+                    try:
+                        sock.sendto(_build_echo(ident, seq), (ip, 0))
+                    except OSError:
+                        # Unroutable/broadcast targets - nothing to wait for
+                        outstanding.pop(seq, None)
+                    next_send = max(next_send + send_gap, now - 0.05)
+
+                if exhausted and not retry_queue and not outstanding:
+                    break
+
+                # Drain replies; the select timeout doubles as the pacing sleep
+                now = time.perf_counter()
+                if outstanding:
+                    oldest_deadline = next(iter(outstanding.values()))[1] + timeout
+                else:
+                    oldest_deadline = now
+                can_send = (retry_queue or not exhausted) and len(outstanding) < window
+                wait = max(0.0, min(next_send if can_send else oldest_deadline, oldest_deadline) - now)
+                self._drain(sock, ident, outstanding, expired, results, on_reply, wait)
+
+                # Expire probes that outlived the timeout, oldest first
+                now = time.perf_counter()
+                while outstanding:
+                    first_seq, (ip, sent_at, attempt) = next(iter(outstanding.items()))
+                    if sent_at + timeout > now:
+                        break
+                    outstanding.popitem(last=False)
+                    expired[first_seq] = (ip, sent_at, attempt)
+                    if len(expired) > self.window:
+                        expired.popitem(last=False)
+                    if ip not in results and attempt < self.retries:
+                        retry_queue.append((ip, attempt + 1))
+                    elif self.timing:
+                        self.timing.on_timeout()
+
+            if on_progress:
+                on_progress(probed)
+        finally:
+            sock.close()
+        return results
+
+    def _drain(self, sock, ident, outstanding, expired, results, on_reply, wait):
+        readable, _, _ = select.select([sock], [], [], wait)
+        while readable:
+            try:
+                if self.kind == "dgram":
+                    packet, ancdata, _, addr = sock.recvmsg(1024, socket.CMSG_SPACE(4))
+                    ttl = None
+                    for level, ctype, cdata in ancdata:
+                        if level == socket.IPPROTO_IP and ctype in (socket.IP_TTL, _IP_RECVTTL) and cdata:
+                            ttl = cdata[0] if len(cdata) < 4 else struct.unpack('i', cdata[:4])[0]
+                    icmp = packet
+                else:
+                    packet, addr = sock.recvfrom(1024)
+                    header_len = (packet[0] & 0x0F) * 4
+                    ttl = packet[8]
+                    icmp = packet[header_len:]
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                break
+
+            received = time.perf_counter()
+            if len(icmp) >= 8:
+                icmp_type, _, _, r_ident, r_seq = struct.unpack('!BBHHH', icmp[:8])
+                pending = outstanding if r_seq in outstanding else expired
+                entry = pending.get(r_seq)
+                if (icmp_type == ICMP_ECHO_REPLY and entry and entry[0] == addr[0]
+                        and (self.kind == "dgram" or r_ident == ident)):
+                    # A late reply still proves the host is up, and its RTT stretches the adaptive timeout
+                    ip, sent_at, attempt = pending.pop(r_seq)
+                    if self.timing:
+                        # A reply to a retry means the first probe (or its reply) was dropped
+                        self.timing.on_reply(received - sent_at, retried=attempt > 0)
+                    if ip not in results:
+                        results[ip] = {
+                            'rtt': round((received - sent_at) * 1000, 2),
+                            'ttl': ttl
+                        }
+                        if on_reply:
+                            try:
+                                on_reply(ip, results[ip])
+                            except Exception:
+                                pass
+            readable, _, _ = select.select([sock], [], [], 0)
+
+
+def icmp_sweep(targets, timeout=1.0, retries=1, on_reply=None, on_progress=None, rate=2000, timing=None, source=None):
+    """Convenience wrapper returning {ip: {'rtt': ms, 'ttl': ttl}} for every host that answered."""
+    return IcmpSweeper(timeout=timeout, retries=retries, rate=rate, timing=timing, source=source).sweep(
+        targets, on_reply=on_reply, on_progress=on_progress
+    )
@@ -0,0 +1,179 @@
+import sqlite3
+import threading
+import re
+import os
+from datetime import datetime
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (
+    mac TEXT PRIMARY KEY,
+    ip TEXT,
+    hostname TEXT,
+    vendor TEXT,
+    os TEXT,
+    os_confidence TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    last_scan_id TEXT,
+    seen_count INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_devices_ip ON devices(ip);
+CREATE INDEX IF NOT EXISTS idx_devices_last_seen ON devices(last_seen);
+"""
+
+# Placeholder values produced by scans that must never overwrite real data
+_PLACEHOLDERS = ('Unknown', 'Skipped', 'Not Found', '')
+
+_UPSERT = """
+INSERT INTO devices (mac, ip, hostname, vendor, os, os_confidence, first_seen, last_seen, last_scan_id, seen_count)
+VALUES (:mac, :ip, :hostname, :vendor, :os, :os_confidence, :seen, :seen, :scan_id, 1)
+ON CONFLICT(mac) DO UPDATE SET
+    ip = excluded.ip,
+    hostname = COALESCE(excluded.hostname, devices.hostname),
+    vendor = COALESCE(excluded.vendor, devices.vendor),
+    os = COALESCE(excluded.os, devices.os),
+    os_confidence = COALESCE(excluded.os_confidence, devices.os_confidence),
+    last_seen = MAX(devices.last_seen, excluded.last_seen),
+    last_scan_id = excluded.last_scan_id,
+    seen_count = devices.seen_count + 1
+"""
+
+_COLUMNS = ('mac', 'ip', 'hostname', 'vendor', 'os', 'os_confidence', 'first_seen', 'last_seen', 'last_scan_id', 'seen_count')
+
+
+def normalize_mac(mac):
+    """Returns aa:bb:cc:dd:ee:ff, or None if the value is not a MAC address."""
+    if not mac:
+        return None
+    digits = re.sub(r'[^0-9a-fA-F]', '', mac).lower()
+    if len(digits) != 12:
+        return None
+    return ':'.join(digits[i:i+2] for i in range(0, 12, 2))
+
+
+def _value(value):
+    return None if value in _PLACEHOLDERS or value is None else value
+
+
+def _like(text):
+    # User text is matched literally: % and _ would otherwise act as wildcards
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class DeviceInventory:
+    """
+    Embedded SQLite inventory of every device ever scanned, keyed by normalised
+    MAC. Each scan is upserted in a single transaction; IP and last_seen are
+    indexed so lookups stay O(log n) as history grows.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            folder = os.path.dirname(self.db_path)
+            if folder and not os.path.exists(folder):
+                os.makedirs(folder, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def upsert_scan(self, results, scan_id=None, seen_at=None):
+        seen = seen_at or datetime.now().isoformat(timespec='seconds')
+        rows = {}
+        for device in results or []:
+            mac = normalize_mac(device.get('mac'))
+            if not mac:
+                continue
+            row = {
+                'mac': mac,
+                'ip': device.get('ip'),
+                'hostname': _value(device.get('hostname')),
+                'vendor': _value(device.get('vendor')),
+                'os': _value(device.get('os')),
+                'os_confidence': _value(device.get('os_confidence')),
+                'seen': seen,
+                'scan_id': scan_id
+            }
+            # One row per MAC, so a multi-homed host (or its IPv6 entry) counts as seen once per scan
+            existing = rows.get(mac)
+            if existing is None:
+                rows[mac] = row
+                continue
+            if existing['ip'] and ':' in existing['ip'] and row['ip'] and ':' not in row['ip']:
+                existing['ip'] = row['ip']
+            for key, value in row.items():
+                if existing[key] is None:
+                    existing[key] = value
+        if not rows:
+            return 0
+        with self.lock:
+            conn = self._connection()
+            with conn:  # one transaction per scan
+                conn.executemany(_UPSERT, list(rows.values()))
+        return len(rows)
+
+    def get(self, mac):
+        mac = normalize_mac(mac)
+        if not mac:
+            return None
+        with self.lock:
+            row = self._connection().execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM devices WHERE mac = ?", (mac,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def query(self, ip=None, mac=None, hostname=None, vendor=None, os_name=None, since=None, limit=50, offset=0):
+        clauses = []
+        params = []
+        if ip:
+            clauses.append("ip = ?")
+            params.append(ip)
+        if mac:
+            normalized = normalize_mac(mac)
+            if normalized:
+                clauses.append("mac = ?")
+                params.append(normalized)
+            else:
+                # Partial MAC (e.g. an OUI prefix)
+                clauses.append("mac LIKE ? ESCAPE '\\'")
+                params.append(_like(mac.lower().replace('-', ':')) + '%')
+        if hostname:
+            clauses.append("hostname LIKE ? ESCAPE '\\'")
+            params.append(f"%{_like(hostname)}%")
+        if vendor:
+            clauses.append("vendor LIKE ? ESCAPE '\\'")
+            params.append(f"%{_like(vendor)}%")
+        if os_name:
+            clauses.append("os LIKE ? ESCAPE '\\'")
+            params.append(f"%{_like(os_name)}%")
+        if since:
+            clauses.append("last_seen >= ?")
+            params.append(since)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.lock:
+            conn = self._connection()
+            total = conn.execute(f"SELECT COUNT(*) FROM devices {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM devices {where} ORDER BY last_seen DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return {
+            'total': total,
+            'limit': limit,
+            'offset': offset,
+            'devices': [dict(row) for row in rows]
+        }
+
+    def clear(self):
+        with self.lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM devices")
@@ -129,7 +129,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 <div class="device-sub">
                     <span>${device.ip}</span> | <span>${device.mac}</span>
                 </div>
-                <div class="device-sub"><strong>Vendor:</strong> ${device.vendor || 'Unknown'}</div>
+                <div class="device-sub device-vendor"><strong>Vendor:</strong> ${device.vendor || 'Unknown'}</div>
             </div>
             <div class="device-actions"></div>
         `;
@@ -257,7 +257,106 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
-    async function performScan(endpoint) {
+    function performScan(endpoint) {
+        if (window.EventSource) return performStreamingScan(endpoint);
+        return performBlockingScan(endpoint);
+    }
+
+    function finishScan(scanType, results, warning) {
+        saveLastScanDetails(scanType, results);
+        showNotification(`${scanType} completed. Found ${results.length} devices.`, 'success');
+        if (warning) showNotification(warning, 'warning');
+        document.dispatchEvent(new CustomEvent('scanCompleted', { detail: { results, scanType } }));
+        if (window.updateHistorySizes) window.updateHistorySizes();
+        document.dispatchEvent(new Event('historyUpdated'));
+    }
+
+    // Devices are rendered as /scan/stream discovers them and patched as enrichment arrives
+    function performStreamingScan(endpoint) {
+        const type = endpoint === 'scan/basic' ? 'basic' : 'full';
+        const scanType = type === 'basic' ? 'Basic Scan' : 'Full Scan';
+        showNotification(`Starting ${scanType}...`, 'info');
+        resetDeviceDetails();
+
+        const streamedDevices = {};
+        let discoveredDevicesCount = 0;
+        let receivedAnything = false;
+        let finished = false;
+        const source = new EventSource(`/scan/stream?type=${type}`);
+
+        source.addEventListener('started', () => {
+            receivedAnything = true;
+            if (resultsBody) resultsBody.innerHTML = '';
+            if (userDeviceList) userDeviceList.innerHTML = '';
+        });
+
+        source.addEventListener('device', (event) => {
+            const device = JSON.parse(event.data);
+            streamedDevices[device.ip] = device;
+            const isDisabled = disabledDevices.some(d => d.mac === device.mac);
+            if (device.is_local || device.is_gateway) {
+                createDeviceItem(device, false, true);
+            } else if (!isDisabled) {
+                createDeviceItem(device, false);
+                discoveredDevicesCount++;
+            }
+        });
+
+        source.addEventListener('patch', (event) => {
+            const patch = JSON.parse(event.data);
+            const device = streamedDevices[patch.ip];
+            if (!device) return;
+            Object.assign(device, patch);
+
+            const element = document.querySelector(`.device-item[data-ip="${patch.ip}"]`);
+            if (!element) return;
+            if (patch.mac) {
+                element.dataset.mac = patch.mac;
+                const subSpans = element.querySelectorAll('.device-sub span');
+                if (subSpans.length > 1) subSpans[1].textContent = patch.mac;
+            }
+            if (patch.hostname) {
+                const nameElement = element.querySelector('.device-name');
+                if (nameElement) nameElement.textContent = patch.hostname || 'Unknown Host';
+            }
+            if (patch.vendor) {
+                const vendorElement = element.querySelector('.device-vendor');
+                if (vendorElement) vendorElement.innerHTML = `<strong>Vendor:</strong> ${patch.vendor || 'Unknown'}`;
+            }
+        });
+
+        source.addEventListener('summary', (event) => {
+            finished = true;
+            source.close();
+            const data = JSON.parse(event.data);
+            const results = Array.isArray(data.results) ? data.results : [];
+            if (resultsBody && discoveredDevicesCount === 0) {
+                resultsBody.innerHTML = '<div class="no-results">No devices discovered in this scan.</div>';
+            }
+            finishScan(scanType, results, data.warning);
+        });
+
+        source.addEventListener('scan_error', (event) => {
+            finished = true;
+            source.close();
+            const data = JSON.parse(event.data);
+            showNotification(`${scanType} failed: ${data.error}`, 'error');
+        });
+
+        source.onerror = () => {
+            if (finished) return;
+            finished = true;
+            source.close();
+            if (!receivedAnything) {
+                // Stream unavailable (older server or proxy) - fall back to the blocking endpoint
+                performBlockingScan(endpoint);
+            } else {
+                showNotification(`${scanType} failed: connection lost`, 'error');
+            }
+        };
+    }
+
+    async function performBlockingScan(endpoint) {
         const scanType = endpoint === 'scan/basic' ? 'Basic Scan' : 'Full Scan';
         showNotification(`Starting ${scanType}...`, 'info');
         resetDeviceDetails();
@@ -287,12 +386,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 resultsBody.innerHTML = '<div class="no-results">No devices discovered in this scan.</div>';
             }
 
-            saveLastScanDetails(scanType, results);
-            showNotification(`${scanType} completed. Found ${results.length} devices.`, 'success');
-            if (data.warning) showNotification(data.warning, 'warning');
-            document.dispatchEvent(new CustomEvent('scanCompleted', { detail: { results, scanType } }));
-            if (window.updateHistorySizes) window.updateHistorySizes();
-            document.dispatchEvent(new Event('historyUpdated'));
+            finishScan(scanType, results, data.warning);
         } catch (error) {
             console.error(`${scanType} failed:`, error);
             showNotification(`${scanType} failed: ${error.message}`, 'error');
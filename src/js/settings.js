@@ -11,6 +11,14 @@ document.addEventListener('DOMContentLoaded', () => {
     const serverBackendDropdown = document.getElementById('serverBackendDropdown');
     const scanningMethodDropdown = document.getElementById('scanningMethodDropdown');
     const parallelScansToggle = document.getElementById('parallelScansToggle');
+    const deltaFullScansToggle = document.getElementById('deltaFullScansToggle');
+    const passiveOsToggle = document.getElementById('passiveOsToggle');
+    const scheduledScansToggle = document.getElementById('scheduledScansToggle');
+    const passiveDiscoveryToggle = document.getElementById('passiveDiscoveryToggle');
+    const neighborWatchToggle = document.getElementById('neighborWatchToggle');
+    const presenceTrackingToggle = document.getElementById('presenceTrackingToggle');
+    const scanAllInterfacesToggle = document.getElementById('scanAllInterfacesToggle');
+    const ipv6DiscoveryToggle = document.getElementById('ipv6DiscoveryToggle');
     const overrideMultiplierInput = document.getElementById('overrideMultiplierInput');
     const betaFeaturesToggle = document.getElementById('betaFeaturesToggle');
     const applySettingsBtn = document.getElementById('applySettingsBtn');
@@ -158,6 +166,14 @@ document.addEventListener('DOMContentLoaded', () => {
             // Scanning Settings
             scanningMethodDropdown.value = settings.scanning_method || 'divide_and_conquer';
             parallelScansToggle.checked = settings.parallel_scans !== false;
+            if (deltaFullScansToggle) deltaFullScansToggle.checked = settings.delta_full_scans || false;
+            if (passiveOsToggle) passiveOsToggle.checked = settings.passive_os_fingerprinting || false;
+            if (scheduledScansToggle) scheduledScansToggle.checked = settings.scheduled_scans || false;
+            if (passiveDiscoveryToggle) passiveDiscoveryToggle.checked = settings.passive_discovery || false;
+            if (neighborWatchToggle) neighborWatchToggle.checked = settings.neighbor_watch || false;
+            if (presenceTrackingToggle) presenceTrackingToggle.checked = settings.presence_tracking || false;
+            if (scanAllInterfacesToggle) scanAllInterfacesToggle.checked = settings.scan_all_interfaces || false;
+            if (ipv6DiscoveryToggle) ipv6DiscoveryToggle.checked = settings.ipv6_discovery || false;
             overrideMultiplierInput.value = settings.override_multiplier || 2;
             
             // NEW: Separate scan methods
@@ -213,6 +229,14 @@ document.addEventListener('DOMContentLoaded', () => {
             allow_bypass_ignored: allowBypassIgnoredToggle.checked,  // NEW
             scanning_method: scanningMethodDropdown.value,
             parallel_scans: parallelScansToggle.checked,
+            delta_full_scans: deltaFullScansToggle ? deltaFullScansToggle.checked : false,
+            passive_os_fingerprinting: passiveOsToggle ? passiveOsToggle.checked : false,
+            scheduled_scans: scheduledScansToggle ? scheduledScansToggle.checked : false,
+            passive_discovery: passiveDiscoveryToggle ? passiveDiscoveryToggle.checked : false,
+            neighbor_watch: neighborWatchToggle ? neighborWatchToggle.checked : false,
+            presence_tracking: presenceTrackingToggle ? presenceTrackingToggle.checked : false,
+            scan_all_interfaces: scanAllInterfacesToggle ? scanAllInterfacesToggle.checked : false,
+            ipv6_discovery: ipv6DiscoveryToggle ? ipv6DiscoveryToggle.checked : false,
             override_multiplier: parseInt(overrideMultiplierInput.value, 10),
             
             // NEW: Separate scan methods
@@ -632,6 +656,10 @@ document.addEventListener('DOMContentLoaded', () => {
                 <h4>Smart</h4>
                 <p>Single ARP sweep to discover hosts instantly, reuses MACs for vendor, and resolves hostnames on a tight budget.</p>
             </div>
+            <div class="tooltip-item">
+                <h4>ICMP Sweep</h4>
+                <p>Pings every address from a single socket instead of one ping process per address, and records latency/TTL. Needs admin rights on Windows, falls back to Divide and Conquer otherwise.</p>
+            </div>
         `);
 
         {
@@ -739,7 +767,10 @@ document.addEventListener('DOMContentLoaded', () => {
         serverBackendDropdown, scanningMethodDropdown, parallelScansToggle,
         betaFeaturesToggle, overrideMultiplierInput, uiDebugModeToggle, networkDebugModeToggle,
         allowBypassIgnoredToggle, separateScanMethodsToggle,  // NEW
-        basicScanMethodDropdown, fullScanMethodDropdown  // NEW
+        basicScanMethodDropdown, fullScanMethodDropdown,  // NEW
+        deltaFullScansToggle, passiveOsToggle, scheduledScansToggle, passiveDiscoveryToggle,
+        neighborWatchToggle, presenceTrackingToggle, scanAllInterfacesToggle,
+        ipv6DiscoveryToggle
     ];
 
     allSettingsControls.forEach(control => {
@@ -861,6 +892,10 @@ document.addEventListener('DOMContentLoaded', () => {
                 <h4>Smart</h4>
                 <p>Single ARP sweep to discover hosts instantly, reuses MACs for vendor, and resolves hostnames on a tight budget.</p>
             </div>
+            <div class="tooltip-item">
+                <h4>ICMP Sweep</h4>
+                <p>Pings every address from a single socket instead of one ping process per address, and records latency/TTL. Needs admin rights on Windows, falls back to Divide and Conquer otherwise.</p>
+            </div>
         `);
 
         {
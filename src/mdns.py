@@ -0,0 +1,119 @@
+import socket
+import struct
+import select
+import time
+import random
+
+from src.rdns import _HEADER, _TYPE_PTR, _CLASS_IN, _encode_name, _reverse_name, _read_name
+
+MDNS_GROUP = '224.0.0.251'
+MDNS_PORT = 5353
+LLMNR_PORT = 5355
+
+# Keep each mDNS query comfortably inside one Ethernet frame
+_MAX_QUESTIONS = 40
+
+
+def _iter_ptr_answers(data):
+    """Yields (owner name, target) for every PTR record in the answer/additional sections."""
+    _, _, qdcount, ancount, nscount, arcount = _HEADER.unpack_from(data, 0)
+    offset = _HEADER.size
+    for _ in range(qdcount):
+        _, offset = _read_name(data, offset)
+        offset += 4
+    for _ in range(ancount + nscount + arcount):
+        owner, offset = _read_name(data, offset)
+        rtype, _, _, rdlength = struct.unpack_from('!HHIH', data, offset)
+        offset += 10
+        if rtype == _TYPE_PTR:
+            target, _ = _read_name(data, offset)
+            yield owner.lower(), target
+        offset += rdlength
+
+
+def _build_mdns_queries(ips):
+    # One-shot "legacy" queries: sent from an ephemeral port, answered by unicast to us
+    ips = list(ips)
+    for start in range(0, len(ips), _MAX_QUESTIONS):
+        chunk = ips[start:start + _MAX_QUESTIONS]
+        questions = b''.join(_encode_name(_reverse_name(ip)) + struct.pack('!HH', _TYPE_PTR, _CLASS_IN) for ip in chunk)
+        yield _HEADER.pack(0, 0, len(chunk), 0, 0, 0) + questions
+
+
+def _build_llmnr_query(txid, ip):
+    # LLMNR uses the DNS wire format with all header flags clear
+    return _HEADER.pack(txid, 0, 1, 0, 0, 0) + _encode_name(_reverse_name(ip)) + struct.pack('!HH', _TYPE_PTR, _CLASS_IN)
+
+
+def _clean(name):
+    return name.rstrip('.') or None
+
+
+def multicast_lookup(ips, timeout=1.0, interface_ip=None, mdns=True, llmnr=True):
+    """
+    Reverse-resolves `ips` with one mDNS burst (many PTR questions per packet
+    to 224.0.0.251) and one LLMNR burst (a PTR query to each host's port 5355,
+    all from the same socket), collecting answers for a single `timeout`
+    window. Returns {ip: hostname} for the hosts that answered.
+    """
+    ips = list(dict.fromkeys(ips))
+    if not ips:
+        return {}
+    wanted = {_reverse_name(ip).lower(): ip for ip in ips}
+    results = {}
+    sockets = []
+
+    if mdns:
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 255)
+            if interface_ip:
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface_ip))
+            sock.bind((interface_ip or '0.0.0.0', 0))
+            sock.setblocking(False)
+            for packet in _build_mdns_queries(ips):
+                sock.sendto(packet, (MDNS_GROUP, MDNS_PORT))
+            sockets.append(sock)
+        except OSError as e:
+            print(f"\033[93m[WARN] mDNS burst failed: {e}\033[0m")
+
+    if llmnr:
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind((interface_ip or '0.0.0.0', 0))
+            sock.setblocking(False)
+            for ip in ips:
+                try:
+                    sock.sendto(_build_llmnr_query(random.getrandbits(16), ip), (ip, LLMNR_PORT))
+                except OSError:
+                    continue
+            sockets.append(sock)
+        except OSError as e:
+            print(f"\033[93m[WARN] LLMNR burst failed: {e}\033[0m")
+
+    try:
+        deadline = time.monotonic() + timeout
+        while sockets and len(results) < len(ips):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            readable, _, _ = select.select(sockets, [], [], remaining)
+            for sock in readable:
+                try:
+                    data, _ = sock.recvfrom(9000)
+                except OSError:
+                    # Includes Windows' ConnectionResetError for ICMP port-unreachable
+                    continue
+                try:
+                    for owner, target in _iter_ptr_answers(data):
+                        ip = wanted.get(owner)
+                        name = _clean(target)
+                        # First answer wins; mDNS and LLMNR rarely disagree
+                        if ip and name and ip not in results:
+                            results[ip] = name
+                except (struct.error, IndexError, ValueError):
+                    continue
+    finally:
+        for sock in sockets:
+            sock.close()
+    return results
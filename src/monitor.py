@@ -3,11 +3,12 @@ import socket
 import time
 import platform
 import subprocess
-from threading import Thread
 import urllib.request
 import json
 import ipaddress
 
+from src.portscan import port_scanner, COMMON_PORTS
+
 class ConnectionMonitor:
     def __init__(self):
         self.connection_start_times = {}
@@ -342,43 +343,8 @@ class ConnectionMonitor:
             return None
 
     def _scan_common_ports(self, ip):
-        # Scan all well-known ports (1-1024) plus a other list
-        well_known_ports = range(1, 1025)
-        
-        other_ports = [
-            80,     
-            443,    
-            1433,   
-            2049,   
-            5900,   
-            19132,  
-            25565,
-            27015
-        ]
-
-        ports_to_scan = sorted(list(set(list(well_known_ports) + other_ports)))
-        
-        open_ports = []
-        threads = []
-        
-        def scan_port(port):
-            try:
-                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                    s.settimeout(0.2)
-                    if s.connect_ex((ip, port)) == 0:
-                        open_ports.append(port)
-            except Exception:
-                pass
-
-        for port in ports_to_scan:
-            thread = Thread(target=scan_port, args=(port,))
-            threads.append(thread)
-            thread.start()
-        
-        for thread in threads:
-            thread.join()
-            
-        return sorted(open_ports)
+        # Well-known ports (1-1024) plus a few LAN/game ports, through the shared selector-based scanner
+        return port_scanner.scan(ip, COMMON_PORTS)
 
     def _online_whois_lookup(self, ip):
         try:
@@ -0,0 +1,211 @@
+import concurrent.futures
+import ipaddress
+import os
+import select
+import socket
+import struct
+import threading
+import time
+
+import psutil
+
+from src.neighbors import neighbor_table
+
+try:
+    from scapy.all import (  # type: ignore
+        Ether, IPv6, IPv6ExtHdrDestOpt, HBHOptUnknown, ICMPv6EchoRequest, ICMPv6EchoReply,
+        ICMPv6ParamProblem, ICMPv6ND_RS, ICMPv6ND_RA, ICMPv6NDOptSrcLLAddr, AsyncSniffer, sendp
+    )
+    _SCAPY_AVAILABLE = True
+except Exception:
+    _SCAPY_AVAILABLE = False
+
+ALL_NODES = "ff02::1"
+ALL_ROUTERS = "ff02::2"
+_ALL_NODES_MAC = "33:33:00:00:00:01"
+_ALL_ROUTERS_MAC = "33:33:00:00:00:02"
+
+_ICMPV6_ECHO_REQUEST = 128
+_ICMPV6_ECHO_REPLY = 129
+_ICMPV6_ECHO = struct.Struct('!BBHHH')  # type, code, checksum, identifier, sequence
+# Destination option type whose top bits (10) mean "discard and send Parameter Problem, even to multicast"
+_UNKNOWN_OPTION = 0x80
+
+
+def _strip_scope(address):
+    return address.split('%', 1)[0]
+
+
+def eui64_mac(address):
+    """MAC embedded in a modified EUI-64 interface identifier (...ff:fe...), or None for random/privacy IDs."""
+    try:
+        iid = ipaddress.IPv6Address(_strip_scope(address)).packed[8:]
+    except ValueError:
+        return None
+    if iid[3:5] != b'\xff\xfe':
+        return None
+    return ':'.join(f'{b:02x}' for b in bytes([iid[0] ^ 0x02]) + iid[1:3] + iid[5:8])
+
+
+def _is_usable(address):
+    return not (address.is_multicast or address.is_loopback or address.is_unspecified)
+
+
+def interface_addresses(iface):
+    """(scope id, [own IPv6 addresses], MAC) of one interface; the scope id is None without IPv6."""
+    scope_id = None
+    sources = []
+    mac = None
+    for addr in psutil.net_if_addrs().get(iface, []):
+        if addr.family == socket.AF_INET6:
+            address, _, scope = addr.address.partition('%')
+            try:
+                parsed = ipaddress.IPv6Address(address)
+            except ValueError:
+                continue
+            if not _is_usable(parsed):
+                continue
+            if parsed.is_link_local:
+                if scope.isdigit():
+                    scope_id = int(scope)
+                sources.insert(0, address)  # link-local first: it is the one NDP speaks from
+            else:
+                sources.append(address)
+        elif addr.family == getattr(psutil, 'AF_LINK', object()) and addr.address:
+            mac = addr.address.lower().replace('-', ':')
+    if sources and scope_id is None:
+        try:
+            scope_id = socket.if_nametoindex(iface)
+        except OSError:
+            pass
+    return scope_id, sources, mac
+
+
+def _probe_scapy(iface, sources, own_mac, timeout):
+    # Replies are captured at L2, so every responder's MAC comes straight from its frame
+    found = {}
+    routers = set()
+    own = set(sources)
+    started = threading.Event()
+
+    def on_packet(pkt):
+        if IPv6 not in pkt or Ether not in pkt:
+            return
+        src = pkt[IPv6].src
+        if src in own or src == "::":
+            return
+        if ICMPv6EchoReply in pkt or ICMPv6ParamProblem in pkt or ICMPv6ND_RA in pkt:
+            found.setdefault(src, pkt[Ether].src.lower())
+            if ICMPv6ND_RA in pkt:
+                routers.add(src)
+
+    sniffer = AsyncSniffer(iface=iface, filter="icmp6", prn=on_packet, store=False, started_callback=started.set)
+    sniffer.start()
+    started.wait(1.0)
+    try:
+        ident = os.getpid() & 0xFFFF
+        frames = []
+        for source in sources:
+            # Sending from each global address too makes hosts answer from theirs, not just link-local
+            base = Ether(dst=_ALL_NODES_MAC) / IPv6(src=source, dst=ALL_NODES)
+            frames.append(base / ICMPv6EchoRequest(id=ident, seq=1))
+            # Hosts that ignore multicast echo (Windows) still have to report an option they cannot skip
+            frames.append(base / IPv6ExtHdrDestOpt(options=[HBHOptUnknown(otype=_UNKNOWN_OPTION, optdata=b'\x00')])
+                          / ICMPv6EchoRequest(id=ident, seq=2))
+        link_local = sources[0]
+        if ipaddress.IPv6Address(link_local).is_link_local:
+            solicit = Ether(dst=_ALL_ROUTERS_MAC) / IPv6(src=link_local, dst=ALL_ROUTERS, hlim=255) / ICMPv6ND_RS()
+            if own_mac:
+                solicit = solicit / ICMPv6NDOptSrcLLAddr(lladdr=own_mac)
+            frames.append(solicit)
+        sendp(frames, iface=iface, verbose=0)
+        time.sleep(timeout)
+    finally:
+        sniffer.stop()
+    return found, routers
+
+
+def _open_icmpv6_socket():
+    try:
+        return socket.socket(socket.AF_INET6, socket.SOCK_RAW, socket.IPPROTO_ICMPV6)
+    except OSError:
+        # Unprivileged ICMPv6 "ping socket" (Linux net.ipv4.ping_group_range)
+        return socket.socket(socket.AF_INET6, socket.SOCK_DGRAM, socket.IPPROTO_ICMPV6)
+
+
+def _probe_socket(scope_id, sources, timeout):
+    # No raw L2 access: multicast echo from each source address, MACs come from the neighbour cache afterwards
+    found = {}
+    own = set(sources)
+    sockets = []
+    try:
+        for source in sources:
+            scope = scope_id if ipaddress.IPv6Address(source).is_link_local else 0
+            sock = _open_icmpv6_socket()
+            sockets.append(sock)
+            sock.setblocking(False)
+            sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_MULTICAST_IF, scope_id)
+            sock.bind((source, 0, 0, scope))
+            # The kernel fills in the ICMPv6 checksum (RFC 3542)
+            packet = _ICMPV6_ECHO.pack(_ICMPV6_ECHO_REQUEST, 0, 0, os.getpid() & 0xFFFF, 1) + b'nrt-ndp'
+            sock.sendto(packet, (ALL_NODES, 0, 0, scope_id))
+
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            readable, _, _ = select.select(sockets, [], [], remaining)
+            for sock in readable:
+                try:
+                    packet, addr = sock.recvfrom(1024)
+                except OSError:
+                    continue
+                src = _strip_scope(addr[0])
+                if packet and packet[0] == _ICMPV6_ECHO_REPLY and src not in own:
+                    found.setdefault(src, None)
+    finally:
+        for sock in sockets:
+            sock.close()
+
+    table = neighbor_table.snapshot(max_age=0)
+    return {address: table.get(address) or eui64_mac(address) for address in found}, set()
+
+
+def discover_interface(iface, timeout=1.5):
+    """
+    IPv6 neighbours on one interface: one multicast echo to ff02::1 per own
+    address, an echo with an unknown destination option for hosts that ignore
+    multicast echo, and a Router Solicitation. Returns [{'address', 'mac',
+    'interface', 'router'}].
+    """
+    scope_id, sources, own_mac = interface_addresses(iface)
+    if scope_id is None or not sources:
+        return []
+    if _SCAPY_AVAILABLE:
+        try:
+            found, routers = _probe_scapy(iface, sources, own_mac, timeout)
+        except Exception:
+            found, routers = _probe_socket(scope_id, sources, timeout)
+    else:
+        found, routers = _probe_socket(scope_id, sources, timeout)
+    return [
+        {'address': address, 'mac': mac or eui64_mac(address), 'interface': iface, 'router': address in routers}
+        for address, mac in found.items()
+    ]
+
+
+def discover_ipv6(interfaces, timeout=1.5):
+    """Runs discover_interface on every interface at once; a handful of multicast packets each."""
+    interfaces = [iface for iface in dict.fromkeys(interfaces) if iface]
+    if not interfaces:
+        return []
+    neighbours = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(interfaces)) as executor:
+        futures = {executor.submit(discover_interface, iface, timeout): iface for iface in interfaces}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                neighbours.extend(future.result())
+            except Exception as e:
+                print(f"\033[93m[WARN] IPv6 discovery on {futures[future]} failed: {e}\033[0m")
+    return neighbours
@@ -0,0 +1,269 @@
+import errno
+import platform
+import queue
+import socket
+import threading
+import time
+
+from src.neighbors import (
+    neighbor_table, _read_netlink, _read_iphlpapi, _iphlpapi_rows, _unpack_neigh, _align,
+    _NETLINK_ROUTE, _NLMSG_HEADER, _RTM_NEWNEIGH, _RTM_DELNEIGH,
+    _NUD_INCOMPLETE, _NUD_FAILED, _NUD_NOARP, _NLNS_UNREACHABLE, _NLNS_PROBE
+)
+
+# Normalised neighbour changes reported by the platform watchers
+PRESENT = "present"  # resolved: reachable, or a recent entry the kernel has not re-verified yet
+FAILED = "failed"    # address resolution went unanswered
+DELETED = "deleted"  # entry dropped, usually garbage collection of an idle one
+
+_RTMGRP_NEIGH = 0x4
+# A sweep can produce thousands of notifications at once; overflowing the socket forces a re-dump
+_NETLINK_RCVBUF = 1 << 20
+# Windows has no neighbour change notification, so the table is diffed this often
+POLL_INTERVAL = 1.0
+
+
+def _netlink_change(msg_type, state):
+    if state & _NUD_NOARP:
+        return None  # multicast/broadcast mappings
+    if msg_type == _RTM_DELNEIGH:
+        return DELETED
+    if state & _NUD_FAILED:
+        return FAILED
+    if not state or state & _NUD_INCOMPLETE:
+        return None  # resolution still in progress
+    return PRESENT
+
+
+def _watch_netlink(watcher):
+    sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, _NETLINK_ROUTE)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _NETLINK_RCVBUF)
+        sock.bind((0, _RTMGRP_NEIGH))
+        sock.settimeout(0.5)
+        # Subscribe first, then dump, so nothing falls between the two
+        watcher._resync(_read_netlink(), announce=False)
+        while watcher.active:
+            try:
+                data = sock.recv(65536)
+            except socket.timeout:
+                watcher._tick()
+                continue
+            except OSError as e:
+                if e.errno != errno.ENOBUFS:
+                    raise
+                watcher._resync(_read_netlink(), announce=True)
+                continue
+            offset = 0
+            while offset + _NLMSG_HEADER.size <= len(data):
+                msg_len, msg_type, _, _, _ = _NLMSG_HEADER.unpack_from(data, offset)
+                if msg_len < _NLMSG_HEADER.size:
+                    break
+                if msg_type in (_RTM_NEWNEIGH, _RTM_DELNEIGH):
+                    state, ip, mac = _unpack_neigh(data, offset + _NLMSG_HEADER.size, offset + msg_len)
+                    change = _netlink_change(msg_type, state)
+                    if ip and change:
+                        watcher._update(ip, mac, change)
+                offset += _align(msg_len)
+            watcher._tick()
+    finally:
+        sock.close()
+
+
+def _iphlpapi_changes():
+    changes = {}
+    for ip, mac, state in _iphlpapi_rows():
+        if state >= _NLNS_PROBE and mac:
+            changes[ip] = (mac, PRESENT)
+        elif state == _NLNS_UNREACHABLE:
+            changes[ip] = (None, FAILED)
+    return changes
+
+
+def _poll_iphlpapi(watcher):
+    # NotifyIpInterfaceChange only covers interfaces, so neighbours are found by diffing GetIpNetTable2
+    watcher._resync(_read_iphlpapi(), announce=False)
+    previous = _iphlpapi_changes()
+    while watcher.active:
+        time.sleep(POLL_INTERVAL)
+        current = _iphlpapi_changes()
+        for ip, (mac, change) in current.items():
+            if previous.get(ip) != (mac, change):
+                watcher._update(ip, mac, change)
+        for ip in previous.keys() - current.keys():
+            watcher._update(ip, None, DELETED)
+        previous = current
+        watcher._tick()
+
+
+class NeighborWatcher:
+    """
+    Live device table fed by the OS neighbour cache instead of probes: a
+    netlink RTNLGRP_NEIGH subscription on Linux, a GetIpNetTable2 diff every
+    POLL_INTERVAL on Windows. Devices are keyed by MAC (a host's IPv4 and
+    IPv6 entries count as one device) and subscribers receive "join" and
+    "leave" events.
+
+    A device joins as soon as any of its addresses resolves. It leaves when
+    resolution of one of them fails and none resolves again within
+    `leave_after` seconds, so a host that misses one probe does not flap. A
+    deleted entry is normally garbage collection of an idle one and says
+    nothing about the device, so it never counts as leaving; idle devices are
+    only noticed gone once something sends them traffic.
+    """
+
+    def __init__(self, leave_after=10.0):
+        self.leave_after = leave_after
+        self.lock = threading.Lock()
+        self.devices = {}  # mac -> {'mac', 'ips', 'online', 'first_seen', 'last_seen', 'changed_at'}
+        self.active = False
+        self._ip_mac = {}  # ip -> mac last resolved for it, kept to attribute failures that carry no MAC
+        self._leaving = {}  # mac -> monotonic time its leave becomes final
+        self._subscribers = []
+        self._thread = None
+
+    def available(self):
+        return platform.system() in ('Linux', 'Windows')
+
+    def start(self):
+        watch = {'Linux': _watch_netlink, 'Windows': _poll_iphlpapi}.get(platform.system())
+        if not watch:
+            print("\033[93m[WARN] Neighbour change watching is not supported on this platform.\033[0m")
+            return False
+        if self._thread and self._thread.is_alive():
+            self.active = True
+            return True
+
+        def run():
+            try:
+                watch(self)
+            except Exception as e:
+                print(f"\033[93m[WARN] Neighbour change watcher stopped: {e}\033[0m")
+            self.active = False
+
+        self.active = True
+        self._thread = threading.Thread(target=run, daemon=True, name="neighbor-watcher")
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self.active = False
+
+    # --- events ---
+
+    def subscribe(self):
+        """Returns a queue that receives every join/leave event from now on."""
+        subscriber = queue.Queue()
+        with self.lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def _emit(self, event, device, ip=None):
+        # Caller holds the lock
+        payload = {
+            "event": event,
+            "mac": device['mac'],
+            "ip": ip,
+            "ips": sorted(device['ips']),
+            "time": device['changed_at']
+        }
+        for subscriber in self._subscribers:
+            subscriber.put(payload)
+
+    # --- changes from the platform watcher ---
+
+    def _device(self, mac, now):
+        # Caller holds the lock
+        device = self.devices.get(mac)
+        if device is None:
+            device = self.devices[mac] = {
+                'mac': mac, 'ips': set(), 'online': False, 'first_seen': now, 'last_seen': now, 'changed_at': now
+            }
+        return device
+
+    def _present(self, ip, mac, now, announce):
+        # Caller holds the lock
+        previous = self._ip_mac.get(ip)
+        if previous and previous != mac and previous in self.devices:
+            # The address now belongs to another device
+            self.devices[previous]['ips'].discard(ip)
+        self._ip_mac[ip] = mac
+        device = self._device(mac, now)
+        device['ips'].add(ip)
+        device['last_seen'] = now
+        # Resolving again before a pending leave became final cancels it silently
+        self._leaving.pop(mac, None)
+        if not device['online']:
+            device['online'] = True
+            device['changed_at'] = now
+            if announce:
+                self._emit("join", device, ip)
+
+    def _update(self, ip, mac, change):
+        neighbor_table.apply(ip, mac if change == PRESENT else None)
+        now = time.time()
+        with self.lock:
+            if change == PRESENT:
+                # No usable link-layer address (e.g. a NEWNEIGH without a 6-byte LLADDR): nothing to key the device by
+                if mac:
+                    self._present(ip, mac, now, announce=True)
+            elif change == FAILED:
+                device = self.devices.get(mac or self._ip_mac.get(ip))
+                if device is not None:
+                    device['ips'].discard(ip)
+                    if device['online']:
+                        self._leaving.setdefault(device['mac'], time.monotonic() + self.leave_after)
+            # DELETED only drops the cache entry: the device keeps its addresses and its state
+
+    def _resync(self, table, announce):
+        """Folds a full table dump in; `announce` emits joins for devices that were not online."""
+        if announce:
+            print("\033[94m[DEBUG] Neighbour notifications overflowed; re-reading the table.\033[0m")
+        now = time.time()
+        with self.lock:
+            for ip, mac in table.items():
+                if mac:
+                    self._present(ip, mac, now, announce)
+
+    def _tick(self):
+        """Makes pending leaves final once their debounce period has passed."""
+        if not self._leaving:
+            return
+        now = time.monotonic()
+        with self.lock:
+            for mac, deadline in list(self._leaving.items()):
+                if deadline > now:
+                    continue
+                del self._leaving[mac]
+                device = self.devices.get(mac)
+                if device is not None and device['online']:
+                    device['online'] = False
+                    device['changed_at'] = time.time()
+                    self._emit("leave", device)
+
+    # --- queries ---
+
+    def snapshot(self):
+        """Copies of every device seen since the watcher started, newest change first."""
+        with self.lock:
+            devices = [dict(device, ips=sorted(device['ips'])) for device in self.devices.values()]
+        return sorted(devices, key=lambda device: device['changed_at'], reverse=True)
+
+    def last_seen(self, mac):
+        """Time `mac` last resolved while online, or None if it is unknown or has left."""
+        with self.lock:
+            device = self.devices.get(mac)
+            return device['last_seen'] if device and device['online'] else None
+
+    def is_online(self, mac):
+        with self.lock:
+            device = self.devices.get(mac)
+            return bool(device and device['online'])
+
+
+neighbor_watcher = NeighborWatcher()
@@ -0,0 +1,291 @@
+import socket
+import struct
+import platform
+import subprocess
+import threading
+import time
+import ctypes
+
+# Netlink constants (linux/netlink.h, linux/rtnetlink.h, linux/neighbour.h)
+_NETLINK_ROUTE = 0
+_NLMSG_ERROR = 2
+_NLMSG_DONE = 3
+_RTM_NEWNEIGH = 28
+_RTM_DELNEIGH = 29
+_RTM_GETNEIGH = 30
+_NLM_F_REQUEST = 0x01
+_NLM_F_DUMP = 0x300
+_NDA_DST = 1
+_NDA_LLADDR = 2
+_NUD_INCOMPLETE = 0x01
+_NUD_FAILED = 0x20
+_NUD_NOARP = 0x40  # multicast/broadcast mappings, not real neighbours
+
+_NLMSG_HEADER = struct.Struct('=IHHII')  # len, type, flags, seq, pid
+_NDMSG = struct.Struct('=BxxxiHBB')      # family, ifindex, state, flags, type
+_RTATTR = struct.Struct('=HH')           # len, type
+
+# Windows NL_NEIGHBOR_STATE values below NlnsProbe carry no usable MAC
+_NLNS_UNREACHABLE = 0
+_NLNS_PROBE = 2
+
+_EMPTY_MACS = ('00:00:00:00:00:00', 'ff:ff:ff:ff:ff:ff')
+
+
+def _align(length):
+    return (length + 3) & ~3
+
+
+def _format_mac(raw):
+    return ':'.join(f'{b:02x}' for b in raw)
+
+
+def _usable(mac):
+    return bool(mac) and mac not in _EMPTY_MACS
+
+
+# --- Linux: rtnetlink neighbour dump ---
+
+def _read_netlink():
+    table = {}
+    sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, _NETLINK_ROUTE)
+    try:
+        sock.bind((0, 0))
+        seq = int(time.time()) & 0xFFFFFFFF
+        request = _NDMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0)
+        header = _NLMSG_HEADER.pack(_NLMSG_HEADER.size + len(request), _RTM_GETNEIGH,
+                                    _NLM_F_REQUEST | _NLM_F_DUMP, seq, 0)
+        sock.sendto(header + request, (0, 0))
+
+        while True:
+            data = sock.recv(65536)
+            offset = 0
+            while offset + _NLMSG_HEADER.size <= len(data):
+                msg_len, msg_type, _, msg_seq, _ = _NLMSG_HEADER.unpack_from(data, offset)
+                if msg_len < _NLMSG_HEADER.size:
+                    return table
+                if msg_seq == seq:
+                    if msg_type == _NLMSG_DONE:
+                        return table
+                    if msg_type == _NLMSG_ERROR:
+                        raise OSError("netlink neighbour dump failed")
+                    if msg_type == _RTM_NEWNEIGH:
+                        _parse_neigh(data, offset + _NLMSG_HEADER.size, offset + msg_len, table)
+                offset += _align(msg_len)
+    finally:
+        sock.close()
+
+
+def _unpack_neigh(data, start, end):
+    """Returns (state, ip, mac) of one ndmsg; mac is None when it carries no usable link-layer address."""
+    family, _, state, _, _ = _NDMSG.unpack_from(data, start)
+    ip = mac = None
+    offset = start + _NDMSG.size
+    while offset + _RTATTR.size <= end:
+        attr_len, attr_type = _RTATTR.unpack_from(data, offset)
+        if attr_len < _RTATTR.size:
+            break
+        value = data[offset + _RTATTR.size:offset + attr_len]
+        if attr_type == _NDA_DST:
+            ip = socket.inet_ntop(family, value)
+        elif attr_type == _NDA_LLADDR and len(value) == 6:
+            mac = _format_mac(value)
+        offset += _align(attr_len)
+    return state, ip, (mac if _usable(mac) else None)
+
+
+def _parse_neigh(data, start, end, table):
+    state, ip, mac = _unpack_neigh(data, start, end)
+    if state & (_NUD_INCOMPLETE | _NUD_FAILED | _NUD_NOARP):
+        return
+    if ip and mac:
+        table[ip] = mac
+
+
+# --- Windows: iphlpapi GetIpNetTable2 ---
+
+class _SOCKADDR_INET(ctypes.Structure):
+    # Large enough for SOCKADDR_IN6; the family field is shared by both layouts. `data` is ULONG-based
+    # (sin6_flowinfo/sin6_scope_id) so the struct gets the union's 4-byte alignment, which shifts
+    # every field after it in MIB_IPFORWARD_ROW2.
+    _fields_ = [("family", ctypes.c_ushort), ("port", ctypes.c_ushort), ("data", ctypes.c_ulong * 6)]
+
+
+class _MIB_IPNET_ROW2(ctypes.Structure):
+    _fields_ = [
+        ("Address", _SOCKADDR_INET),
+        ("InterfaceIndex", ctypes.c_ulong),
+        ("InterfaceLuid", ctypes.c_uint64),
+        ("PhysicalAddress", ctypes.c_ubyte * 32),
+        ("PhysicalAddressLength", ctypes.c_ulong),
+        ("State", ctypes.c_int),
+        ("Flags", ctypes.c_ubyte),
+        ("ReachabilityTime", ctypes.c_ulong),
+    ]
+
+
+def _iphlpapi_rows():
+    """Yields (ip, mac, NL_NEIGHBOR_STATE) for every IPv4/IPv6 row; mac is None when it is not usable."""
+    iphlpapi = ctypes.WinDLL('iphlpapi')
+    table_ptr = ctypes.c_void_p()
+    status = iphlpapi.GetIpNetTable2(socket.AF_UNSPEC, ctypes.byref(table_ptr))
+    if status != 0:
+        raise OSError(f"GetIpNetTable2 failed with status {status}")
+
+    entries = []
+    try:
+        count = ctypes.c_ulong.from_address(table_ptr.value).value
+        # The row array starts at the first 8-byte aligned offset after NumEntries
+        rows = (_MIB_IPNET_ROW2 * count).from_address(table_ptr.value + 8)
+        for row in rows:
+            raw = bytes(row.Address.data)
+            if row.Address.family == socket.AF_INET:
+                ip = socket.inet_ntop(socket.AF_INET, raw[0:4])
+            elif row.Address.family == socket.AF_INET6:
+                ip = socket.inet_ntop(socket.AF_INET6, raw[4:20])
+            else:
+                continue
+            mac = None
+            if row.PhysicalAddressLength == 6:
+                mac = _format_mac(bytes(row.PhysicalAddress)[:6])
+            entries.append((ip, mac if _usable(mac) else None, row.State))
+    finally:
+        iphlpapi.FreeMibTable(table_ptr)
+    return entries
+
+
+def _read_iphlpapi():
+    return {ip: mac for ip, mac, state in _iphlpapi_rows() if state >= _NLNS_PROBE and mac}
+
+
+# --- Text fallbacks ---
+
+def _read_arp_windows_text():
+    table = {}
+    result = subprocess.run(['arp', '-a'], capture_output=True, text=True, check=True)
+    for line in result.stdout.splitlines():
+        parts = line.split()
+        if len(parts) >= 2 and '-' in parts[1]:
+            mac = parts[1].replace('-', ':').lower()
+            if _usable(mac):
+                table[parts[0]] = mac
+    return table
+
+
+def _read_ip_neigh_text():
+    table = {}
+    result = subprocess.run(['ip', 'neigh'], capture_output=True, text=True, check=True)
+    for line in result.stdout.splitlines():
+        parts = line.split()
+        if len(parts) >= 5 and 'lladdr' in parts:
+            mac = parts[parts.index('lladdr') + 1].lower()
+            if _usable(mac):
+                table[parts[0]] = mac
+    return table
+
+
+def _read_arp_n_text():
+    table = {}
+    result = subprocess.run(['arp', '-n'], capture_output=True, text=True, check=True)
+    for line in result.stdout.splitlines():
+        parts = line.split()
+        # typical: IP HWtype HWaddress Flags Mask Iface
+        if len(parts) >= 3 and ':' in parts[2]:
+            mac = parts[2].lower()
+            if _usable(mac):
+                table[parts[0]] = mac
+    return table
+
+
+def _readers():
+    system = platform.system()
+    if system == 'Windows':
+        return [_read_iphlpapi, _read_arp_windows_text]
+    if system == 'Linux':
+        return [_read_netlink, _read_ip_neigh_text, _read_arp_n_text]
+    return [_read_arp_n_text]
+
+
+class NeighborTable:
+    """
+    Snapshot of the OS ARP/NDP cache indexed by IP, read in a single call and
+    refreshed at most every `ttl` seconds. Lookups that miss force an early
+    refresh (no more often than `miss_refresh`) so hosts that just answered a
+    probe are picked up without one subprocess per address.
+    """
+
+    def __init__(self, ttl=2.0, miss_refresh=0.25):
+        self.ttl = ttl
+        self.miss_refresh = miss_refresh
+        self.lock = threading.Lock()
+        self._table = {}
+        self._loaded_at = 0.0
+        self._reader = None
+
+    def _read(self):
+        readers = _readers()
+        if self._reader in readers:
+            # Keep using whatever worked last time, but fall through on failure
+            readers.remove(self._reader)
+            readers.insert(0, self._reader)
+        for reader in readers:
+            try:
+                table = reader()
+            except Exception:
+                continue
+            self._reader = reader
+            return table
+        return None
+
+    def refresh(self, max_age=0.0):
+        with self.lock:
+            # Concurrent callers share one refresh
+            if time.monotonic() - self._loaded_at <= max_age:
+                return self._table
+            table = self._read()
+            if table is not None:
+                self._table = table
+            self._loaded_at = time.monotonic()
+            return self._table
+
+    def snapshot(self, max_age=None):
+        """Returns a copy of {ip: mac} no older than `max_age` (defaults to the TTL)."""
+        return dict(self.refresh(self.ttl if max_age is None else max_age))
+
+    def lookup(self, ip):
+        """Returns the MAC for `ip` (lowercase, colon separated) or None."""
+        table = self.refresh(self.ttl)
+        mac = table.get(ip)
+        if mac is None:
+            mac = self.refresh(self.miss_refresh).get(ip)
+        return mac
+
+    def find_ip(self, mac):
+        """Returns the IPv4 address cached for `mac`, or None. IPv6 entries are skipped: callers build ARP with it."""
+        mac = (mac or '').lower().replace('-', ':')
+        for ip, entry in self.refresh(self.ttl).items():
+            if entry == mac and ':' not in ip:
+                return ip
+        return None
+
+    def apply(self, ip, mac):
+        """
+        Updates one entry from a change notification (mac None drops it)
+        without re-reading the table. The dict is replaced rather than
+        mutated because lookups iterate it outside the lock.
+        """
+        with self.lock:
+            if mac:
+                if self._table.get(ip) != mac:
+                    self._table = {**self._table, ip: mac}
+            elif ip in self._table:
+                table = dict(self._table)
+                del table[ip]
+                self._table = table
+
+    def invalidate(self):
+        with self.lock:
+            self._loaded_at = 0.0
+
+
+neighbor_table = NeighborTable()
@@ -0,0 +1,201 @@
+import socket
+import struct
+import select
+import threading
+import time
+import random
+import concurrent.futures
+
+NETBIOS_PORT = 137
+
+# Encoded wildcard name "*" followed by the NBSTAT question type/class
+_WILDCARD_QUESTION = b'\x20' + b'CK' + b'A' * 30 + b'\x00' + struct.pack('!HH', 0x21, 0x01)
+
+_HEADER = struct.Struct('!HHHHHH')
+
+# Name suffixes (16th byte) worth knowing about
+SUFFIX_WORKSTATION = 0x00
+SUFFIX_SERVER = 0x20
+
+_GROUP_FLAG = 0x8000
+
+
+def build_nbstat_query(txid):
+    return _HEADER.pack(txid, 0x0000, 1, 0, 0, 0) + _WILDCARD_QUESTION
+
+
+def _skip_name(data, offset):
+    while True:
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            return offset + 2
+        offset += 1
+        if length == 0:
+            return offset
+        offset += length
+
+
+def parse_nbstat_response(data):
+    """
+    Parses an NBSTAT (node status) response into
+    {'txid', 'hostname', 'workgroup', 'mac', 'names': [{'name', 'suffix', 'group'}]}.
+    """
+    txid, _, _, ancount, _, _ = _HEADER.unpack_from(data, 0)
+    if not ancount:
+        raise ValueError("NBSTAT response has no answer")
+    offset = _skip_name(data, _HEADER.size)
+    rtype, _, _, rdlength = struct.unpack_from('!HHIH', data, offset)
+    if rtype != 0x21:
+        raise ValueError("not an NBSTAT answer")
+    offset += 10
+    end = offset + rdlength
+
+    count = data[offset]
+    offset += 1
+    names = []
+    for _ in range(count):
+        if offset + 18 > end:
+            break
+        raw = data[offset:offset + 15].decode('latin-1', errors='ignore').rstrip(' \x00')
+        suffix = data[offset + 15]
+        flags = struct.unpack_from('!H', data, offset + 16)[0]
+        names.append({'name': raw, 'suffix': suffix, 'group': bool(flags & _GROUP_FLAG)})
+        offset += 18
+
+    mac = None
+    if offset + 6 <= end:
+        unit_id = data[offset:offset + 6]
+        # Samba and some embedded stacks report an all-zero unit ID
+        if any(unit_id):
+            mac = ':'.join(f'{b:02x}' for b in unit_id)
+
+    hostname = next((n['name'] for n in names if not n['group'] and n['suffix'] == SUFFIX_WORKSTATION), None)
+    if not hostname:
+        hostname = next((n['name'] for n in names if not n['group'] and n['suffix'] == SUFFIX_SERVER), None)
+    workgroup = next((n['name'] for n in names
+                      if n['group'] and n['suffix'] == SUFFIX_WORKSTATION and not n['name'].startswith('\x01')), None)
+
+    return {'txid': txid, 'hostname': hostname, 'workgroup': workgroup, 'mac': mac, 'names': names}
+
+
+class NetbiosResolver:
+    """
+    Batched NetBIOS node-status querier. NBSTAT requests for every host go out
+    from one UDP socket and replies are matched by source address and
+    transaction ID, so a subnet's worth of silent hosts costs one timeout in
+    total rather than one blocked thread each. Answers are cached for
+    `cache_ttl` seconds, misses for `negative_ttl`.
+    """
+
+    def __init__(self, timeout=1.0, cache_ttl=600, negative_ttl=60, port=NETBIOS_PORT):
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.negative_ttl = negative_ttl
+        self.port = port
+        self.lock = threading.Lock()
+        self._cache = {}        # ip -> (info or None, expires_at)
+        self._outstanding = {}  # ip -> (txid, expires_at)
+        self._waiting = {}      # ip -> future
+        self._sock = None
+        self._reader = None
+
+    def cached(self, ip):
+        with self.lock:
+            entry = self._cache.get(ip)
+            if entry and entry[1] > time.monotonic():
+                return True, entry[0]
+        return False, None
+
+    def submit(self, ip, timeout=None):
+        """Returns a Future resolving to the parsed node status of `ip`, or None."""
+        hit, info = self.cached(ip)
+        if hit:
+            future = concurrent.futures.Future()
+            future.set_result(info)
+            return future
+
+        with self.lock:
+            future = self._waiting.get(ip)
+            if future:
+                return future
+            future = concurrent.futures.Future()
+            self._waiting[ip] = future
+            if self._sock is None:
+                self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self._sock.setblocking(False)
+            if self._reader is None or not self._reader.is_alive():
+                self._reader = threading.Thread(target=self._read_loop, daemon=True, name="netbios-resolver")
+                self._reader.start()
+
+            txid = random.getrandbits(16)
+            expires = time.monotonic() + (self.timeout if timeout is None else timeout)
+            self._outstanding[ip] = (txid, expires)
+            try:
+                self._sock.sendto(build_nbstat_query(txid), (ip, self.port))
+            except OSError:
+                self._outstanding[ip] = (txid, 0)
+        return future
+
+    def query(self, ip, timeout=None):
+        return self.submit(ip, timeout=timeout).result()
+
+    def query_many(self, ips, timeout=None):
+        """Queries every host at once and waits one shared window; returns {ip: info} for hosts that answered."""
+        timeout = self.timeout if timeout is None else timeout
+        futures = {ip: self.submit(ip, timeout=timeout) for ip in dict.fromkeys(ips)}
+        concurrent.futures.wait(list(futures.values()), timeout=timeout + 0.1)
+        return {ip: f.result() for ip, f in futures.items() if f.done() and f.result()}
+
+    def _finish(self, ip, info):
+        self._outstanding.pop(ip, None)
+        self._cache[ip] = (info, time.monotonic() + (self.cache_ttl if info else self.negative_ttl))
+        future = self._waiting.pop(ip, None)
+        if future and not future.done():
+            future.set_result(info)
+
+    def _read_loop(self):
+        idle_since = None
+        while True:
+            with self.lock:
+                sock = self._sock
+                if not self._outstanding:
+                    idle_since = idle_since or time.monotonic()
+                    if time.monotonic() - idle_since > 5:
+                        self._reader = None
+                        return
+                else:
+                    idle_since = None
+            try:
+                readable, _, _ = select.select([sock], [], [], 0.05)
+            except (OSError, ValueError):
+                readable = []
+            while readable:
+                try:
+                    data, addr = sock.recvfrom(2048)
+                except (BlockingIOError, InterruptedError, ConnectionResetError):
+                    # Windows reports ICMP port-unreachable as a reset on the next recv
+                    readable, _, _ = select.select([sock], [], [], 0)
+                    continue
+                except OSError:
+                    break
+                self._handle(data, addr)
+                readable, _, _ = select.select([sock], [], [], 0)
+
+            now = time.monotonic()
+            with self.lock:
+                for ip, (_, expires) in list(self._outstanding.items()):
+                    if expires <= now:
+                        self._finish(ip, None)
+
+    def _handle(self, data, addr):
+        try:
+            info = parse_nbstat_response(data)
+        except (struct.error, IndexError, ValueError):
+            return
+        with self.lock:
+            pending = self._outstanding.get(addr[0])
+            if pending and pending[0] == info['txid']:
+                self._finish(addr[0], info)
+
+
+netbios_resolver = NetbiosResolver()
@@ -2,6 +2,7 @@ from scapy.all import ARP, Ether, srp, sendp, conf, sniff
 from threading import Thread, Lock
 import time
 from src.ping import get_default_gateway
+from src.neighbors import neighbor_table
 import platform
 import subprocess
 import re
@@ -27,7 +28,13 @@ class GarpSpoofer:
     def resolve_mac(self, ip):
         if ip in self.mac_cache:
             return self.mac_cache[ip]
-        
+
+        # The OS neighbor table usually already knows the answer
+        mac = neighbor_table.lookup(ip)
+        if mac:
+            self.mac_cache[ip] = mac
+            return mac
+
         try:
             ans, _ = srp(Ether(dst="ff:ff:ff:ff:ff:ff")/ARP(pdst=ip), 
                         timeout=2, verbose=0)
@@ -103,7 +110,8 @@ class GarpSpoofer:
             print(f"Blocking {ip} ({mac})")
 
     def validate_target(self, ip, mac):
-        current_mac = self.resolve_mac(ip)
+        # Check against the live neighbor table rather than a possibly stale cache entry
+        current_mac = neighbor_table.lookup(ip) or self.resolve_mac(ip)
         if current_mac and current_mac.lower() != mac.lower():
             print(f"MAC mismatch for {ip} (expected {mac}, got {current_mac})")
             return False
@@ -117,7 +125,7 @@ class GarpSpoofer:
                 return
 
             # Resolve the current IP of the device in case it has changed
-            current_ip = self.resolve_mac(target['real_mac'])
+            current_ip = neighbor_table.find_ip(target['real_mac'])
             if current_ip and current_ip != target['ip']:
                 print(f"IP address for {mac} has changed from {target['ip']} to {current_ip}. Updating...")
                 target['ip'] = current_ip
@@ -0,0 +1,131 @@
+import socket
+import selectors
+import errno
+import time
+
+from src.icmp import icmp_sweep, icmp_available
+
+# Probed in priority order: the first open port decides the guess
+PORT_SIGNATURES = [
+    (445, "Windows", "Port 445"),      # SMB port (Windows file sharing)
+    (22, "Linux/Unix", "Port 22"),     # SSH port (Linux remote access)
+    (3389, "Windows", "Port 3389")     # RDP port (Windows remote desktop)
+]
+
+_CONNECTED = (0, errno.EISCONN)
+_IN_PROGRESS = (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY, getattr(errno, 'WSAEWOULDBLOCK', 10035))
+
+
+def classify_ttl(ttl):
+    """TTL fingerprinting against common initial TTLs (Windows: 128, Linux: 64, Cisco: 255)."""
+    if not ttl:
+        return None
+    if 60 < ttl <= 64:
+        return {"os": "Linux/Unix", "confidence": "high"}
+    elif 120 < ttl <= 128:
+        return {"os": "Windows", "confidence": "high"}
+    elif 240 < ttl <= 255:
+        return {"os": "Network Device", "confidence": "high"}
+    elif ttl <= 60:
+        return {"os": "Linux/Android", "confidence": "medium"}
+    elif ttl <= 120:
+        return {"os": "Windows", "confidence": "low"}
+    return None
+
+
+def probe_open_ports(targets, timeout=0.5, max_sockets=512):
+    """
+    Non-blocking TCP connects to every (ip, port) in `targets` ({ip: [ports]}),
+    multiplexed through one selector. At most `max_sockets` connects are in
+    flight and each gets `timeout` seconds. Returns {ip: set(open ports)}.
+    """
+    pending = [(ip, port) for ip, ports in targets.items() for port in ports]
+    open_ports = {ip: set() for ip in targets}
+    selector = selectors.DefaultSelector()
+    in_flight = 0
+    index = 0
+    try:
+        while index < len(pending) or in_flight:
+            while index < len(pending) and in_flight < max_sockets:
+                ip, port = pending[index]
+                index += 1
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.setblocking(False)
+                try:
+                    code = sock.connect_ex((ip, port))
+                except OSError:
+                    sock.close()
+                    continue
+                if code in _CONNECTED:
+                    open_ports[ip].add(port)
+                    sock.close()
+                elif code in _IN_PROGRESS:
+                    selector.register(sock, selectors.EVENT_WRITE, (ip, port, time.monotonic() + timeout))
+                    in_flight += 1
+                else:
+                    sock.close()
+
+            if not in_flight:
+                continue
+            deadline = min(key.data[2] for key in selector.get_map().values())
+            for key, _ in selector.select(max(0.0, deadline - time.monotonic())):
+                ip, port, _ = key.data
+                if key.fileobj.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0:
+                    open_ports[ip].add(port)
+                selector.unregister(key.fileobj)
+                key.fileobj.close()
+                in_flight -= 1
+
+            now = time.monotonic()
+            for key in list(selector.get_map().values()):
+                if key.data[2] <= now:
+                    selector.unregister(key.fileobj)
+                    key.fileobj.close()
+                    in_flight -= 1
+    finally:
+        for key in list(selector.get_map().values()):
+            key.fileobj.close()
+        selector.close()
+    return open_ports
+
+
+def score_os(ttl, open_ports):
+    """Combines a TTL guess with open-port evidence into the detect_os result format."""
+    ttl_result = classify_ttl(ttl)
+    if ttl_result and ttl_result['confidence'] == "high":
+        return {"os": ttl_result['os'], "confidence": "high", "method": "TTL"}
+
+    for port, os_type, method_name in PORT_SIGNATURES:
+        if port in (open_ports or ()):
+            os_guess = f"{os_type} 10/11" if port == 3389 else os_type
+            return {"os": os_guess, "confidence": "high", "method": method_name}
+
+    if ttl_result:
+        return {"os": ttl_result['os'], "confidence": ttl_result['confidence'], "method": "TTL"}
+    return {"os": "Unknown", "confidence": "low", "method": "none"}
+
+
+def fingerprint_hosts(hosts, timeout=0.5):
+    """
+    OS fingerprinting for many hosts at once. `hosts` maps ip -> TTL observed
+    during discovery (or None). Missing TTLs are filled by one ICMP sweep, and
+    hosts whose TTL is not conclusive get all port probes in a single
+    concurrent window, so the cost is bounded by the probe timeout rather than
+    by host count. Returns {ip: {"os", "confidence", "method"}}.
+    """
+    ttls = dict(hosts)
+    missing = [ip for ip, ttl in ttls.items() if not ttl]
+    if missing and icmp_available():
+        try:
+            for ip, info in icmp_sweep(missing, timeout=timeout * 2, retries=0).items():
+                ttls[ip] = info.get('ttl')
+        except OSError:
+            pass
+
+    inconclusive = {
+        ip: [port for port, _, _ in PORT_SIGNATURES]
+        for ip, ttl in ttls.items()
+        if not (classify_ttl(ttl) or {}).get('confidence') == "high"
+    }
+    open_ports = probe_open_ports(inconclusive, timeout=timeout) if inconclusive else {}
+    return {ip: score_os(ttl, open_ports.get(ip)) for ip, ttl in ttls.items()}
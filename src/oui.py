@@ -0,0 +1,276 @@
+import os
+import mmap
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+# Binary index layout (native byte order, written and read on the same machine):
+#   header  : magic, version, section count, string table offset
+#   per section (36-, 28-, then 24-bit prefixes): bits, count, keys offset, values offset
+#   keys    : sorted uint64 prefixes
+#   values  : uint32 offsets into the string table
+#   strings : uint16 length + UTF-8 vendor name, each name stored once
+_MAGIC = b'OUIX'
+_VERSION = 1
+_HEADER = struct.Struct('=4sHHI')
+_SECTION = struct.Struct('=HIII')
+
+# Longest prefix first: MA-S (36 bits), MA-M (28 bits), MA-L (24 bits)
+PREFIX_BITS = (36, 28, 24)
+
+# IEEE registry dumps the index is compiled from (MA-L is the one the app has always used)
+OUI_SOURCES = ("oui.txt", "mam.txt", "oui36.txt")
+INDEX_FILE = "oui.idx"
+# Seconds between checks of the source dumps' mtimes; compile() forces the next lookup to check
+STALE_CHECK_INTERVAL = 5.0
+
+
+def _appdata_location():
+    return os.path.join(os.getenv('APPDATA'), "ayosbypasser")
+
+
+def parse_oui_file(path, entries):
+    """
+    Adds {(bits, prefix): vendor} from an IEEE registry text dump. MA-L entries
+    come from the "(base 16)" line; MA-M/MA-S dumps list a 24-bit "(hex)" line
+    followed by a "XXXXXX-YYYYYY (base 16)" range that extends the prefix.
+    """
+    last_hex = None
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            if "(hex)" in line:
+                raw, vendor = line.split("(hex)", 1)
+                last_hex = raw.strip().replace("-", "").replace(":", "").upper()
+                vendor = vendor.strip()
+                # Some dumps spell the full 28/36-bit block out on the hex line
+                if len(last_hex) in (7, 9) and vendor and all(c in "0123456789ABCDEF" for c in last_hex):
+                    entries.setdefault((len(last_hex) * 4, int(last_hex, 16)), vendor)
+                continue
+            if "(base 16)" not in line:
+                continue
+            raw, vendor = line.split("(base 16)", 1)
+            raw = raw.strip().upper()
+            vendor = vendor.strip()
+            if not vendor:
+                continue
+            if '-' in raw:
+                if not last_hex or len(last_hex) < 6:
+                    continue
+                # MA-M/MA-S range: the digits shared by both ends of the range extend the OUI
+                start, end = raw.split('-', 1)
+                digits = last_hex[:6] + os.path.commonprefix([start, end])
+            else:
+                digits = raw.replace(":", "")
+            if not digits or any(c not in "0123456789ABCDEF" for c in digits):
+                continue
+            bits = len(digits) * 4
+            if bits in PREFIX_BITS:
+                entries.setdefault((bits, int(digits, 16)), vendor)
+    return entries
+
+
+def compile_index(source_paths, index_path):
+    """Compiles the given registry dumps into the binary index; returns the number of prefixes."""
+    entries = {}
+    for path in source_paths:
+        if os.path.exists(path):
+            parse_oui_file(path, entries)
+
+    strings = bytearray()
+    string_offsets = {}
+    sections = []
+    for bits in PREFIX_BITS:
+        keys = array('Q')
+        values = array('I')
+        for (entry_bits, prefix), vendor in sorted(entries.items()):
+            if entry_bits != bits:
+                continue
+            if vendor not in string_offsets:
+                encoded = vendor.encode('utf-8')[:0xFFFF]
+                string_offsets[vendor] = len(strings)
+                strings += struct.pack('=H', len(encoded)) + encoded
+            keys.append(prefix)
+            values.append(string_offsets[vendor])
+        sections.append((bits, keys, values))
+
+    offset = _HEADER.size + _SECTION.size * len(sections)
+    layout = []
+    body = bytearray()
+    for bits, keys, values in sections:
+        keys_offset = offset + len(body)
+        body += keys.tobytes()
+        values_offset = offset + len(body)
+        body += values.tobytes()
+        # Keep the next uint64 array 8-byte aligned
+        body += b'\x00' * (-len(body) % 8)
+        layout.append(_SECTION.pack(bits, len(keys), keys_offset, values_offset))
+    strings_offset = offset + len(body)
+
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(sections), strings_offset))
+        f.write(b''.join(layout))
+        f.write(body)
+        f.write(strings)
+    os.replace(tmp_path, index_path)
+    return len(entries)
+
+
+class OuiIndex:
+    """
+    Memory-mapped vendor index with longest-prefix lookup over MA-S, MA-M and
+    MA-L blocks. Nothing is parsed into Python objects: lookups binary-search
+    the mapped arrays, so load time and resident memory stay near zero. The
+    index is recompiled automatically when a source dump is newer than it;
+    that is checked at most every STALE_CHECK_INTERVAL seconds, so lookups
+    normally make no filesystem calls.
+    """
+
+    def __init__(self, folder=None):
+        self.folder = folder
+        self.lock = threading.Lock()
+        self._mmap = None
+        self._view = None
+        self._file = None
+        self._mtime = None
+        self._checked_at = None
+        self._sections = []
+        self._strings_offset = 0
+
+    @property
+    def index_path(self):
+        return os.path.join(self.folder or _appdata_location(), INDEX_FILE)
+
+    def source_paths(self):
+        folder = self.folder or _appdata_location()
+        return [os.path.join(folder, name) for name in OUI_SOURCES]
+
+    def compile(self):
+        with self.lock:
+            self._close()
+            self._checked_at = None
+            return compile_index(self.source_paths(), self.index_path)
+
+    def _close(self):
+        for _, keys, values in self._sections:
+            keys.release()
+            values.release()
+        self._sections = []
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._mtime = None
+
+    def _ensure_open(self):
+        # Caller holds the lock. Returns False when no index can be built.
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < STALE_CHECK_INTERVAL:
+            return self._mmap is not None
+        self._checked_at = now
+        sources = [p for p in self.source_paths() if os.path.exists(p)]
+        if not sources:
+            self._close()
+            return False
+        newest_source = max(os.path.getmtime(p) for p in sources)
+        try:
+            index_mtime = os.path.getmtime(self.index_path)
+        except OSError:
+            index_mtime = None
+        if index_mtime is None or index_mtime < newest_source:
+            self._close()
+            compile_index(sources, self.index_path)
+            index_mtime = os.path.getmtime(self.index_path)
+        if self._mmap is not None and self._mtime == index_mtime:
+            return True
+
+        self._close()
+        self._file = open(self.index_path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, strings_offset = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self._close()
+            raise ValueError("Unrecognised OUI index format")
+        view = self._view = memoryview(self._mmap)
+        for i in range(count):
+            bits, n, keys_offset, values_offset = _SECTION.unpack_from(self._mmap, _HEADER.size + i * _SECTION.size)
+            keys = view[keys_offset:keys_offset + n * 8].cast('Q')
+            values = view[values_offset:values_offset + n * 4].cast('I')
+            self._sections.append((bits, keys, values))
+        self._strings_offset = strings_offset
+        self._mtime = index_mtime
+        return True
+
+    def _string(self, offset):
+        start = self._strings_offset + offset
+        (length,) = struct.unpack_from('=H', self._mmap, start)
+        return self._mmap[start + 2:start + 2 + length].decode('utf-8', errors='ignore')
+
+    def available(self):
+        with self.lock:
+            return self._ensure_open()
+
+    def version(self):
+        """Modification time of the mapped index; changes whenever it is recompiled."""
+        with self.lock:
+            return self._mtime if self._ensure_open() else None
+
+    def lookup(self, mac):
+        """Returns the vendor for a MAC (any common notation) by longest prefix match, or None."""
+        digits = ''.join(c for c in (mac or '') if c in '0123456789abcdefABCDEF')
+        if len(digits) < 6:
+            return None
+        value = int(digits[:12].ljust(12, '0'), 16)
+        with self.lock:
+            if not self._ensure_open():
+                return None
+            for bits, keys, values in self._sections:
+                if len(digits) * 4 < bits:
+                    continue
+                prefix = value >> (48 - bits)
+                i = bisect_left(keys, prefix)
+                if i < len(keys) and keys[i] == prefix:
+                    return self._string(values[i])
+        return None
+
+    def get(self, oui, default=None):
+        # dict-style access for callers that still pass a bare 6-hex OUI
+        return self.lookup(oui) or default
+
+    def items(self, bits=24):
+        """Yields (hex prefix, vendor) for every block of the given size, in prefix order."""
+        with self.lock:
+            if not self._ensure_open():
+                return []
+            width = bits // 4
+            return [
+                (f"{keys[i]:0{width}X}", self._string(values[i]))
+                for section_bits, keys, values in self._sections if section_bits == bits
+                for i in range(len(keys))
+            ]
+
+    def vendor_count(self):
+        with self.lock:
+            if not self._ensure_open():
+                return 0
+            return len({values[i] for _, _, values in self._sections for i in range(len(values))})
+
+
+_SHARED = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def get_oui_index(folder=None):
+    """Returns the process-wide index for `folder` (APPDATA by default)."""
+    with _SHARED_LOCK:
+        index = _SHARED.get(folder)
+        if index is None:
+            index = _SHARED[folder] = OuiIndex(folder)
+        return index
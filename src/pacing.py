@@ -0,0 +1,210 @@
+import threading
+import time
+from collections import deque
+
+# RTT samples kept for the percentile estimate; old ones age out as new scans run
+_RTT_SAMPLES = 256
+# Replies needed before the measured RTT overrides the configured timeout
+_MIN_SAMPLES = 8
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class SweepTiming:
+    """
+    Adaptive pacing shared by every sweep method (ICMP socket, ping workers,
+    ARP). Concurrency follows AIMD: it doubles per window during slow start,
+    then grows additively, and halves when probes to live hosts are lost or
+    replies start queueing (a window's median RTT well above the best window
+    median of the scan). The probe timeout tracks a high RTT percentile
+    instead of a fixed value, and the ARP listen window closes once replies
+    stop arriving for a few RTTs.
+
+    Unanswered probes to empty addresses are expected and never count as loss;
+    only a host that answered a retry but not the first attempt does.
+    """
+
+    def __init__(self, min_concurrency=4, max_concurrency=1024, min_timeout=0.2, max_timeout=2.0,
+                 percentile=0.95, rtt_multiplier=3.0, additive_step=4):
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.percentile = percentile
+        self.rtt_multiplier = rtt_multiplier
+        self.additive_step = additive_step
+        self.lock = threading.Lock()
+        # RTTs in seconds; timing_for() seeds them from the last scan of the same subnet
+        self._rtts = deque(maxlen=_RTT_SAMPLES)
+        self.begin(16, 1.0)
+
+    def begin(self, concurrency, timeout, ceiling=None):
+        """Resets per-scan state; `timeout` is used until enough RTTs have been measured."""
+        with self.lock:
+            self.ceiling = min(self.max_concurrency, ceiling or self.max_concurrency)
+            self.concurrency = max(self._floor(), min(self.ceiling, int(concurrency)))
+            self.ssthresh = self.ceiling
+            self.default_timeout = timeout
+            self._completed = 0
+            self._window_end = self.concurrency
+            self._window_rtts = []
+            self._decrease_after = 0
+            self._best_median = None
+            self.listen_windows = []
+            self.replies = 0
+            self.losses = 0
+            self.decreases = 0
+
+    # --- feedback ---
+
+    def on_reply(self, rtt, retried=False):
+        """A probe was answered after `rtt` seconds; `retried` means an earlier attempt was lost."""
+        with self.lock:
+            self.replies += 1
+            if rtt is not None and rtt >= 0:
+                self._rtts.append(rtt)
+                self._window_rtts.append(rtt)
+            if retried:
+                self.losses += 1
+                self._decrease()
+            self._complete()
+
+    def on_timeout(self):
+        """A probe went unanswered; usually just an empty address, so it only advances the window."""
+        with self.lock:
+            self._complete()
+
+    def on_loss(self):
+        with self.lock:
+            self.losses += 1
+            self._decrease()
+
+    def _complete(self):
+        # Caller holds the lock
+        self._completed += 1
+        if self.concurrency < self.ssthresh:
+            # Slow start: +1 per completion doubles the window every round
+            self.concurrency = min(self.ceiling, self.concurrency + 1)
+        if self._completed < self._window_end:
+            return
+        # One window's worth of probes has completed: check for queueing delay
+        window, self._window_rtts = self._window_rtts, []
+        self._window_end = self._completed + self.concurrency
+        if len(window) >= 4:
+            # Compare windows with each other rather than with single fast hosts:
+            # a LAN mixing wired boxes and dozing phones has a wide but stable spread
+            median = sorted(window)[len(window) // 2]
+            if self._best_median is None or median < self._best_median:
+                self._best_median = median
+            elif median > self._best_median * 2 + 0.01:
+                self._decrease()
+                return
+        if self.concurrency >= self.ssthresh:
+            self.concurrency = min(self.ceiling, self.concurrency + self.additive_step)
+
+    def _floor(self):
+        return min(self.min_concurrency, self.ceiling)
+
+    def _decrease(self):
+        # Caller holds the lock. At most one halving per window of completions.
+        if self._completed < self._decrease_after:
+            return
+        self.concurrency = max(self._floor(), self.concurrency // 2)
+        self.ssthresh = self.concurrency
+        self._decrease_after = self._completed + self.concurrency
+        self.decreases += 1
+
+    # --- derived parameters ---
+
+    def _rtt_percentile(self, fraction):
+        return _percentile(sorted(self._rtts), fraction)
+
+    def timeout(self):
+        """Per-probe timeout in seconds: a multiple of the RTT percentile, clamped."""
+        with self.lock:
+            if len(self._rtts) < _MIN_SAMPLES:
+                return self.default_timeout
+            estimate = self._rtt_percentile(self.percentile) * self.rtt_multiplier + 0.02
+            return max(self.min_timeout, min(self.max_timeout, estimate))
+
+    def quiet_period(self, ceiling):
+        """How long a listener waits after the last reply before assuming no more are coming."""
+        with self.lock:
+            p95 = self._rtt_percentile(self.percentile) if len(self._rtts) >= _MIN_SAMPLES else None
+        if p95 is None:
+            return min(ceiling, 0.3)
+        return max(0.1, min(ceiling, p95 * 4))
+
+    def on_listen(self, seconds):
+        """Records how long a listener actually stayed open (ARP sweeps)."""
+        with self.lock:
+            self.listen_windows.append(seconds)
+
+    def window(self):
+        with self.lock:
+            return self.concurrency
+
+    def snapshot(self):
+        """The parameters currently in effect, for scan summaries."""
+        timeout = self.timeout()
+        with self.lock:
+            p50 = self._rtt_percentile(0.5)
+            p95 = self._rtt_percentile(self.percentile)
+            return {
+                "concurrency": self.concurrency,
+                "timeout_ms": round(timeout * 1000, 1),
+                "rtt_p50_ms": round(p50 * 1000, 2) if p50 is not None else None,
+                "rtt_p95_ms": round(p95 * 1000, 2) if p95 is not None else None,
+                "rtt_samples": len(self._rtts),
+                "replies": self.replies,
+                "losses": self.losses,
+                "decreases": self.decreases,
+                "listen_ms": [round(seconds * 1000) for seconds in self.listen_windows]
+            }
+
+
+def wait_for_quiet(poll, timing, max_wait, interval=0.05):
+    """
+    Calls `poll()` (returning a count of replies so far) until it stops growing
+    for `timing.quiet_period()` or `max_wait` elapses. Returns the seconds waited.
+    """
+    started = time.monotonic()
+    deadline = started + max_wait
+    last_count = poll()
+    last_change = started
+    while True:
+        now = time.monotonic()
+        if now >= deadline or now - last_change >= timing.quiet_period(max_wait):
+            return now - started
+        time.sleep(min(interval, deadline - now))
+        count = poll()
+        if count != last_count:
+            last_count = count
+            last_change = time.monotonic()
+
+
+_HISTORY = {}
+_HISTORY_LOCK = threading.Lock()
+
+
+def timing_for(subnet):
+    """A fresh controller for one scan of `subnet`, seeded with the RTTs measured there last time."""
+    timing = SweepTiming()
+    with _HISTORY_LOCK:
+        samples = list(_HISTORY.get(str(subnet), ()))
+    if samples:
+        timing._rtts.extend(samples)
+    return timing
+
+
+def remember(subnet, timing):
+    with timing.lock:
+        samples = list(timing._rtts)
+    if samples:
+        with _HISTORY_LOCK:
+            _HISTORY[str(subnet)] = samples
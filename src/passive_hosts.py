@@ -0,0 +1,222 @@
+import ipaddress
+import struct
+import threading
+import time
+
+from src.inventory import normalize_mac
+from src.rdns import _HEADER, _read_name
+
+try:
+    from scapy.all import sniff, Ether, ARP, IP, UDP, BOOTP, DHCP  # type: ignore
+    _SCAPY_AVAILABLE = True
+except Exception:
+    _SCAPY_AVAILABLE = False
+
+# Only traffic hosts send to everyone anyway: ARP, DHCP, mDNS and NetBIOS name/datagram broadcasts
+CAPTURE_FILTER = "arp or (udp and (port 67 or port 68 or port 5353 or port 137 or port 138))"
+
+_TYPE_A = 1
+_NBNS_REGISTRATION_OPCODES = (5, 8, 9)  # registration, refresh, multi-homed registration
+
+
+def _decode_netbios_name(encoded):
+    # First-level encoding: each byte is two letters 'A'+nibble; the 16th byte is the suffix
+    if len(encoded) != 32:
+        return None
+    raw = bytes(((encoded[i] - 0x41) << 4) | (encoded[i + 1] - 0x41) for i in range(0, 32, 2))
+    name = raw[:15].decode('ascii', errors='ignore').strip()
+    return name or None
+
+
+def parse_nbns_registration(payload):
+    """Returns the name a NetBIOS name-service packet registers, or None."""
+    if len(payload) < _HEADER.size + 34:
+        return None
+    _, flags, qdcount, _, _, _ = _HEADER.unpack_from(payload, 0)
+    if flags & 0x8000 or (flags >> 11) & 0x0F not in _NBNS_REGISTRATION_OPCODES or not qdcount:
+        return None
+    if payload[_HEADER.size] != 32:
+        return None
+    return _decode_netbios_name(payload[_HEADER.size + 1:_HEADER.size + 33])
+
+
+def parse_nbdgm_source(payload):
+    """Returns the source name of a NetBIOS datagram (browser announcements and the like), or None."""
+    if len(payload) < 14 + 33 or payload[0] not in (0x10, 0x11, 0x12) or payload[14] != 32:
+        return None
+    return _decode_netbios_name(payload[15:47])
+
+
+def parse_mdns_self_name(payload, src_ip):
+    """Returns the .local name an mDNS packet announces for `src_ip` (an A record pointing at it), or None."""
+    try:
+        _, flags, qdcount, ancount, nscount, arcount = _HEADER.unpack_from(payload, 0)
+        if not flags & 0x8000:
+            return None
+        offset = _HEADER.size
+        for _ in range(qdcount):
+            _, offset = _read_name(payload, offset)
+            offset += 4
+        for _ in range(ancount + nscount + arcount):
+            owner, offset = _read_name(payload, offset)
+            rtype, _, _, rdlength = struct.unpack_from('!HHIH', payload, offset)
+            offset += 10
+            if rtype == _TYPE_A and rdlength == 4 and payload[offset:offset + 4] == ipaddress.IPv4Address(src_ip).packed:
+                name = owner.rstrip('.')
+                return name[:-6] if name.lower().endswith('.local') else name
+            offset += rdlength
+    except (struct.error, IndexError, ValueError):
+        return None
+    return None
+
+
+class PassiveHostTable:
+    """
+    Optional background capture that keeps a live host table from traffic
+    devices broadcast on their own: ARP requests/replies, DHCP client
+    messages (hostname from option 12), mDNS announcements and NetBIOS
+    registrations. Entries are keyed by IP with MAC, first/last seen and the
+    best hostname heard. Basic scans can be answered from it, only probing
+    hosts that have been silent for a while.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hosts = {}  # ip -> {'ip', 'mac', 'first_seen', 'last_seen', 'hostname', 'sources'}
+        self.active = False
+        self.started_at = None
+        self._thread = None
+
+    def available(self):
+        return _SCAPY_AVAILABLE
+
+    def start(self):
+        if not _SCAPY_AVAILABLE:
+            print("\033[93m[WARN] Passive discovery needs scapy/Npcap; not started.\033[0m")
+            return False
+        if self._thread and self._thread.is_alive():
+            # Restarted before the old sniff timed out: keep that thread running
+            if not self.active:
+                self.active = True
+                self.started_at = time.time()
+            return True
+        self.active = True
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="passive-hosts")
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self.active = False
+        self.started_at = None
+
+    def ready(self, warmup):
+        """True once the capture has run long enough for the table to be worth answering from."""
+        return self.active and self.started_at is not None and time.time() - self.started_at >= warmup
+
+    def _run(self):
+        while self.active:
+            try:
+                # The timeout lets stop() take effect even on a quiet network
+                sniff(filter=CAPTURE_FILTER, prn=self._handle, store=0, timeout=5)
+            except Exception as e:
+                print(f"\033[93m[WARN] Passive discovery stopped: {e}\033[0m")
+                self.active = False
+
+    def _handle(self, pkt):
+        try:
+            if ARP in pkt:
+                arp = pkt[ARP]
+                # Gratuitous replies are skipped: that is what GarpSpoofer sends, with forged MACs
+                if arp.op == 2 and arp.psrc == arp.pdst:
+                    return
+                self.observe(arp.psrc, arp.hwsrc, "arp")
+                return
+            if UDP not in pkt or IP not in pkt or Ether not in pkt:
+                return
+            udp = pkt[UDP]
+            src_ip = pkt[IP].src
+            mac = pkt[Ether].src
+            if DHCP in pkt and BOOTP in pkt:
+                self._handle_dhcp(pkt)
+            elif udp.sport == 5353 or udp.dport == 5353:
+                self.observe(src_ip, mac, "mdns", parse_mdns_self_name(bytes(udp.payload), src_ip))
+            elif udp.dport == 137:
+                self.observe(src_ip, mac, "netbios", parse_nbns_registration(bytes(udp.payload)))
+            elif udp.dport == 138:
+                self.observe(src_ip, mac, "netbios", parse_nbdgm_source(bytes(udp.payload)))
+        except Exception:
+            pass
+
+    def _handle_dhcp(self, pkt):
+        options = {}
+        for option in pkt[DHCP].options:
+            if isinstance(option, tuple) and len(option) >= 2:
+                options[option[0]] = option[1]
+        bootp = pkt[BOOTP]
+        mac = ':'.join(f"{b:02x}" for b in bytes(bootp.chaddr)[:6])
+        hostname = options.get('hostname')
+        if isinstance(hostname, bytes):
+            hostname = hostname.decode('utf-8', errors='ignore')
+        message_type = options.get('message-type')
+        if message_type == 5:  # ACK from the server: the lease it just handed out
+            ip = bootp.yiaddr
+        else:
+            ip = options.get('requested_addr') or bootp.ciaddr
+        self.observe(ip, mac, "dhcp", hostname or None)
+
+    def observe(self, ip, mac, source, hostname=None):
+        mac = normalize_mac(mac)
+        if not ip or ip == "0.0.0.0" or not mac:
+            return
+        now = time.time()
+        with self.lock:
+            entry = self.hosts.get(ip)
+            if entry is None or entry['mac'] != mac:
+                # New host, or the address now belongs to another device
+                entry = self.hosts[ip] = {
+                    'ip': ip, 'mac': mac, 'first_seen': now, 'last_seen': now, 'hostname': None, 'sources': []
+                }
+            entry['last_seen'] = now
+            if source not in entry['sources']:
+                entry['sources'].append(source)
+            # DHCP option 12 is what the device calls itself; keep it over mDNS/NetBIOS names
+            if hostname and (source == "dhcp" or not entry['hostname']):
+                entry['hostname'] = hostname
+
+    def last_seen(self, ip):
+        """Time `ip` was last heard or confirmed, or None if it is not in the table."""
+        with self.lock:
+            entry = self.hosts.get(ip)
+            return entry['last_seen'] if entry else None
+
+    def mark_seen(self, ip):
+        """Records that an active probe confirmed a silent host."""
+        with self.lock:
+            if ip in self.hosts:
+                self.hosts[ip]['last_seen'] = time.time()
+
+    def partition(self, network, max_silence, forget_after=24 * 3600):
+        """
+        Splits the hosts inside `network` into (fresh, silent) lists of entry
+        copies: fresh ones were heard within `max_silence` seconds, silent ones
+        within `forget_after`. Older entries are dropped.
+        """
+        now = time.time()
+        fresh, silent = [], []
+        with self.lock:
+            for ip, entry in list(self.hosts.items()):
+                age = now - entry['last_seen']
+                if age > forget_after:
+                    del self.hosts[ip]
+                    continue
+                try:
+                    if ipaddress.ip_address(ip) not in network:
+                        continue
+                except ValueError:
+                    continue
+                (fresh if age <= max_silence else silent).append(dict(entry, sources=list(entry['sources'])))
+        return fresh, silent
+
+
+passive_hosts = PassiveHostTable()
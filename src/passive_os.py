@@ -0,0 +1,201 @@
+import threading
+import time
+
+from src.inventory import normalize_mac
+from src.neighbors import neighbor_table
+from src.ping import iface_for_ip
+
+try:
+    from scapy.all import sniff, Ether, IP, TCP, DHCP  # type: ignore
+    _SCAPY_AVAILABLE = True
+except Exception:
+    _SCAPY_AVAILABLE = False
+
+# TCP SYN signatures, p0f style: (initial TTL, option layout, window sizes or None for any, label).
+# Window sizes prefixed "mss*" are multiples of the advertised MSS.
+_SYN_SIGNATURES = [
+    (64, "mss,sok,ts,nop,ws", ("mss*10", "mss*20", "mss*44", 29200, 64240, 65535), "Linux/Android"),
+    (64, "mss,nop,nop,sok,nop,ws", None, "Linux/Android"),
+    (64, "mss,nop,ws,nop,nop,ts,sok,eol", (65535,), "macOS/iOS"),
+    (64, "mss,nop,ws,sok,ts", (65535,), "FreeBSD"),
+    (128, "mss,nop,ws,nop,nop,sok", (8192, 64240, 65535), "Windows 10/11"),
+    (128, "mss,nop,ws,sok,ts", (8192, 64240, 65535), "Windows 10/11"),
+    (128, "mss,nop,nop,sok", (16384, 64240, 65535), "Windows XP"),
+    (255, "mss", None, "Network Device"),
+]
+
+# DHCP option 55 (parameter request list) signatures
+_DHCP_SIGNATURES = [
+    ((1, 3, 6, 15, 31, 33, 43, 44, 46, 47, 119, 121, 249, 252), "Windows 10/11"),
+    ((1, 15, 3, 6, 44, 46, 47, 31, 33, 121, 249, 43), "Windows 7/8"),
+    ((1, 15, 3, 6, 44, 46, 47, 31, 33, 121, 249, 43, 252), "Windows 7/8"),
+    ((1, 121, 3, 6, 15, 119, 252, 95, 44, 46), "macOS"),
+    ((1, 121, 3, 6, 15, 108, 114, 119, 252, 95, 44, 46), "macOS"),
+    ((1, 121, 3, 6, 15, 119, 252), "iOS"),
+    ((1, 121, 3, 6, 15, 108, 114, 119, 252), "iOS"),
+    ((1, 3, 6, 15, 26, 28, 51, 58, 59, 43), "Android"),
+    ((1, 3, 6, 15, 26, 28, 51, 58, 59, 43, 114, 108), "Android"),
+    ((1, 33, 3, 6, 15, 28, 51, 58, 59), "Android"),
+    ((1, 28, 2, 3, 15, 6, 119, 12, 44, 47, 26, 121, 42), "Linux"),
+    ((1, 3, 6, 12, 15, 17, 23, 28, 29, 31, 33, 40, 41, 42, 119), "Linux"),
+    ((1, 3, 6, 12, 15, 28, 42, 51, 54, 58, 59, 119, 121), "Linux"),
+]
+
+
+def _compile_syn_index(signatures):
+    # (ittl, layout) -> [(window rules, label)]: one dict hit plus a tiny scan per packet
+    index = {}
+    for ittl, layout, windows, label in signatures:
+        index.setdefault((ittl, layout), []).append((windows, label))
+    return index
+
+
+_SYN_INDEX = _compile_syn_index(_SYN_SIGNATURES)
+_DHCP_INDEX = {options: label for options, label in _DHCP_SIGNATURES}
+
+_OPTION_NAMES = {
+    'MSS': 'mss', 'NOP': 'nop', 'WScale': 'ws', 'SAckOK': 'sok', 'Timestamp': 'ts', 'EOL': 'eol'
+}
+
+
+def initial_ttl(ttl):
+    for candidate in (32, 64, 128, 255):
+        if ttl <= candidate:
+            return candidate
+    return 255
+
+
+def _window_matches(rules, window, mss):
+    if rules is None:
+        return True
+    for rule in rules:
+        if isinstance(rule, str):
+            if mss and window == mss * int(rule.split('*')[1]):
+                return True
+        elif window == rule:
+            return True
+    return False
+
+
+def match_syn(ttl, window, options):
+    """Returns (label, confidence) for a SYN's TTL/window/options, or None."""
+    layout = ','.join(_OPTION_NAMES.get(name, name.lower()) for name, _ in options)
+    mss = next((value for name, value in options if name == 'MSS'), None)
+    candidates = _SYN_INDEX.get((initial_ttl(ttl), layout))
+    if not candidates:
+        return None
+    for rules, label in candidates:
+        if _window_matches(rules, window, mss):
+            return label, "high"
+    # Layout matched but the window didn't: still a decent hint
+    return candidates[0][1], "medium"
+
+
+def match_dhcp(parameter_list):
+    label = _DHCP_INDEX.get(tuple(parameter_list))
+    return (label, "high") if label else None
+
+
+class PassiveOsSniffer:
+    """
+    Optional background sniffer that fingerprints devices from traffic they
+    send anyway: TCP SYN window/options/TTL and the DHCP option-55 request
+    list. Observations are kept per MAC so a full scan can use them without
+    probing.
+    """
+
+    def __init__(self, max_age=24 * 3600):
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.observations = {}  # mac -> {'os', 'confidence', 'method', 'ip', 'seen_at'}
+        self.active = False
+        self._thread = None
+
+    def available(self):
+        return _SCAPY_AVAILABLE
+
+    def start(self):
+        if not _SCAPY_AVAILABLE:
+            print("\033[93m[WARN] Passive OS fingerprinting needs scapy/Npcap; not started.\033[0m")
+            return False
+        if self._thread and self._thread.is_alive():
+            # Restarted before the old sniff timed out: keep that thread running
+            self.active = True
+            return True
+        self.active = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name="passive-os")
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self.active = False
+
+    def _run(self):
+        bpf = "(tcp[tcpflags] & (tcp-syn|tcp-ack) == tcp-syn) or (udp and src port 68 and dst port 67)"
+        while self.active:
+            try:
+                # The timeout lets stop() take effect even on a quiet network
+                sniff(filter=bpf, prn=self._handle, store=0, timeout=5)
+            except Exception as e:
+                print(f"\033[93m[WARN] Passive OS sniffer stopped: {e}\033[0m")
+                self.active = False
+
+    def _handle(self, pkt):
+        try:
+            if Ether not in pkt:
+                return
+            mac = normalize_mac(pkt[Ether].src)
+            if DHCP in pkt:
+                for option in pkt[DHCP].options:
+                    if isinstance(option, tuple) and option[0] == 'param_req_list':
+                        params = option[1] if isinstance(option[1], (list, tuple)) else list(option[1:])
+                        result = match_dhcp(params)
+                        if result:
+                            self._record(mac, None, result, "Passive DHCP")
+                return
+            if IP in pkt and TCP in pkt:
+                # A routed SYN carries the gateway's MAC; only on-link senders can be credited to theirs
+                if not self._on_link(pkt[IP].src, mac):
+                    return
+                result = match_syn(pkt[IP].ttl, pkt[TCP].window, pkt[TCP].options)
+                if result:
+                    self._record(mac, pkt[IP].src, result, "Passive SYN")
+        except Exception:
+            pass
+
+    def _on_link(self, ip, mac):
+        if neighbor_table.snapshot().get(ip) == mac:
+            return True
+        return iface_for_ip(ip) is not None
+
+    def _record(self, mac, ip, result, method):
+        if not mac:
+            return
+        label, confidence = result
+        with self.lock:
+            previous = self.observations.get(mac)
+            # DHCP fingerprints are more specific than SYN ones; don't let a weaker hint replace them
+            if previous and previous['method'] == "Passive DHCP" and method != "Passive DHCP" \
+                    and time.time() - previous['seen_at'] <= self.max_age:
+                return
+            self.observations[mac] = {
+                'os': label,
+                'confidence': confidence,
+                'method': method,
+                'ip': ip or (previous or {}).get('ip'),
+                'seen_at': time.time()
+            }
+
+    def lookup(self, mac):
+        """Returns the latest fresh observation for `mac` in detect_os format, or None."""
+        mac = normalize_mac(mac)
+        if not mac:
+            return None
+        with self.lock:
+            observation = self.observations.get(mac)
+        if not observation or time.time() - observation['seen_at'] > self.max_age:
+            return None
+        return {'os': observation['os'], 'confidence': observation['confidence'], 'method': observation['method']}
+
+
+passive_os = PassiveOsSniffer()
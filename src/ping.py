@@ -2,14 +2,27 @@ import socket
 import subprocess
 import platform
 import time
-import os
 from getmac import get_mac_address
 import logging
 import concurrent.futures
 from datetime import datetime
-from functools import lru_cache
 import re
+import ipaddress
+import itertools
+import math
+import threading
 import psutil  # Add this import
+from src.icmp import icmp_sweep, icmp_available
+from src.neighbors import neighbor_table
+from src.routing import route_table
+from src.rdns import ptr_resolver
+from src.netbios import netbios_resolver
+from src.mdns import multicast_lookup
+from src.osprobe import fingerprint_hosts
+from src.oui import get_oui_index
+from src.pacing import SweepTiming, wait_for_quiet
+from src.passive_hosts import passive_hosts
+from src.ndp import discover_ipv6
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,7 +31,7 @@ logger = logging.getLogger(__name__)
 # Remove netifaces import and replace with psutil-based functions
 try:
     # Scapy for fast ARP sweep (much faster than per-IP ping)
-    from scapy.all import ARP, Ether, srp, conf  # type: ignore
+    from scapy.all import ARP, Ether, sendp, AsyncSniffer, conf  # type: ignore
     _SCAPY_AVAILABLE = True
 except Exception:
     _SCAPY_AVAILABLE = False
@@ -51,8 +64,157 @@ def get_local_ips():
         ips.append(socket.gethostbyname(socket.gethostname()))
     return ips
 
+def parse_network(subnet):
+    """Parses any CIDR (or a bare address, treated as its /24 for backwards compatibility)."""
+    subnet = str(subnet).strip()
+    if '/' not in subnet:
+        subnet = f"{subnet}/24"
+    return ipaddress.IPv4Network(subnet, strict=False)
+
+def split_subnets(subnet):
+    """Normalised CIDRs of a comma separated subnet list ("10.0.0.0/24,192.168.1.0/24"), duplicates dropped."""
+    return list(dict.fromkeys(str(parse_network(part)) for part in str(subnet).split(',') if part.strip()))
+
+def iter_hosts(network):
+    # Lazily yields host addresses as strings - never materialises the whole range
+    return (str(ip) for ip in parse_network(network).hosts())
+
+def host_count(network):
+    network = parse_network(network)
+    return network.num_addresses if network.prefixlen >= 31 else network.num_addresses - 2
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def get_local_network(gateway=None):
+    """Derives the local CIDR from interface netmasks, preferring the interface that holds the gateway."""
+    candidates = []
+    try:
+        for interface_name, addrs in psutil.net_if_addrs().items():
+            for addr in addrs:
+                if addr.family != socket.AF_INET or not addr.netmask:
+                    continue
+                try:
+                    network = ipaddress.IPv4Network(f"{addr.address}/{addr.netmask}", strict=False)
+                except ValueError:
+                    continue
+                if network.is_loopback or network.is_link_local or network.prefixlen >= 31:
+                    continue
+                candidates.append(network)
+    except Exception:
+        pass
+
+    if gateway:
+        try:
+            gateway_ip = ipaddress.ip_address(gateway)
+            for network in candidates:
+                if gateway_ip in network:
+                    return str(network)
+        except ValueError:
+            pass
+
+    for network in candidates:
+        if network.is_private:
+            return str(network)
+
+    if gateway:
+        # Interface netmask unknown - assume the classic /24 around the gateway
+        return str(parse_network(gateway))
+    return None
+
+# Automatic multi-interface scans narrow anything larger (VPN pools, /16 labs) to the /24 around our address
+MAX_AUTO_SUBNET_HOSTS = 4096
+
+def get_local_networks(gateway=None):
+    """
+    Every subnet worth scanning on this machine as [(interface, cidr)]: IPv4,
+    private, interface up, not loopback/link-local/point-to-point. The one
+    holding the gateway comes first.
+    """
+    networks = []
+    try:
+        stats = psutil.net_if_stats()
+        for interface_name, addrs in psutil.net_if_addrs().items():
+            if interface_name in stats and not stats[interface_name].isup:
+                continue
+            for addr in addrs:
+                if addr.family != socket.AF_INET or not addr.netmask:
+                    continue
+                try:
+                    network = ipaddress.IPv4Network(f"{addr.address}/{addr.netmask}", strict=False)
+                except ValueError:
+                    continue
+                if network.is_loopback or network.is_link_local or not network.is_private or network.prefixlen >= 31:
+                    continue
+                if network.num_addresses > MAX_AUTO_SUBNET_HOSTS:
+                    print(f"\033[94m[DEBUG] {interface_name}: {network} is too large to sweep automatically, using the /24 around {addr.address}.\033[0m")
+                    network = parse_network(addr.address)
+                if all(str(network) != cidr for _, cidr in networks):
+                    networks.append((interface_name, str(network)))
+    except Exception:
+        pass
+
+    if gateway:
+        try:
+            gateway_ip = ipaddress.ip_address(gateway)
+            networks.sort(key=lambda item: gateway_ip not in ipaddress.ip_network(item[1]))
+        except ValueError:
+            pass
+    return networks
+
+def ping_hosts(hosts, max_workers=100, on_alive=None, on_progress=None, timing=None, source=None):
+    """
+    Pings an iterable of hosts with a bounded number of probes in flight and
+    returns the live ones. With a `timing` controller the in-flight limit and
+    the per-ping timeout adapt to measured RTTs; `max_workers` is the ceiling.
+    `source` sends every ping from that local address.
+    """
+    alive = []
+    in_flight = set()
+    probed = 0
+
+    def collect(done):
+        for future in done:
+            ip, status, rtt = future.result()
+            if timing:
+                if status:
+                    timing.on_reply(rtt)
+                else:
+                    timing.on_timeout()
+            if status:
+                alive.append(ip)
+                if on_alive:
+                    on_alive(ip)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for ip in hosts:
+            timeout = timing.timeout() if timing else PING_TIMEOUT
+            in_flight.add(executor.submit(ping_probe, ip, timeout, source))
+            probed += 1
+            if on_progress and probed % 256 == 0:
+                on_progress(probed)
+            limit = min(max_workers, timing.window()) if timing else max_workers * 2
+            if len(in_flight) >= limit:
+                done, in_flight = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                collect(done)
+        collect(concurrent.futures.as_completed(in_flight))
+
+    if on_progress:
+        on_progress(probed)
+    return alive
+
 def get_default_gateway():
-    # First, try to get gateway based on our local network IPs
+    # Cached kernel routing table: no process spawns or pings on the hot path
+    gateway = route_table.default_gateway()
+    if gateway:
+        return gateway
+
+    # Fallback: try to get gateway based on our local network IPs
     local_ips = get_local_ips()
     if local_ips:
         for local_ip in local_ips:
@@ -143,37 +305,60 @@ def get_default_gateway():
     print(f"\033[91m[ERROR] Could not detect default gateway\033[0m")
     return None
 
+# Reply TTLs seen by ping(), reused by OS fingerprinting instead of pinging again
+_OBSERVED_TTLS = {}
+
+def observed_ttl(ip):
+    return _OBSERVED_TTLS.get(ip)
+
+PING_TIMEOUT = 0.5
+
 def ping(ip):
-    param = ['-n', '1', '-w', '500'] if platform.system().lower() == 'windows' else ['-c', '1', '-W', '1']
+    ip, status, _ = ping_probe(ip)
+    return ip, status
+
+def ping_probe(ip, timeout=PING_TIMEOUT, source=None):
+    """Single echo via the ping binary; returns (ip, alive, rtt in seconds or None)."""
+    if platform.system().lower() == 'windows':
+        param = ['-n', '1', '-w', str(max(1, int(timeout * 1000)))]
+        if source:
+            param += ['-S', source]
+    else:
+        # iputils only takes whole seconds everywhere
+        param = ['-c', '1', '-W', str(max(1, math.ceil(timeout)))]
+        if source:
+            param += ['-I', source]
     try:
         result = subprocess.run(['ping'] + param + [ip], 
-                              stdout=subprocess.DEVNULL, 
+                              stdout=subprocess.PIPE, 
                               stderr=subprocess.DEVNULL,
-                              timeout=2)
-        return ip, result.returncode == 0
+                              text=True,
+                              timeout=timeout + 1.5)
+        rtt = None
+        if result.returncode == 0:
+            ttl_match = re.search(r'ttl=(\d+)', result.stdout, re.IGNORECASE)
+            if ttl_match:
+                _OBSERVED_TTLS[ip] = int(ttl_match.group(1))
+            rtt_match = re.search(r'time[=<]\s*([\d.]+)\s*ms', result.stdout, re.IGNORECASE)
+            if rtt_match:
+                rtt = float(rtt_match.group(1)) / 1000
+        return ip, result.returncode == 0, rtt
     except subprocess.TimeoutExpired:
-        return ip, False
+        return ip, False, None
+    except OSError:
+        # No usable ping binary (or the spawn failed) - fall back to the ICMP socket engine
+        if icmp_available():
+            try:
+                info = icmp_sweep([ip], timeout=max(timeout, 1.0), retries=0, source=source).get(ip)
+                return ip, info is not None, info['rtt'] / 1000 if info else None
+            except OSError:
+                pass
+        return ip, False, None
 
 def get_mac_address(ip):
+    # Served from the cached neighbor table instead of one `arp` call per address
     try:
-        if platform.system() == 'Windows':
-            cmd = f"arp -a {ip}"
-        else:
-            cmd = f"arp -n {ip}"
-            
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        output = result.stdout
-        
-        for line in output.splitlines():
-            if ip in line:
-                parts = line.split()
-                if platform.system() == 'Windows':
-                    if len(parts) >= 3 and '-' in parts[1]:
-                        return parts[1].replace('-', ':')
-                else:
-                    if len(parts) >= 3 and ':' in parts[2]:
-                        return parts[2]
-        return 'Not Found'
+        return neighbor_table.lookup(ip) or 'Not Found'
     except Exception:
         return 'Unknown'
 
@@ -183,148 +368,197 @@ hostname_counters = {
     "netbios": 0
 }
 
-@lru_cache(maxsize=128)
-def get_hostname_dns_only(ip):
+def _reverse_lookup(ip):
+    # Pipelined PTR resolver (TTL cached); the OS resolver is only used without nameservers
+    if ptr_resolver.available():
+        try:
+            return ptr_resolver.resolve(ip)
+        except OSError:
+            pass
     try:
         hostname, _, _ = socket.gethostbyaddr(ip)
-        hostname_counters["gethostbyaddr"] += 1
         return hostname
     except (socket.herror, socket.gaierror, OSError):
-        hostname_counters["unknown"] += 1
-        return 'Unknown'
+        return None
+
+def get_hostname_dns_only(ip):
+    hostname = _reverse_lookup(ip)
+    if hostname:
+        hostname_counters["gethostbyaddr"] += 1
+        return hostname
+    hostname_counters["unknown"] += 1
+    return 'Unknown'
+
+def get_netbios_info(ip, timeout=1):
+    # NBSTAT node status (hostname, workgroup, MAC, full name table) via the shared batch socket
+    try:
+        return netbios_resolver.query(ip, timeout=timeout)
+    except OSError:
+        return None
+
+def get_netbios_name(ip, timeout=1):
+    info = get_netbios_info(ip, timeout=timeout)
+    return info['hostname'] if info else None
 
-@lru_cache(maxsize=128)
 def get_hostname(ip, timeout=1):
     global hostname_counters
     # 1. Standard DNS Lookup (Reverse PTR)
-    try:
-        hostname, _, _ = socket.gethostbyaddr(ip)
+    hostname = _reverse_lookup(ip)
+    if hostname:
         hostname_counters["gethostbyaddr"] += 1
         return hostname
-    except (socket.herror, socket.gaierror, OSError):
-        pass # Failed, try next method
 
-    # 2. NetBIOS Name Query (more effective on local networks)
-    try:
-        # Construct NetBIOS Name Service request
-        # Transaction ID (2 bytes), Flags (2 bytes), Questions (2 bytes), etc.
-        trans_id = os.urandom(2)
-        query = trans_id + b'\x01\x00\x00\x01\x00\x00\x00\x00\x00\x00'
-        # Name to query: '*' (encoded) + null terminator
-        query += b'\x20\x43\x4b\x41\x41\x41\x41\x41\x41\x41\x41\x41\x41\x41\x41\x41\x41\x41\x41\x41\x41\x41\x41\x41\x41\x41\x41\x41\x41\x41\x41\x41\x00'
-        # Query Type: NBSTAT (33), Query Class: IN (1)
-        query += b'\x00\x21\x00\x01'
-
-        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-            s.settimeout(timeout)
-            s.sendto(query, (ip, 137))
-            data, _ = s.recvfrom(1024)
-            
-            # The name is in the response after a certain offset
-            # This is a simplified parser for the most common response format
-            if len(data) > 56:
-                # Find the first name in the list of names
-                name_bytes = data[57:72].strip()
-                hostname = name_bytes.decode('latin-1', errors='ignore').strip()
-                if hostname:
-                    hostname_counters["netbios"] += 1
-                    return hostname
-    except (socket.timeout, ConnectionResetError, OSError):
-        pass # Failed, move on
+    # 2. NetBIOS Name Query
+    hostname = get_netbios_name(ip, timeout=timeout)
+    if hostname:
+        hostname_counters["netbios"] += 1
+        return hostname
 
     # If all methods failed
     hostname_counters["unknown"] += 1
     return 'Unknown'
 
-def arp_scan(subnet):
-    base_ip = '.'.join(subnet.split('.')[:3])
-    ips_to_scan = [f"{base_ip}.{i}" for i in range(1, 255)]
-    online_hosts = []
+def arp_scan(subnet, on_progress=None, timing=None, source=None):
+    network = parse_network(subnet)
 
-    # Use a thread pool to send pings in parallel to populate the ARP cache
-    with concurrent.futures.ThreadPoolExecutor(max_workers=100) as executor:
+    # Populate the ARP cache: one ICMP socket if we can open it, otherwise parallel pings
+    swept = False
+    if icmp_available():
+        try:
+            icmp_sweep(iter_hosts(network), timeout=1.0, on_progress=on_progress, timing=timing, source=source)
+            swept = True
+        except OSError:
+            pass
+    if not swept:
         # We don't need the result, just to send the packets
-        list(executor.map(ping, ips_to_scan))
+        ping_hosts(iter_hosts(network), max_workers=100, on_progress=on_progress, timing=timing, source=source)
 
-    # Give a moment for the ARP cache to update
-    time.sleep(2)
+    # Give the ARP cache a moment to settle; stop as soon as it stops growing
+    if timing:
+        timing.on_listen(wait_for_quiet(lambda: len(_read_arp_table_map(network)), timing, max_wait=2.0, interval=0.1))
+    else:
+        time.sleep(2)
 
     # Now read the system's ARP table
-    try:
-        result = subprocess.run(['arp', '-a'], capture_output=True, text=True, check=True)
-        lines = result.stdout.splitlines()
-        for line in lines:
-            line = line.strip()
-            if not line or "Interface" in line or "Internet" in line:
-                continue
-            
-            parts = line.split()
-            if len(parts) >= 2 and parts[0].startswith(base_ip):
-                online_hosts.append(parts[0])
+    online_hosts = _read_arp_table_map(network)
+    if not online_hosts:
+        print("\033[91m[ERROR] Could not read the ARP table. ARP scan may be incomplete.\033[0m")
 
-    except (subprocess.CalledProcessError, FileNotFoundError) as e:
-        print(f"\033[91m[ERROR] Could not execute 'arp -a': {e}. ARP scan may be incomplete.\033[0m")
+    return list(online_hosts) # Return unique IPs
 
-    return list(set(online_hosts)) # Return unique IPs
+def _in_scope(ip, scope):
+    # scope is either a legacy "a.b.c." prefix string or an ipaddress network
+    if isinstance(scope, str):
+        return ip.startswith(scope)
+    try:
+        return ipaddress.ip_address(ip) in scope
+    except ValueError:
+        return False
 
-def _select_iface_for_subnet(subnet):
+def _local_binding(subnet):
+    """(interface name, local IPv4 address) of the interface attached to `subnet`, or (None, None)."""
     try:
-        base_ip = '.'.join(subnet.split('.')[:3]) + '.'
+        network = parse_network(subnet)
         # Use psutil instead of netifaces
         for interface_name, addrs in psutil.net_if_addrs().items():
             for addr in addrs:
                 if addr.family == socket.AF_INET:
                     ip = addr.address
-                    if ip and ip.startswith(base_ip):
-                        return interface_name
+                    if ip and _in_scope(ip, network):
+                        return interface_name, ip
     except Exception:
         pass
+    return None, None
+
+def _select_iface_for_subnet(subnet):
+    return _local_binding(subnet)[0]
+
+def _read_arp_table_map(scope):
+    # Always re-read: callers use this right after populating the cache
+    table = neighbor_table.snapshot(max_age=0)
+    return {ip: mac for ip, mac in table.items() if _in_scope(ip, scope)}
+
+# New: fast ARP sweep using Scapy (no per-IP subprocess)
+# Large networks are swept in chunks of ARP_CHUNK_SIZE targets so memory stays bounded
+ARP_CHUNK_SIZE = 1024
+
+def _arp_listen(targets, iface, timing, timeout, macs=None):
+    """
+    Broadcasts who-has for `targets` and collects is-at replies until they stop
+    arriving (timing.quiet_period) or `timeout` elapses. Targets with a MAC in
+    `macs` are asked by unicast instead. Returns {ip: mac}.
+    """
+    wanted = set(targets)
+    replies = {}
+    started = threading.Event()
+
+    def on_packet(pkt):
+        if ARP in pkt and pkt[ARP].op == 2 and pkt[ARP].psrc in wanted:
+            replies.setdefault(pkt[ARP].psrc, pkt[ARP].hwsrc.lower())
+
+    kwargs = {"filter": "arp", "prn": on_packet, "store": False, "started_callback": started.set}
+    if iface:
+        kwargs["iface"] = iface
+    sniffer = AsyncSniffer(**kwargs)
+    sniffer.start()
+    started.wait(1.0)
+    try:
+        send_kwargs = {"verbose": 0}
+        if iface:
+            send_kwargs["iface"] = iface
+        macs = macs or {}
+        sendp([Ether(dst=macs.get(ip, "ff:ff:ff:ff:ff:ff"))/ARP(pdst=ip) for ip in targets], **send_kwargs)
+        waited = wait_for_quiet(lambda: len(replies), timing, max_wait=timeout)
+        if timing:
+            timing.on_listen(waited)
+    finally:
+        sniffer.stop()
+    return dict(replies)
+
+def iface_for_ip(ip):
+    """Name of the local interface whose subnet contains `ip` (so it can be reached by ARP), or None."""
+    try:
+        target = ipaddress.ip_address(ip)
+        for interface_name, addrs in psutil.net_if_addrs().items():
+            for addr in addrs:
+                if addr.family == socket.AF_INET and addr.netmask:
+                    network = ipaddress.ip_network(f"{addr.address}/{addr.netmask}", strict=False)
+                    if target in network and network.prefixlen < 32:
+                        return interface_name
+    except (ValueError, OSError):
+        pass
     return None
 
-def _read_arp_table_map(base_prefix):
-    ip_mac = {}
+def arp_probe(ip_macs, timeout=1.0):
+    """
+    Unicast who-has to on-link hosts whose MAC is known ({ip: mac}): only the
+    target sees the frame, and hosts that drop ICMP still answer. Returns the
+    set of IPs that replied, or None when ARP probing is unavailable.
+    """
+    if not _SCAPY_AVAILABLE:
+        return None
+    by_iface = {}
+    for ip, mac in ip_macs.items():
+        by_iface.setdefault(iface_for_ip(ip), {})[ip] = mac
+    answered = set()
     try:
-        if platform.system() == 'Windows':
-            result = subprocess.run(['arp', '-a'], capture_output=True, text=True, check=True)
-            for line in result.stdout.splitlines():
-                parts = line.split()
-                if len(parts) >= 2 and parts[0].startswith(base_prefix):
-                    ip = parts[0]
-                    mac = parts[1].replace('-', ':').lower()
-                    ip_mac[ip] = mac
-        else:
-            # Prefer `ip neigh` if available for more reliable parsing
-            try:
-                result = subprocess.run(['ip', 'neigh'], capture_output=True, text=True, check=True)
-                for line in result.stdout.splitlines():
-                    parts = line.split()
-                    if len(parts) >= 5:
-                        ip = parts[0]
-                        if ip.startswith(base_prefix) and 'lladdr' in parts:
-                            mac = parts[parts.index('lladdr') + 1].lower()
-                            ip_mac[ip] = mac
-            except Exception:
-                result = subprocess.run(['arp', '-n'], capture_output=True, text=True, check=True)
-                for line in result.stdout.splitlines():
-                    parts = line.split()
-                    # typical: IP HWtype HWaddress Flags Mask Iface
-                    if len(parts) >= 3 and parts[0].startswith(base_prefix):
-                        ip = parts[0]
-                        mac = parts[2].lower()
-                        ip_mac[ip] = mac
+        conf.verb = 0
+        for iface, macs in by_iface.items():
+            if iface is None:
+                continue
+            answered.update(_arp_listen(list(macs), iface, SweepTiming(), timeout, macs=macs))
     except Exception:
-        pass
-    return ip_mac
+        return None
+    return answered
 
-# New: fast ARP sweep using Scapy (no per-IP subprocess)
-def smart_arp_sweep(subnet, timeout=1.2):
-    base_ip = '.'.join(subnet.split('.')[:3])
-    pdst = f"{base_ip}.1-254"
+def smart_arp_sweep(subnet, timeout=1.2, on_progress=None, timing=None):
+    network = parse_network(subnet)
     ip_mac = {}
+    timing = timing or SweepTiming()
 
     if not _SCAPY_AVAILABLE:
         # Fallback: use existing ARP scan method (slower)
-        ips = arp_scan(subnet)
+        ips = arp_scan(subnet, on_progress=on_progress, timing=timing)
         return {ip: get_mac_address(ip) for ip in ips}
 
     try:
@@ -335,25 +569,36 @@ def smart_arp_sweep(subnet, timeout=1.2):
         except Exception:
             pass
 
-        # Broadcast ARP who-has for the whole /24 in one go (bind to iface if resolved)
-        kwargs = {"timeout": timeout, "verbose": 0, "retry": 1}
-        if iface:
-            kwargs["iface"] = iface
-        answered, _ = srp(Ether(dst="ff:ff:ff:ff:ff:ff")/ARP(pdst=pdst), **kwargs)
-        for _, rcv in answered:
-            ip_mac[rcv.psrc] = rcv.hwsrc.lower()
+        # Broadcast ARP who-has chunk by chunk (bind to iface if resolved). `timeout`
+        # is only the ceiling: each listen window closes once replies dry up.
+        probed = 0
+        for chunk in chunked(iter_hosts(network), ARP_CHUNK_SIZE):
+            answered = _arp_listen(chunk, iface, timing, timeout)
+            for ip in answered:
+                timing.on_reply(None)
+            # One retry for the silent part of the chunk; late answers mean the first broadcast was lost
+            missing = [ip for ip in chunk if ip not in answered]
+            if missing:
+                retried = _arp_listen(missing, iface, timing, timing.quiet_period(timeout) * 2)
+                for ip in retried:
+                    timing.on_reply(None, retried=True)
+                answered.update(retried)
+            ip_mac.update(answered)
+            probed += len(chunk)
+            if on_progress:
+                on_progress(probed)
     except Exception:
         ip_mac = {}
 
     # 1) If Scapy yielded nothing, try parsing existing ARP table (zero cost)
     if not ip_mac:
-        table_map = _read_arp_table_map(base_ip + '.')
+        table_map = _read_arp_table_map(network)
         if table_map:
             return table_map
 
     # 2) Last resort: legacy ARP-based discovery (pings + arp -a)
     if not ip_mac:
-        ips = arp_scan(subnet)
+        ips = arp_scan(subnet, on_progress=on_progress, timing=timing)
         ip_mac = {ip: get_mac_address(ip).lower() for ip in ips}
 
     return ip_mac
@@ -364,55 +609,21 @@ def log_hostname_counters():
     for method, count in hostname_counters.items():
         print(f"  {method}: {count}")
 
-# Cache OUI in-process using file mtime to avoid re-reading on each scan
-_OUI_CACHE = {}
-_OUI_MTIME = 0
-
 def load_oui_data():
-    appdata_location = os.path.join(os.getenv('APPDATA'), "ayosbypasser")
-    oui_file = os.path.join(appdata_location, "oui.txt")
-
-    global _OUI_CACHE, _OUI_MTIME
+    # Shared memory-mapped index (src/oui.py); compiled from oui.txt on first use
+    index = get_oui_index()
     try:
-        mtime = os.path.getmtime(oui_file)
-    except Exception:
-        _OUI_CACHE = {}
-        _OUI_MTIME = 0
+        return index if index.available() else {}
+    except (OSError, ValueError) as e:
+        print(f"\033[93m[WARN] Failed to load OUI index: {e}\033[0m")
         return {}
 
-    if _OUI_CACHE and _OUI_MTIME == mtime:
-        return _OUI_CACHE
-
-    def _parse_line(line: str):
-        if "(hex)" in line:
-            parts = line.split("(hex)")
-        elif "(base 16)" in line:
-            parts = line.split("(base 16)")
-        else:
-            return None, None
-        oui_raw = parts[0].strip()
-        vendor = parts[1].strip()
-        oui = oui_raw.replace("-", "").replace(":", "").upper()
-        if len(oui) != 6 or any(c not in "0123456789ABCDEF" for c in oui):
-            return None, None
-        return oui, vendor
-
-    vendors = {}
-    if os.path.exists(oui_file):
-        # tolerate encoding oddities in the IEEE dump
-        with open(oui_file, 'r', encoding='utf-8', errors='ignore') as f:
-            for line in f:
-                oui, vendor = _parse_line(line)
-                if oui and vendor and oui not in vendors:
-                    vendors[oui] = vendor
-
-    _OUI_CACHE = vendors
-    _OUI_MTIME = mtime
-    return vendors
-
 def get_vendor(mac, oui_dict):
     if mac in ['Not Found', 'Unknown'] or not mac:
         return 'Unknown'
+    if hasattr(oui_dict, 'lookup'):
+        # Longest-prefix match, so MA-M/MA-S blocks resolve to their real owner
+        return oui_dict.lookup(mac) or 'Unknown'
     oui = mac.replace(':', '')[:6].upper()
     return oui_dict.get(oui, 'Unknown')
 
@@ -430,21 +641,42 @@ def resolve_vendors(ips, oui_dict):
 
 # Updated: allow tighter per-host timeout and worker cap
 def resolve_hostnames(ips, timeout=1.0, max_workers=50, dns_only=False):
+    ips = list(dict.fromkeys(ips))
     hostnames = {}
-    failed_count = 0
 
-    def resolve(ip):
-        nonlocal failed_count
-        if dns_only:
-            hostname = get_hostname_dns_only(ip)
-        else:
-            hostname = get_hostname(ip, timeout=timeout)
-        if hostname == 'Unknown':
-            failed_count += 1
-        hostnames[ip] = hostname
+    # 1. PTR: all queries go out together from one socket under a single deadline
+    if ptr_resolver.available():
+        try:
+            deadline = time.monotonic() + timeout * 2
+            hostnames = {ip: name for ip, name in ptr_resolver.resolve_many(ips, deadline=deadline).items() if name}
+        except OSError:
+            hostnames = {}
+    else:
+        def resolve(ip):
+            hostname = _reverse_lookup(ip)
+            if hostname:
+                hostnames[ip] = hostname
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            executor.map(resolve, ips)
+
+    # 2. mDNS + LLMNR: one multicast burst and one unicast burst, one shared window
+    remaining = [ip for ip in ips if ip not in hostnames]
+    if remaining and not dns_only:
+        hostnames.update(multicast_lookup(remaining, timeout=timeout))
+
+    # 3. NetBIOS: one NBSTAT burst for whatever is still unnamed
+    remaining = [ip for ip in ips if ip not in hostnames]
+    if remaining and not dns_only:
+        for ip, info in netbios_resolver.query_many(remaining, timeout=timeout).items():
+            if info.get('hostname'):
+                hostnames[ip] = info['hostname']
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        executor.map(resolve, ips)
+    failed_count = 0
+    for ip in ips:
+        if ip not in hostnames:
+            hostnames[ip] = 'Unknown'
+            failed_count += 1
 
     if failed_count > 0:
         print(f"Failed to resolve hostnames for {failed_count} IP addresses.")
@@ -452,333 +684,209 @@ def resolve_hostnames(ips, timeout=1.0, max_workers=50, dns_only=False):
     # log_hostname_counters()
     return hostnames
 
-def scan_network(subnet, scan_hostname=False, scan_vendor=False, scanning_method="divide_and_conquer", parallel_scans=True, parallel_multiplier=2):
+def scan_network(subnet, scan_hostname=False, scan_vendor=False, scanning_method="divide_and_conquer", parallel_scans=True, parallel_multiplier=2, on_event=None, previous_results=None, enrich_ttl=3600, ipv6=False):
+    # Thin synchronous wrapper around the asyncio pipeline (src/pipeline.py).
+    # `subnet` may list several CIDRs separated by commas; they are swept concurrently.
+    from src.pipeline import run_scans
+
     start_time = time.time()
     print(f"\033[94m[DEBUG] Scanning with method: {scanning_method}, Parallel scans: {'Enabled' if parallel_scans else 'Disabled'}\033[0m")
     
-    # Add debug info
-    debug_network_info()
-    
-    online_devices = []
     local_ips = get_local_ips()
     gateway = get_default_gateway()
-    
-    print(f"\033[94m[DEBUG] Starting scan on subnet: {subnet}\033[0m")
-    print(f"\033[94m[DEBUG] Local IPs: {local_ips}, Gateway: {gateway}\033[0m")
 
-    if scanning_method == "hybrid_adaptive":
-        print("\033[94m[DEBUG] Starting Hybrid/Adaptive scan.\033[0m")
-        online_devices = arp_scan(subnet)
-    elif scanning_method == "smart":
-        print("\033[94m[DEBUG] Starting SMART scan.\033[0m")
-        ip_mac_map = smart_arp_sweep(subnet, timeout=1.2)
-        if not ip_mac_map:
-            print("\033[93m[WARN] SMART sweep returned no hosts. Falling back to Divide and Conquer.\033[0m")
-            return scan_network(
-                subnet=subnet,
-                scan_hostname=scan_hostname,
-                scan_vendor=scan_vendor,
-                scanning_method="divide_and_conquer",
-                parallel_scans=parallel_scans,
-                parallel_multiplier=parallel_multiplier
-            )
-
-        online_devices = sorted(ip_mac_map.keys(), key=lambda ip: tuple(map(int, ip.split('.'))))
-
-        # Prepare hostname/vendor with minimal overhead
-        hostnames = {}
-        vendors = {}
-        if scan_hostname and online_devices:
-            hostnames = resolve_hostnames(online_devices, timeout=0.25, max_workers=50, dns_only=True)
-        if scan_vendor and online_devices:
-            oui_dict = load_oui_data()  # now cached by mtime
-            for ip, mac in ip_mac_map.items():
-                vendors[ip] = get_vendor(mac, oui_dict)
-
-        # Build results using ARP-provided MACs (no per-IP mac lookup)
-        results = []
-        for ip in online_devices:
-            mac = ip_mac_map.get(ip) or 'Unknown'
-            hostname = hostnames.get(ip, 'Unknown') if scan_hostname else 'Skipped'
-            vendor = vendors.get(ip, 'Unknown') if scan_vendor else 'Skipped'
-            
-            # Detect OS if full scan
-            os_info = None
-            if scan_hostname and scan_vendor:  # Only during full scans
-                os_info = detect_os(ip, mac=mac, hostname=hostname)
-                
-                # Override vendor to Microsoft if Windows detected with high/medium confidence
-                if os_info and 'Windows' in os_info['os'] and os_info['confidence'] in ['high', 'medium']:
-                    vendor = 'Microsoft'
-            
-            device_info = {
-                'ip': ip,
-                'mac': mac,
-                'hostname': hostname,
-                'vendor': vendor,
-                'is_local': ip in local_ips,
-                'is_gateway': ip == gateway,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            # Add OS info if detected
-            if os_info:
-                device_info['os'] = os_info['os']
-                device_info['os_confidence'] = os_info['confidence']
-                device_info['os_method'] = os_info.get('method', 'unknown') 
-            
-            results.append(device_info)
-
-        # Sort results by IP, push gateway last
-        results = sorted(
-            results,
-            key=lambda d: tuple(map(int, d['ip'].split('.'))) if d['ip'] != gateway else (255, 255, 255, 255)
-        )
-        end_time = time.time()
-        if logger.level <= logging.DEBUG:
-            print(f"\033[94m[DEBUG] SMART scan completed in {end_time - start_time:.2f} seconds\033[0m")
-        return results
-    else:
-        # Get the base IP from the subnet
-        base_ip = '.'.join(subnet.split('.')[:3])
-        
-        # Generate all IP addresses to scan
-        ips = [f"{base_ip}.{i}" for i in range(1, 255)]
-        
-        # Optimize: Prioritize common IP addresses first (gateways, etc.)
-        if scanning_method == "divide_and_conquer":
-            priority_ips = [f"{base_ip}.1", f"{base_ip}.254"]
-            common_ranges = [i for i in range(1, 20)]
-            
-            # Reorder IPs to check likely candidates first
-            for ip_suffix in priority_ips + common_ranges:
-                target_ip = f"{base_ip}.{ip_suffix}"
-                if target_ip in ips:
-                    ips.remove(target_ip)
-                    ips.insert(0, target_ip)
-        
-        if parallel_scans:
-            max_workers = (os.cpu_count() or 4) * parallel_multiplier
-            print(f"\033[94m[DEBUG] Starting ping scan with {max_workers} threads.\033[0m")
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                future_to_ip = {executor.submit(ping, ip): ip for ip in ips}
-                for future in concurrent.futures.as_completed(future_to_ip):
-                    ip, status = future.result()
-                    if status:
-                        online_devices.append(ip)
-        else:
-            # Scan sequentially
-            for ip in ips:
-                _, status = ping(ip)
-                if status:
-                    online_devices.append(ip)
+    # Add debug info
+    debug_network_info(local_ips, gateway)
     
-    # Resolve hostnames and vendors in parallel
-    hostnames = {}
-    vendors = {}
-    oui_dict = load_oui_data() if scan_vendor else {}
-
-    def resolve_hostname(ip):
-        return ip, get_hostname(ip)
-
-    def resolve_vendor(ip):
-        mac = get_mac_address(ip)
-        return ip, get_vendor(mac, oui_dict)
-
-    if online_devices and (scan_hostname or scan_vendor):
-        print(f"\033[94m[DEBUG] Resolving hostnames/vendors with up to 50 threads for {len(online_devices)} devices.\033[0m")
-        with concurrent.futures.ThreadPoolExecutor(max_workers=50) as executor:
-            if scan_hostname:
-                hostname_futures = {executor.submit(resolve_hostname, ip): ip for ip in online_devices}
-            if scan_vendor:
-                vendor_futures = {executor.submit(resolve_vendor, ip): ip for ip in online_devices}
-
-            if scan_hostname:
-                for future in concurrent.futures.as_completed(hostname_futures):
-                    ip, hostname = future.result()
-                    hostnames[ip] = hostname
-
-            if scan_vendor:
-                for future in concurrent.futures.as_completed(vendor_futures):
-                    ip, vendor = future.result()
-                    vendors[ip] = vendor
-
-    # Build the results
-    results = []
-    for ip in online_devices:
-        mac = get_mac_address(ip)
-        hostname = hostnames.get(ip, 'Unknown') if scan_hostname else 'Skipped'
-        vendor = vendors.get(ip, 'Unknown') if scan_vendor else 'Skipped'
-        
-        # Detect OS if full scan
-        os_info = None
-        if scan_hostname and scan_vendor:  # Only during full scans
-            os_info = detect_os(ip, mac=mac, hostname=hostname)
-            
-            # Override vendor to Microsoft if Windows detected with high/medium confidence
-            if os_info and 'Windows' in os_info['os'] and os_info['confidence'] in ['high', 'medium']:
-                vendor = 'Microsoft'
-
-        device_info = {
-            'ip': ip,
-            'mac': mac,
-            'hostname': hostname,
-            'vendor': vendor,
-            'is_local': ip in local_ips,
-            'is_gateway': ip == gateway,
-            'timestamp': datetime.now().isoformat()
-        }
-        
-        # Add OS info if detected
-        if os_info:
-            device_info['os'] = os_info['os']
-            device_info['os_confidence'] = os_info['confidence']
-            device_info['os_method'] = os_info.get('method', 'unknown')  # NEW
-        
-        results.append(device_info)
+    targets = [(cidr, *_local_binding(cidr)) for cidr in split_subnets(subnet)]
+    for cidr, iface, source in targets:
+        print(f"\033[94m[DEBUG] Starting scan on subnet: {cidr} (interface: {iface or 'routed'}, source: {source or 'auto'})\033[0m")
+    print(f"\033[94m[DEBUG] Local IPs: {local_ips}, Gateway: {gateway}\033[0m")
 
-    # Sort results by IP address, ignoring the router's IP
-    results = sorted(
-        results,
-        key=lambda device: tuple(map(int, device['ip'].split('.'))) if device['ip'] != gateway else (255, 255, 255, 255)
+    ipv6_future = None
+    ipv6_executor = None
+    if ipv6:
+        # A few multicast packets per interface, running alongside the IPv4 sweep
+        ipv6_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        ipv6_future = ipv6_executor.submit(discover_ipv6, [iface for _, iface, _ in targets])
+
+    results = run_scans(
+        targets,
+        scan_hostname=scan_hostname,
+        scan_vendor=scan_vendor,
+        scanning_method=scanning_method,
+        parallel_scans=parallel_scans,
+        parallel_multiplier=parallel_multiplier,
+        local_ips=local_ips,
+        gateway=gateway,
+        on_event=on_event,
+        previous_results=previous_results,
+        enrich_ttl=enrich_ttl
     )
 
+    if ipv6_future:
+        try:
+            results = _merge_ipv6(results, ipv6_future.result(), scan_hostname, scan_vendor, on_event)
+        except Exception as e:
+            print(f"\033[93m[WARN] IPv6 discovery failed: {e}\033[0m")
+        finally:
+            ipv6_executor.shutdown(wait=False)
+
     end_time = time.time()
     if logger.level <= logging.DEBUG:
         print(f"\033[94m[DEBUG] Full network scan completed in {end_time - start_time:.2f} seconds\033[0m")
 
     return results
 
-def detect_os(ip, mac=None, hostname=None):
-    os_guess = "Unknown"
-    confidence = "low"
-    method = "none"
-    version_info = ""
-    
-    # Method 1: TTL Analysis (fastest - just parse existing ping data)
-    ttl_result = _detect_os_by_ttl(ip)
-    if ttl_result:
-        os_guess = ttl_result['os']
-        confidence = ttl_result['confidence']
-        method = "TTL"
-        # If we got high confidence from TTL, skip TCP check
-        if confidence == "high":
-            return {"os": os_guess, "confidence": confidence, "method": method}
-    
-    # Method 2: Quick TCP Port Check (only if TTL gave low confidence)
-    if confidence != "high":
-        tcp_result = _detect_os_by_tcp_stack(ip)
-        if tcp_result:
-            os_guess = tcp_result['os']
-            confidence = tcp_result['confidence']
-            method = tcp_result.get('method', 'TCP')
-            version_info = tcp_result.get('version', '')
-    
-    # Format final result
-    if version_info:
-        os_guess = f"{os_guess} {version_info}"
-    
-    return {
-        "os": os_guess,
-        "confidence": confidence,
-        "method": method
-    }
-
-
-def _detect_os_by_ttl(ip):
-    """Detect OS based on TTL values from ping response."""
-    try:
-        param = ['-n', '1', '-w', '500'] if platform.system().lower() == 'windows' else ['-c', '1', '-W', '1']
-        result = subprocess.run(['ping'] + param + [ip], 
-                              capture_output=True, 
-                              text=True,
-                              timeout=1)
-        
-        if result.returncode != 0:
-            return None
-        
-        # Extract TTL from output
-        ttl_match = re.search(r'(?:ttl|TTL)=(\d+)', result.stdout, re.IGNORECASE)
-        if not ttl_match:
-            return None
-        
-        ttl = int(ttl_match.group(1))
-        
-        # TTL fingerprinting (common initial TTL values)
-        # Windows: 128, Linux: 64, Cisco: 255
-        if 60 < ttl <= 64:
-            return {"os": "Linux/Unix", "confidence": "high"}
-        elif 120 < ttl <= 128:
-            return {"os": "Windows", "confidence": "high"}
-        elif 240 < ttl <= 255:
-            return {"os": "Network Device", "confidence": "high"}
-        elif ttl <= 60:
-            return {"os": "Linux/Android", "confidence": "medium"}
-        elif ttl <= 120:
-            return {"os": "Windows", "confidence": "low"}
-        
-    except Exception:
-        pass
-    
-    return None
+def _merge_ipv6(results, neighbours, scan_hostname, scan_vendor, on_event=None):
+    """
+    Attaches IPv6 addresses to the IPv4 device with the same MAC. MACs no IPv4
+    record claims become IPv6-only devices listed after the IPv4 ones, with
+    their global address (or link-local) as 'ip'.
+    """
+    by_mac = {}
+    unresolved = []
+    for neighbour in neighbours:
+        if neighbour['mac']:
+            by_mac.setdefault(neighbour['mac'], []).append(neighbour)
+        else:
+            unresolved.append(neighbour)
+
+    attached = 0
+    for device in results:
+        mac = (device.get('mac') or '').lower().replace('-', ':')
+        matches = by_mac.pop(mac, None)
+        if matches:
+            device['ipv6'] = sorted({n['address'] for n in matches})
+            attached += 1
+            if on_event:
+                on_event("update", {'ip': device['ip'], 'ipv6': device['ipv6']})
+
+    oui_dict = load_oui_data() if scan_vendor and (by_mac or unresolved) else {}
+    now = datetime.now().isoformat()
+    extra = []
+    groups = list(by_mac.items()) + [(None, [n]) for n in unresolved]
+    for mac, matches in groups:
+        addresses = sorted({n['address'] for n in matches})
+        # Prefer a routable address for display; link-local ones need a scope to be used
+        primary = next((a for a in addresses if not ipaddress.IPv6Address(a).is_link_local), addresses[0])
+        device = {
+            'ip': primary,
+            'mac': mac or 'Unknown',
+            'hostname': 'Unknown' if scan_hostname else 'Skipped',
+            'vendor': get_vendor(mac, oui_dict) if scan_vendor else 'Skipped',
+            'is_local': False,
+            'is_gateway': any(n['router'] for n in matches),
+            'timestamp': now,
+            'ipv6': addresses,
+            'ipv6_only': True,
+            'interface': matches[0]['interface']
+        }
+        extra.append(device)
+        if on_event:
+            on_event("device", dict(device))
 
+    print(f"\033[94m[DEBUG] IPv6 discovery: {len(neighbours)} addresses, {attached} matched IPv4 devices, {len(extra)} IPv6-only devices.\033[0m")
+    return results + sorted(extra, key=lambda d: ipaddress.IPv6Address(d['ip']))
 
-def _detect_os_by_tcp_stack(ip):
+def passive_scan(subnet, max_silence=600):
     """
-    Fast TCP port-based detection - only checks if ports are open.
-    Does NOT use the actual protocols, just TCP connection tests.
+    Basic scan answered from the passive host table: hosts heard within
+    `max_silence` seconds are taken as they are, and only the ones that have
+    gone quiet since are confirmed with one ICMP sweep (or pings).
     """
-    # Only check the most common ports - in priority order
-    ports_to_try = [
-        (445, "Windows", "Port 445"),      # SMB port (Windows file sharing)
-        (22, "Linux/Unix", "Port 22"),      # SSH port (Linux remote access)
-        (3389, "Windows", "Port 3389")      # RDP port (Windows remote desktop)
-    ]
-    
-    for port, os_type, method_name in ports_to_try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(0.5)
-        
-        try:
-            if sock.connect_ex((ip, port)) == 0:
-                sock.close()
-                
-                version = "10/11" if port == 3389 else ""
-                return {
-                    "os": os_type,
-                    "confidence": "high",
-                    "version": version,
-                    "method": method_name  # More accurate: "Port 445" instead of "SMB"
-                }
-        except:
-            pass
-        finally:
+    networks = [parse_network(cidr) for cidr in split_subnets(subnet)]
+    local_ips = get_local_ips()
+    gateway = get_default_gateway()
+    fresh, silent = [], []
+    for network in networks:
+        network_fresh, network_silent = passive_hosts.partition(network, max_silence)
+        fresh += network_fresh
+        silent += network_silent
+
+    confirmed = set()
+    if silent:
+        ips = [entry['ip'] for entry in silent]
+        swept = False
+        if icmp_available():
             try:
-                sock.close()
-            except:
+                confirmed = set(icmp_sweep(ips, timeout=1.0))
+                swept = True
+            except OSError:
                 pass
-    
-    return None
+        if not swept:
+            confirmed = set(ping_hosts(ips, max_workers=min(64, len(ips))))
+        for ip in confirmed:
+            passive_hosts.mark_seen(ip)
+
+    now = datetime.now().isoformat()
+    devices = {}
+    for entry in fresh + [entry for entry in silent if entry['ip'] in confirmed]:
+        devices[entry['ip']] = {
+            'ip': entry['ip'],
+            'mac': entry['mac'],
+            'hostname': entry['hostname'] or 'Skipped',
+            'vendor': 'Skipped',
+            'is_local': entry['ip'] in local_ips,
+            'is_gateway': entry['ip'] == gateway,
+            'timestamp': now,
+            'source': 'passive',
+            'last_seen': datetime.fromtimestamp(entry['last_seen']).isoformat()
+        }
+    # Our own address never shows up in captured broadcasts the way other hosts do
+    for ip in local_ips:
+        if ip not in devices and any(_in_scope(ip, network) for network in networks):
+            devices[ip] = {
+                'ip': ip, 'mac': 'Unknown', 'hostname': 'Skipped', 'vendor': 'Skipped',
+                'is_local': True, 'is_gateway': False, 'timestamp': now, 'source': 'passive'
+            }
+
+    print(f"\033[94m[DEBUG] Passive scan: {len(fresh)} recently heard, {len(confirmed)}/{len(silent)} silent hosts confirmed.\033[0m")
+    return sorted(
+        devices.values(),
+        key=lambda d: tuple(map(int, d['ip'].split('.'))) if d['ip'] != gateway else (255, 255, 255, 255)
+    )
+
+def detect_os(ip, mac=None, hostname=None, ttl=None):
+    # Single-host entry point; scans fingerprint whole batches via detect_os_batch
+    return detect_os_batch({ip: ttl})[ip]
+
+
+def detect_os_batch(hosts, timeout=0.5):
+    """
+    Fingerprints {ip: ttl or None} in one pass: TTLs seen during the sweep are
+    reused, and the 445/22/3389 checks for every inconclusive host share a
+    single non-blocking probe window (see src/osprobe.py).
+    """
+    hosts = {ip: ttl or observed_ttl(ip) for ip, ttl in hosts.items()}
+    if not icmp_available():
+        # No ICMP socket to batch with: fall back to ping subprocesses for missing TTLs
+        missing = [ip for ip, ttl in hosts.items() if not ttl]
+        if missing:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(32, len(missing))) as executor:
+                list(executor.map(ping, missing))
+            hosts = {ip: ttl or observed_ttl(ip) for ip, ttl in hosts.items()}
+    return fingerprint_hosts(hosts, timeout=timeout)
 
 # Add this after the get_default_gateway function for debugging
-def debug_network_info():
+def debug_network_info(local_ips=None, gateway=None):
     """Temporary debug function to diagnose network scanning issues"""
     print("\033[94m[DEBUG] === Network Debug Info ===\033[0m")
     
-    local_ips = get_local_ips()
+    if local_ips is None:
+        local_ips = get_local_ips()
     print(f"\033[94m[DEBUG] Local IPs found: {local_ips}\033[0m")
     
-    gateway = get_default_gateway()
+    if gateway is None:
+        gateway = get_default_gateway()
     print(f"\033[94m[DEBUG] Gateway detected: {gateway}\033[0m")
     
     if gateway:
-        # Test basic connectivity to gateway
-        _, gateway_reachable = ping(gateway)
-        print(f"\033[94m[DEBUG] Gateway reachable: {gateway_reachable}\033[0m")
+        # A neighbor-table entry proves the gateway answered recently, without pinging it
+        print(f"\033[94m[DEBUG] Gateway MAC: {neighbor_table.lookup(gateway) or 'not cached'}\033[0m")
         
         # Test subnet calculation
-        if local_ips:
-            subnet = '.'.join(local_ips[0].split('.')[:3]) + '.0'
-            print(f"\033[94m[DEBUG] Calculated subnet: {subnet}\033[0m")
+        subnet = get_local_network(gateway)
+        print(f"\033[94m[DEBUG] Calculated subnet: {subnet}\033[0m")
     
     print("\033[94m[DEBUG] === End Network Debug ===\033[0m")
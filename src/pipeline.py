@@ -0,0 +1,510 @@
+import asyncio
+import concurrent.futures
+import itertools
+import os
+from datetime import datetime
+
+from src.ping import (
+    ping_probe, ping_hosts, arp_scan, smart_arp_sweep, get_mac_address, get_hostname_dns_only, load_oui_data,
+    get_vendor, detect_os_batch, parse_network, iter_hosts, host_count, PING_TIMEOUT
+)
+from src.icmp import icmp_sweep, icmp_available
+from src.rdns import ptr_resolver
+from src.netbios import netbios_resolver
+from src.mdns import multicast_lookup
+from src.enrichcache import enrichment_cache
+from src.passive_os import passive_os
+from src.pacing import timing_for, remember
+
+# Enrichment fields carried over from a previous scan in delta mode
+DELTA_FIELDS = ('hostname', 'workgroup', 'vendor', 'os', 'os_confidence', 'os_method', 'enriched_at')
+
+# Per-stage concurrency limits for the enrichment workers
+DEFAULT_STAGE_LIMITS = {
+    "mac": 32,
+    "hostname": 50,
+    "os": 4  # concurrent fingerprint batches, each probing many hosts at once
+}
+
+# Hosts reaching the OS stage within this window are fingerprinted together
+OS_BATCH_WINDOW = 0.1
+
+
+def _ip_key(ip):
+    return tuple(map(int, ip.split('.')))
+
+
+def _normalize_mac(mac):
+    return (mac or '').lower().replace('-', ':')
+
+
+def _has_mac(mac):
+    return bool(mac) and mac not in ('Unknown', 'Not Found')
+
+
+def _prioritized_hosts(network):
+    # Gateways usually sit at the first/last usable addresses - probe those first
+    first = [str(ip) for ip in itertools.islice(network.hosts(), 19)]
+    last = str(network.broadcast_address - 1) if network.prefixlen < 31 else None
+    priority = list(dict.fromkeys(([last] if last else []) + first))
+    yield from priority
+    skip = set(priority)
+    for ip in iter_hosts(network):
+        if ip not in skip:
+            yield ip
+
+
+class ScanPipeline:
+    """
+    Asyncio scan orchestrator. Discovery runs in a worker thread and hands every
+    host to the event loop the moment it answers; each host then flows through
+    the MAC, hostname, vendor and OS stages concurrently, each stage bounded by
+    its own semaphore. With `interface`/`source` set, probes leave from that
+    interface's address and every device is tagged with the interface name.
+    """
+
+    def __init__(self, subnet, scan_hostname=False, scan_vendor=False, scanning_method="divide_and_conquer",
+                 parallel_scans=True, parallel_multiplier=2, local_ips=None, gateway=None,
+                 stage_limits=None, on_event=None, previous_results=None, enrich_ttl=3600,
+                 interface=None, source=None):
+        self.subnet = subnet
+        self.interface = interface
+        self.source = source
+        self.scan_hostname = scan_hostname
+        self.scan_vendor = scan_vendor
+        self.scanning_method = scanning_method
+        self.parallel_scans = parallel_scans
+        self.parallel_multiplier = parallel_multiplier
+        self.local_ips = local_ips or []
+        self.gateway = gateway
+        self.stage_limits = dict(DEFAULT_STAGE_LIMITS, **(stage_limits or {}))
+        self.on_event = on_event
+        # Delta mode: devices from the last full scan, keyed by IP
+        self.previous = {d['ip']: d for d in (previous_results or []) if d.get('ip')}
+        self.enrich_ttl = enrich_ttl
+        self.reused = 0
+        self.cache_hits = 0
+
+        self.devices = {}
+        self._tasks = set()
+        self._loop = None
+        self._executor = None
+        self._semaphores = {}
+        self._oui_future = None
+        self._os_batch = {}
+        self._os_flush = None
+        self.total_hosts = host_count(subnet)
+        self._last_progress_step = -1
+        # Adaptive concurrency/timeouts for discovery, shared by every sweep method
+        self.timing = timing_for(subnet)
+        self.timing_summary = None
+
+    # --- helpers ---
+
+    def _emit(self, kind, data):
+        if self.on_event:
+            try:
+                self.on_event(kind, data)
+            except Exception:
+                pass
+
+    async def _run(self, func, *args, **kwargs):
+        return await self._loop.run_in_executor(self._executor, lambda: func(*args, **kwargs))
+
+    def _update(self, ip, **fields):
+        device = self.devices[ip]
+        device.update(fields)
+        self._emit("update", dict(fields, ip=ip))
+
+    # --- discovery (runs in a worker thread) ---
+
+    def _discover(self, found, progress):
+        network = parse_network(self.subnet)
+        method = self.scanning_method
+
+        if method == "icmp_sweep" and not icmp_available():
+            print("\033[93m[WARN] ICMP sockets unavailable (needs admin/root). Falling back to Divide and Conquer.\033[0m")
+            method = "divide_and_conquer"
+
+        if method == "icmp_sweep":
+            print("\033[94m[DEBUG] Starting ICMP sweep from a single socket.\033[0m")
+            self.timing.begin(concurrency=256, timeout=1.0, ceiling=4096)
+            try:
+                icmp_sweep(
+                    iter_hosts(network),
+                    timeout=1.0,
+                    on_reply=lambda ip, info: found(ip, sweep=info),
+                    on_progress=progress,
+                    timing=self.timing,
+                    source=self.source
+                )
+                return method
+            except OSError as e:
+                print(f"\033[93m[WARN] ICMP sweep failed: {e}. Falling back to Divide and Conquer.\033[0m")
+                method = "divide_and_conquer"
+
+        if method == "hybrid_adaptive":
+            print("\033[94m[DEBUG] Starting Hybrid/Adaptive scan.\033[0m")
+            self.timing.begin(concurrency=256, timeout=1.0, ceiling=4096)
+            for ip in arp_scan(network, on_progress=progress, timing=self.timing, source=self.source):
+                found(ip)
+            return method
+
+        if method == "smart":
+            print("\033[94m[DEBUG] Starting SMART scan.\033[0m")
+            self.timing.begin(concurrency=256, timeout=1.0, ceiling=4096)
+            ip_mac_map = smart_arp_sweep(network, timeout=1.2, on_progress=progress, timing=self.timing)
+            if ip_mac_map:
+                for ip in sorted(ip_mac_map, key=_ip_key):
+                    found(ip, mac=ip_mac_map[ip] or 'Unknown')
+                return method
+            print("\033[93m[WARN] SMART sweep returned no hosts. Falling back to Divide and Conquer.\033[0m")
+            method = "divide_and_conquer"
+
+        ips = iter_hosts(network)
+
+        # Optimize: Prioritize common IP addresses first (gateways, etc.)
+        if method == "divide_and_conquer":
+            ips = _prioritized_hosts(network)
+
+        if self.parallel_scans:
+            # The configured worker count is the starting window; AIMD moves it within [4, 8x]
+            initial_workers = (os.cpu_count() or 4) * self.parallel_multiplier
+            max_workers = min(256, initial_workers * 8)
+            self.timing.begin(concurrency=initial_workers, timeout=PING_TIMEOUT, ceiling=max_workers)
+            print(f"\033[94m[DEBUG] Starting ping scan with {initial_workers} threads (adaptive, up to {max_workers}).\033[0m")
+            ping_hosts(ips, max_workers=max_workers, on_alive=found, on_progress=progress, timing=self.timing,
+                       source=self.source)
+        else:
+            self.timing.begin(concurrency=1, timeout=PING_TIMEOUT, ceiling=1)
+            probed = 0
+            for ip in ips:
+                _, status, rtt = ping_probe(ip, self.timing.timeout(), self.source)
+                if status:
+                    self.timing.on_reply(rtt)
+                    found(ip)
+                else:
+                    self.timing.on_timeout()
+                probed += 1
+                if probed % 256 == 0:
+                    progress(probed)
+            progress(probed)
+        return method
+
+    def _on_progress(self, probed):
+        total = self.total_hosts
+        self._emit("progress", {"probed": min(probed, total), "total": total})
+        # Only worth a console line on networks bigger than a /22
+        step = total // 10
+        if total > 1024 and step and probed // step != self._last_progress_step:
+            self._last_progress_step = probed // step
+            print(f"\033[94m[DEBUG] Sweep progress: {min(probed, total)}/{total} addresses probed\033[0m")
+
+    # --- enrichment stages ---
+
+    def _on_found(self, ip, mac=None, sweep=None):
+        if ip in self.devices:
+            return
+        device = {
+            'ip': ip,
+            'mac': mac or 'Unknown',
+            'hostname': 'Unknown' if self.scan_hostname else 'Skipped',
+            'vendor': 'Unknown' if self.scan_vendor else 'Skipped',
+            'is_local': ip in self.local_ips,
+            'is_gateway': ip == self.gateway,
+            'timestamp': datetime.now().isoformat()
+        }
+        if self.interface:
+            device['interface'] = self.interface
+        if sweep:
+            device['rtt'] = sweep.get('rtt')
+            device['ttl'] = sweep.get('ttl')
+        self.devices[ip] = device
+        self._emit("device", dict(device))
+
+        task = self._loop.create_task(self._enrich(ip, resolve_mac=mac is None))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _enrich(self, ip, resolve_mac):
+        try:
+            if resolve_mac:
+                async with self._semaphores["mac"]:
+                    mac = await self._run(get_mac_address, ip)
+                self._update(ip, mac=mac)
+
+            if self._reuse_previous(ip):
+                return
+
+            wanted = []
+            if self.scan_hostname:
+                wanted.append("hostname")
+            if self.scan_vendor:
+                wanted.append("vendor")
+            if self.scan_hostname and self.scan_vendor:  # Only during full scans
+                wanted.append("os")
+
+            # Fields still fresh in the MAC-keyed cache are not probed again
+            cached = enrichment_cache.lookup(self.devices[ip]['mac']) if wanted else {}
+            fields = {}
+            for field in wanted:
+                if field in cached:
+                    fields.update(self._cached_fields(field, *cached[field]))
+            if "hostname" in fields and "workgroup" in cached:
+                fields['workgroup'] = cached['workgroup'][0]
+            if fields:
+                self._update(ip, **fields)
+
+            stages = {
+                "hostname": self._hostname_stage,
+                "vendor": self._vendor_stage,
+                "os": self._os_stage
+            }
+            probe = [field for field in wanted if field not in cached]
+            if probe:
+                await asyncio.gather(*(stages[field](ip) for field in probe))
+                self.devices[ip]['enriched_at'] = datetime.now().isoformat()
+                self._remember(ip, probe)
+            elif wanted:
+                self.cache_hits += 1
+                self._update(ip, enrichment='cached')
+        except Exception as e:
+            print(f"\033[93m[WARN] Enrichment failed for {ip}: {e}\033[0m")
+
+    @staticmethod
+    def _cached_fields(field, value, confidence):
+        if field == "os":
+            return {'os': value.get('os'), 'os_method': value.get('os_method'), 'os_confidence': confidence}
+        return {field: value}
+
+    def _remember(self, ip, probed):
+        """Stores freshly probed fields in the MAC-keyed enrichment cache."""
+        device = self.devices[ip]
+        mac = device.get('mac')
+        if not _has_mac(mac):
+            return
+        for field in ("hostname", "vendor"):
+            if field in probed and device.get(field) not in (None, 'Skipped'):
+                # Misses are cached too, but expire quickly
+                confidence = "low" if device[field] == 'Unknown' else "high"
+                enrichment_cache.put(mac, field, device[field], confidence)
+        if "hostname" in probed and device.get('workgroup'):
+            enrichment_cache.put(mac, "workgroup", device['workgroup'])
+        if "os" in probed and device.get('os'):
+            enrichment_cache.put(mac, "os", {'os': device['os'], 'os_method': device.get('os_method')},
+                                 device.get('os_confidence') or "low")
+
+    def _reuse_previous(self, ip):
+        """Copies enrichment from the last scan when the host kept its MAC and the data is still fresh."""
+        previous = self.previous.get(ip)
+        if not previous or not (self.scan_hostname or self.scan_vendor):
+            return False
+        mac = self.devices[ip]['mac']
+        if not _has_mac(mac) or _normalize_mac(previous.get('mac')) != _normalize_mac(mac):
+            return False
+        # Only a full enrichment is worth copying
+        if previous.get('hostname') in (None, 'Skipped'):
+            return False
+        if self.scan_vendor and previous.get('vendor') in (None, 'Skipped'):
+            return False
+        try:
+            enriched_at = datetime.fromisoformat(previous.get('enriched_at') or previous['timestamp'])
+        except (KeyError, TypeError, ValueError):
+            return False
+        if (datetime.now() - enriched_at).total_seconds() > self.enrich_ttl:
+            return False
+
+        fields = {key: previous[key] for key in DELTA_FIELDS if key in previous}
+        fields['enriched_at'] = enriched_at.isoformat()
+        fields['enrichment'] = 'cached'
+        self._update(ip, **fields)
+        self.reused += 1
+        return True
+
+    async def _hostname_stage(self, ip):
+        # PTR and NBSTAT queries are pipelined on shared sockets and need no worker thread
+        netbios = None
+        if self.scanning_method != "smart":
+            netbios = asyncio.wrap_future(netbios_resolver.submit(ip))
+
+        hostname = None
+        if ptr_resolver.available():
+            try:
+                hostname = await asyncio.wrap_future(ptr_resolver.submit(ip))
+            except OSError:
+                hostname = None
+        else:
+            async with self._semaphores["hostname"]:
+                hostname = await self._run(get_hostname_dns_only, ip)
+            if hostname == 'Unknown':
+                hostname = None
+
+        fields = {}
+        if netbios:
+            info = await netbios
+            if info:
+                hostname = hostname or info['hostname']
+                if info['workgroup']:
+                    fields['workgroup'] = info['workgroup']
+                if info['mac'] and not _has_mac(self.devices[ip]['mac']):
+                    fields['mac'] = info['mac']
+        self._update(ip, hostname=hostname or 'Unknown', **fields)
+
+    def _merge_multicast_names(self, names):
+        merged = 0
+        for ip, name in names.items():
+            device = self.devices.get(ip)
+            # Only fill gaps; PTR/NetBIOS answers and cached delta results stay as they are
+            if device and device.get('hostname') in ('Unknown', None):
+                self._update(ip, hostname=name)
+                if _has_mac(device.get('mac')):
+                    enrichment_cache.put(device['mac'], "hostname", name)
+                merged += 1
+        if names:
+            print(f"\033[94m[DEBUG] mDNS/LLMNR named {merged} additional devices.\033[0m")
+
+    async def _vendor_stage(self, ip):
+        oui_dict = await self._oui_future
+        vendor = get_vendor(self.devices[ip]['mac'], oui_dict)
+        # An earlier OS stage may already have pinned the vendor to Microsoft
+        if self.devices[ip].get('vendor') != 'Microsoft':
+            self._update(ip, vendor=vendor)
+
+    async def _os_stage(self, ip):
+        # Devices the passive sniffer has already fingerprinted cost nothing to probe
+        os_info = passive_os.lookup(self.devices[ip]['mac'])
+        if not os_info or os_info['confidence'] != 'high':
+            future = self._loop.create_future()
+            self._os_batch[ip] = (self.devices[ip].get('ttl'), future)
+            if self._os_flush is None:
+                self._os_flush = self._loop.call_later(OS_BATCH_WINDOW, self._flush_os_batch)
+            os_info = await future or os_info
+        if not os_info:
+            return
+        fields = {
+            'os': os_info['os'],
+            'os_confidence': os_info['confidence'],
+            'os_method': os_info.get('method', 'unknown')
+        }
+        # Override vendor to Microsoft if Windows detected with high/medium confidence
+        if 'Windows' in os_info['os'] and os_info['confidence'] in ['high', 'medium']:
+            fields['vendor'] = 'Microsoft'
+        self._update(ip, **fields)
+
+    def _flush_os_batch(self):
+        batch, self._os_batch = self._os_batch, {}
+        self._os_flush = None
+        task = self._loop.create_task(self._run_os_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_os_batch(self, batch):
+        results = {}
+        try:
+            async with self._semaphores["os"]:
+                results = await self._run(detect_os_batch, {ip: ttl for ip, (ttl, _) in batch.items()})
+        except Exception as e:
+            print(f"\033[93m[WARN] OS fingerprinting failed for {len(batch)} hosts: {e}\033[0m")
+        for ip, (_, future) in batch.items():
+            if not future.done():
+                future.set_result(results.get(ip))
+
+    def _report_timing(self, method):
+        remember(self.subnet, self.timing)
+        self.timing_summary = dict(self.timing.snapshot(), method=method, subnet=str(self.subnet))
+        if self.interface:
+            self.timing_summary['interface'] = self.interface
+        print(f"\033[94m[DEBUG] Sweep timing: {self.timing_summary}\033[0m")
+        self._emit("timing", dict(self.timing_summary))
+
+    # --- entry point ---
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._semaphores = {name: asyncio.Semaphore(limit) for name, limit in self.stage_limits.items()}
+        workers = sum(self.stage_limits.values()) + 2
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan")
+        try:
+            if self.scan_vendor:
+                # Load OUI data while discovery is still running
+                self._oui_future = self._loop.run_in_executor(self._executor, load_oui_data)
+
+            def found(ip, mac=None, sweep=None):
+                self._loop.call_soon_threadsafe(self._on_found, ip, mac, sweep)
+
+            def progress(probed):
+                self._loop.call_soon_threadsafe(self._on_progress, probed)
+
+            method = await self._loop.run_in_executor(self._executor, self._discover, found, progress)
+            # Let the callbacks scheduled by the discovery thread land before waiting
+            await asyncio.sleep(0)
+            self._report_timing(method)
+
+            multicast = None
+            if self.scan_hostname and self.scan_vendor and self.devices:
+                # Full scans: one mDNS + LLMNR burst for every host, overlapping the enrichment tail
+                multicast = self._loop.run_in_executor(self._executor, multicast_lookup, list(self.devices))
+
+            while self._tasks:
+                await asyncio.gather(*list(self._tasks))
+
+            if multicast:
+                self._merge_multicast_names(await multicast)
+        finally:
+            self._executor.shutdown(wait=False)
+            enrichment_cache.save()
+
+        if self.cache_hits:
+            print(f"\033[94m[DEBUG] Enrichment cache: skipped probing {self.cache_hits}/{len(self.devices)} devices.\033[0m")
+        if self.previous:
+            print(f"\033[94m[DEBUG] Delta scan: reused enrichment for {self.reused}/{len(self.devices)} devices.\033[0m")
+
+        # Sort results by IP address, pushing the router last
+        return sorted(
+            self.devices.values(),
+            key=lambda d: _ip_key(d['ip']) if d['ip'] != self.gateway else (255, 255, 255, 255)
+        )
+
+
+def run_scan(subnet, **kwargs):
+    return asyncio.run(ScanPipeline(subnet, **kwargs).run())
+
+
+async def _run_pipelines(pipelines, gateway):
+    merged = {}
+    for devices in await asyncio.gather(*(pipeline.run() for pipeline in pipelines)):
+        for device in devices:
+            # Overlapping subnets: the first interface to report an address keeps it
+            merged.setdefault(device['ip'], device)
+    return sorted(
+        merged.values(),
+        key=lambda d: _ip_key(d['ip']) if d['ip'] != gateway else (255, 255, 255, 255)
+    )
+
+
+def run_scans(targets, on_event=None, **kwargs):
+    """
+    Scans several subnets at once, e.g. wired, Wi-Fi and VPN. `targets` is a
+    list of (subnet, interface, source address); each gets its own pipeline
+    (and pacing) bound to its interface, all running in one event loop, so the
+    scan takes as long as the slowest subnet. Progress events are summed over
+    all subnets; results are merged and tagged with their interface.
+    """
+    probed = {}
+    total = sum(host_count(subnet) for subnet, _, _ in targets)
+
+    def relay(subnet):
+        def forward(kind, data):
+            if on_event is None:
+                return
+            if kind == "progress" and len(targets) > 1:
+                probed[subnet] = data["probed"]
+                data = {"probed": sum(probed.values()), "total": total}
+            on_event(kind, data)
+        return forward
+
+    pipelines = [
+        ScanPipeline(subnet, interface=interface, source=source, on_event=relay(subnet), **kwargs)
+        for subnet, interface, source in targets
+    ]
+    return asyncio.run(_run_pipelines(pipelines, kwargs.get('gateway')))
@@ -0,0 +1,289 @@
+import errno
+import selectors
+import socket
+import threading
+import time
+
+from src.osprobe import _CONNECTED, _IN_PROGRESS
+
+# TCP ports by how often they are found open (nmap-services frequencies), most common first,
+# followed by LAN services and game servers this tool is usually pointed at
+TOP_PORTS = (
+    80, 23, 443, 21, 22, 25, 3389, 110, 445, 139, 143, 53, 135, 3306, 8080, 1723, 111, 995, 993, 5900,
+    1025, 587, 8888, 199, 1720, 465, 548, 113, 81, 6001, 10000, 514, 5060, 179, 1026, 2000, 8443, 8000,
+    32768, 554, 26, 1433, 49152, 2001, 515, 8008, 49154, 1027, 5666, 646, 5000, 5631, 631, 49153, 8081,
+    2049, 88, 79, 5800, 106, 2121, 1110, 49155, 6000, 513, 990, 5357, 427, 49156, 543, 544, 5101, 144,
+    7, 389, 8009, 3128, 444, 9999, 5009, 7070, 5190, 3000, 5432, 1900, 3986, 13, 1029, 9, 5051, 6646,
+    49157, 1028, 873, 1755, 2717, 4899, 9100, 119, 37, 62078, 1883, 8123, 32400, 5353, 9090, 7547,
+    8291, 19132, 25565, 27015
+)
+# What the monitor has always scanned: every well-known port plus a few LAN services and game servers
+COMMON_PORTS = tuple(sorted(set(range(1, 1025)) | {1433, 2049, 5900, 19132, 25565, 27015}))
+
+_REFUSED = (errno.ECONNREFUSED, getattr(errno, 'WSAECONNREFUSED', 10061))
+# Out of descriptors or ephemeral ports: wait for in-flight connects to free some
+_EXHAUSTED = (errno.EMFILE, errno.ENFILE, errno.ENOBUFS, errno.EADDRNOTAVAIL, getattr(errno, 'WSAENOBUFS', 10055))
+# Lower bound of the per-host connect timeout once the host's round-trip time is known
+MIN_TIMEOUT = 0.1
+
+
+def parse_ports(spec):
+    """
+    Port list for a scan request, in scan order:
+      "common" (default)  the well-known ports plus COMMON_PORTS' extras
+      "all"               1-65535
+      "top:N"             the N ports most often found open, most likely first
+      "22,80,8000-8100"   any mix of single ports and ranges
+    Raises ValueError for anything else.
+    """
+    spec = (spec or "common").strip().lower()
+    if spec == "common":
+        return list(COMMON_PORTS)
+    if spec == "all":
+        return list(range(1, 65536))
+    if spec.startswith("top"):
+        count = int(spec[3:].lstrip(":") or 100)
+        if not 1 <= count <= 65535:
+            raise ValueError(f"top port count out of range: {count}")
+        ports = list(dict.fromkeys(TOP_PORTS))
+        if count > len(ports):
+            listed = set(ports)
+            ports.extend(port for port in range(1, 65536) if port not in listed)
+        return ports[:count]
+
+    ports = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        low, high = int(first), int(last or first)
+        if not 1 <= low <= high <= 65535:
+            raise ValueError(f"invalid port range: {part}")
+        ports.update(range(low, high + 1))
+    if not ports:
+        raise ValueError("no ports given")
+    return sorted(ports)
+
+
+class PortScanJob:
+    """One host's scan inside the shared PortScanner; `done` is set once every port has an answer or timed out."""
+
+    def __init__(self, ip, ports, on_open, timeout):
+        self.ip = ip
+        self.ports = ports
+        self.on_open = on_open
+        self.timeout = timeout
+        self.base_timeout = timeout
+        self.open = []
+        self.index = 0
+        self.in_flight = 0
+        self.rtt = 0.0
+        self.error = None
+        self.started = time.monotonic()
+        self.done = threading.Event()
+
+    def _answered(self, rtt):
+        # Open and refused ports both prove how fast the host answers; silent (filtered) ports
+        # then only wait a few round trips instead of the full timeout
+        self.rtt = max(self.rtt, rtt)
+        self.timeout = min(self.base_timeout, max(MIN_TIMEOUT, self.rtt * 4))
+
+    def _found(self, port):
+        self.open.append(port)
+        if self.on_open:
+            try:
+                self.on_open(port)
+            except Exception:
+                pass
+
+
+class PortScanner:
+    """
+    Non-blocking TCP connect scanner shared by every port scan in the
+    process. One daemon thread multiplexes all connects through a single
+    selector, so the thread count stays constant however many ports or
+    concurrent requests there are.
+
+    At most `max_sockets` connects are in flight across all jobs, split
+    evenly between the hosts being scanned, and each host gets at most
+    `host_rate` new connects per second. Open ports are reported through the
+    job's `on_open` callback as soon as they answer.
+    """
+
+    def __init__(self, max_sockets=512, host_rate=20000, timeout=0.5):
+        self.max_sockets = max_sockets
+        self.host_rate = host_rate
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.connects = 0
+        self._jobs = []
+        self._buckets = {}  # ip -> [tokens, last refill], shared by every job on that host
+        self._wake = threading.Event()
+        self._thread = None
+
+    def configure(self, max_sockets=None, host_rate=None, timeout=None):
+        with self.lock:
+            if max_sockets is not None:
+                self.max_sockets = max(1, max_sockets)
+            if host_rate is not None:
+                self.host_rate = max(1, host_rate)
+            if timeout is not None:
+                self.timeout = max(MIN_TIMEOUT, timeout)
+
+    # --- jobs ---
+
+    def submit(self, ip, ports, on_open=None, timeout=None):
+        """Queues a scan of `ports` on `ip` and returns its PortScanJob straight away."""
+        job = PortScanJob(ip, list(ports), on_open, timeout or self.timeout)
+        with self.lock:
+            self._jobs.append(job)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True, name="port-scanner")
+                self._thread.start()
+        self._wake.set()
+        return job
+
+    def scan(self, ip, ports, on_open=None, timeout=None):
+        """Blocking scan; returns the sorted open ports."""
+        job = self.submit(ip, ports, on_open, timeout)
+        job.done.wait()
+        if job.error:
+            raise job.error
+        return sorted(job.open)
+
+    def _take(self, ip, wanted):
+        # Caller holds the lock. Token bucket refilled at `host_rate` per second, holding a tenth of a second's worth.
+        now = time.monotonic()
+        capacity = max(1.0, self.host_rate / 10)
+        bucket = self._buckets.setdefault(ip, [capacity, now])
+        bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * self.host_rate)
+        bucket[1] = now
+        granted = min(wanted, int(bucket[0]))
+        bucket[0] -= granted
+        return granted
+
+    def _finish(self, job, error=None):
+        job.error = error
+        with self.lock:
+            if job in self._jobs:
+                self._jobs.remove(job)
+            if not any(other.ip == job.ip for other in self._jobs):
+                self._buckets.pop(job.ip, None)
+        job.done.set()
+
+    # --- scanner thread ---
+
+    def _run(self):
+        selector = selectors.DefaultSelector()
+        try:
+            while True:
+                with self.lock:
+                    jobs = list(self._jobs)
+                if not jobs:
+                    self._wake.wait()
+                    self._wake.clear()
+                    continue
+                try:
+                    self._step(selector, jobs)
+                except Exception as e:
+                    print(f"\033[93m[WARN] Port scanner error: {e}\033[0m")
+                    for key in list(selector.get_map().values()):
+                        selector.unregister(key.fileobj)
+                        key.fileobj.close()
+                    for job in jobs:
+                        self._finish(job, e)
+        finally:
+            selector.close()
+
+    def _step(self, selector, jobs):
+        waiting = self._fill(selector, jobs)
+        in_flight = len(selector.get_map())
+
+        # Short waits while ports are still queued, so new jobs and refilled tokens are picked up promptly
+        wait = 0.01 if waiting else 0.05
+        if in_flight:
+            for key, _ in selector.select(wait):
+                job, port, started = key.data
+                error = key.fileobj.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if error == 0:
+                    job._found(port)
+                if error == 0 or error in _REFUSED:
+                    job._answered(time.monotonic() - started)
+                self._close(selector, key)
+        else:
+            # Nothing registered (selecting on an empty set fails on Windows); wait for tokens or a new job
+            self._wake.wait(wait)
+            self._wake.clear()
+
+        now = time.monotonic()
+        for key in list(selector.get_map().values()):
+            job, _, started = key.data
+            if now - started >= job.timeout:
+                self._close(selector, key)
+
+        for job in jobs:
+            if job.index >= len(job.ports) and not job.in_flight:
+                self._finish(job)
+
+    def _fill(self, selector, jobs):
+        """Starts as many connects as the socket cap and host rates allow; True if ports are left waiting."""
+        waiting = False
+        pending = [job for job in jobs if job.index < len(job.ports)]
+        while pending:
+            free = self.max_sockets - len(selector.get_map())
+            if free <= 0:
+                return True
+            share = max(1, free // len(pending))
+            progressed = False
+            for job in pending:
+                with self.lock:
+                    count = self._take(job.ip, min(share, len(job.ports) - job.index))
+                for _ in range(count):
+                    if not self._connect(selector, job):
+                        return True
+                progressed = progressed or count > 0
+            pending = [job for job in pending if job.index < len(job.ports)]
+            if not progressed:
+                waiting = bool(pending)
+                break
+        return waiting
+
+    def _connect(self, selector, job):
+        port = job.ports[job.index]
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        except OSError as e:
+            if e.errno in _EXHAUSTED and selector.get_map():
+                return False
+            raise
+        job.index += 1
+        self.connects += 1
+        sock.setblocking(False)
+        try:
+            code = sock.connect_ex((job.ip, port))
+        except OSError:
+            sock.close()
+            return True
+        if code in _CONNECTED:
+            job._found(port)
+            sock.close()
+        elif code in _IN_PROGRESS:
+            selector.register(sock, selectors.EVENT_WRITE, (job, port, time.monotonic()))
+            job.in_flight += 1
+        elif code in _EXHAUSTED and selector.get_map():
+            # Retry this port once in-flight connects have released their resources
+            sock.close()
+            job.index -= 1
+            return False
+        else:
+            sock.close()
+        return True
+
+    def _close(self, selector, key):
+        selector.unregister(key.fileobj)
+        key.fileobj.close()
+        key.data[0].in_flight -= 1
+
+
+port_scanner = PortScanner()
@@ -0,0 +1,345 @@
+import concurrent.futures
+import errno
+import queue
+import random
+import socket
+import threading
+import time
+
+from src.icmp import icmp_sweep, icmp_available
+from src.ping import arp_probe, iface_for_ip, ping_probe
+from src.passive_hosts import passive_hosts
+from src.neighbor_watch import neighbor_watcher
+
+# Probe kinds, cheapest first. Unicast ARP never leaves the segment and is
+# answered even by hosts that drop ICMP; a TCP connect to a port the host was
+# seen listening on is the fallback for everything else.
+ARP, ICMP, TCP = "arp", "icmp", "tcp"
+# Evidence gathered without sending anything (passive capture, neighbour watcher)
+HEARD = "heard"
+
+# A device is declared offline after this many rounds in which every probe kind failed
+OFFLINE_AFTER = 2
+# Refused connections also prove the host is up
+_REFUSED = {errno.ECONNREFUSED, getattr(errno, 'WSAECONNREFUSED', 10061)}
+
+
+def _tcp_alive(ip, port, timeout):
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.settimeout(timeout)
+            return s.connect_ex((ip, port)) in (0, *_REFUSED)
+    except OSError:
+        return False
+
+
+class PresenceTracker:
+    """
+    Keeps every known device under low-rate liveness checks instead of
+    re-sweeping the subnet. Each device has its own heartbeat interval: it
+    stretches by half after every check that confirms the current state (up
+    to `max_interval`) and drops to `min_interval` whenever the state flips,
+    so stable hosts are barely touched while flapping ones are followed
+    closely.
+
+    Each check uses the cheapest probe that last worked for the host and only
+    escalates (ARP -> ICMP -> known-open TCP port) when it fails. Traffic the
+    host sent on its own (passive capture, neighbour table) counts as a free
+    check. All probes, retries included, share one budget of `budget` probes
+    per second; devices that do not fit wait for the next round, most overdue
+    first.
+    """
+
+    def __init__(self, budget=20, min_interval=5, base_interval=30, max_interval=300, probe_timeout=1.0):
+        self.budget = budget
+        self.min_interval = min_interval
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.probe_timeout = probe_timeout
+        self.lock = threading.Lock()
+        self.devices = {}  # ip -> state, see track()
+        self.active = False
+        self.probes_sent = 0
+        self._tokens = float(budget)
+        self._refilled = time.monotonic()
+        self._subscribers = []
+        self._wake = threading.Event()
+        self._thread = None
+
+    # --- device set ---
+
+    def track(self, ip, mac=None, online=None):
+        """Adds or refreshes a device; `online=True` records that something just saw it."""
+        now = time.time()
+        on_link = iface_for_ip(ip) is not None if ip not in self.devices else None
+        with self.lock:
+            device = self.devices.get(ip)
+            if device is None:
+                device = self.devices[ip] = {
+                    'ip': ip, 'mac': None, 'ports': [], 'on_link': bool(on_link),
+                    'online': None, 'method': None,
+                    'interval': self.base_interval, 'next_due': time.monotonic(),
+                    'last_checked': None, 'last_seen': None, 'changed_at': now,
+                    'rtt_ms': None, 'flaps': 0, 'misses': 0, 'probes': 0, 'tried': []
+                }
+            if mac and mac not in ('Unknown', 'Skipped'):
+                device['mac'] = mac.lower()
+            if online:
+                device['last_seen'] = now
+                if device['online'] is None:
+                    device['online'] = True
+                    device['next_due'] = time.monotonic() + self._spread(device['interval'])
+        self._wake.set()
+
+    def track_results(self, results):
+        """Tracks every device of a scan result list (the local host excluded)."""
+        for result in results:
+            # IPv6-only devices are left out: every probe kind here is IPv4
+            if result.get('ip') and not result.get('is_local') and not result.get('ipv6_only'):
+                self.track(result['ip'], result.get('mac'), online=True)
+
+    def remember_ports(self, ip, ports):
+        """Open TCP ports seen on `ip` (e.g. by a port scan); the first is used as a probe target."""
+        if not ports:
+            return
+        with self.lock:
+            device = self.devices.get(ip)
+            if device is not None:
+                device['ports'] = list(ports)[:4]
+
+    def forget(self, ip):
+        with self.lock:
+            self.devices.pop(ip, None)
+
+    # --- lifecycle ---
+
+    def configure(self, budget=None):
+        with self.lock:
+            if budget is not None:
+                self.budget = max(1, budget)
+                self._tokens = min(self._tokens, float(self.budget))
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            self.active = True
+            return True
+        self.active = True
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="presence-tracker")
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self.active = False
+        self._wake.set()
+
+    # --- events ---
+
+    def subscribe(self):
+        """Returns a queue that receives every online/offline change from now on."""
+        subscriber = queue.Queue()
+        with self.lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def _emit(self, device):
+        # Caller holds the lock
+        payload = {
+            "event": "online" if device['online'] else "offline",
+            "ip": device['ip'],
+            "mac": device['mac'],
+            "method": device['method'],
+            "rtt_ms": device['rtt_ms'],
+            "time": device['changed_at']
+        }
+        for subscriber in self._subscribers:
+            subscriber.put(payload)
+
+    # --- scheduling ---
+
+    def _spread(self, interval):
+        # +/-10% so devices found by the same scan do not stay in lockstep
+        return interval * random.uniform(0.9, 1.1)
+
+    def _methods(self, device):
+        # Caller holds the lock. Probe kinds usable for this host, the one that last worked first.
+        methods = []
+        if device['mac'] and device['on_link']:
+            methods.append(ARP)
+        methods.append(ICMP)
+        if device['ports']:
+            methods.append(TCP)
+        if device['method'] in methods:
+            methods.remove(device['method'])
+            methods.insert(0, device['method'])
+        return methods
+
+    def _take(self, wanted):
+        # Caller holds the lock. Token bucket refilled at `budget` per second, holding at most one second's worth.
+        now = time.monotonic()
+        self._tokens = min(float(self.budget), self._tokens + (now - self._refilled) * self.budget)
+        self._refilled = now
+        granted = min(wanted, int(self._tokens))
+        self._tokens -= granted
+        return granted
+
+    def _heard(self, device):
+        # Something the host sent by itself since the last check makes probing it pointless
+        since = device['last_checked'] or 0
+        if (passive_hosts.last_seen(device['ip']) or 0) > since:
+            return True
+        return bool(device['mac'] and neighbor_watcher.active
+                    and (neighbor_watcher.last_seen(device['mac']) or 0) > since)
+
+    def _loop(self):
+        while self.active:
+            now = time.monotonic()
+            with self.lock:
+                due = sorted((d for d in self.devices.values() if d['next_due'] <= now), key=lambda d: d['next_due'])
+            free = [d for d in due if self._heard(d)]
+            for device in free:
+                self._record(device, True, HEARD, None)
+            due = [d for d in due if d not in free]
+
+            with self.lock:
+                batch = due[:self._take(len(due))]
+                plan = {}
+                for device in batch:
+                    methods = [m for m in self._methods(device) if m not in device['tried']] or self._methods(device)
+                    plan[device['ip']] = methods[0]
+                    device['tried'].append(methods[0])
+                    device['probes'] += 1
+                self.probes_sent += len(plan)
+            if plan:
+                self._probe(plan)
+
+            with self.lock:
+                upcoming = [d['next_due'] for d in self.devices.values()]
+            wait = 1.0
+            if upcoming:
+                wait = max(0.05, min(wait, min(upcoming) - time.monotonic()))
+            if due and not batch:
+                wait = min(wait, 1.0 / max(1, self.budget))
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    # --- probing ---
+
+    def _probe(self, plan):
+        groups = {ARP: {}, ICMP: [], TCP: {}}
+        with self.lock:
+            for ip, method in plan.items():
+                device = self.devices.get(ip)
+                if device is None:
+                    continue
+                if method == ARP:
+                    groups[ARP][ip] = device['mac']
+                elif method == TCP:
+                    groups[TCP][ip] = device['ports'][0]
+                else:
+                    groups[ICMP].append(ip)
+
+        answers = {}  # ip -> rtt in ms (None when the probe kind has no RTT)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+            futures = []
+            if groups[ARP]:
+                futures.append(executor.submit(self._probe_arp, groups[ARP]))
+            if groups[ICMP]:
+                futures.append(executor.submit(self._probe_icmp, groups[ICMP]))
+            if groups[TCP]:
+                futures.append(executor.submit(self._probe_tcp, groups[TCP]))
+            for future in futures:
+                try:
+                    answers.update(future.result())
+                except Exception as e:
+                    print(f"\033[93m[WARN] Presence probe failed: {e}\033[0m")
+
+        with self.lock:
+            devices = [self.devices[ip] for ip in plan if ip in self.devices]
+        for device in devices:
+            self._record(device, device['ip'] in answers, plan[device['ip']], answers.get(device['ip']))
+
+    def _probe_arp(self, ip_macs):
+        answered = arp_probe(ip_macs, timeout=self.probe_timeout)
+        if answered is None:
+            # No scapy/Npcap: fall back to ICMP for this round
+            return self._probe_icmp(list(ip_macs))
+        return {ip: None for ip in answered}
+
+    def _probe_icmp(self, ips):
+        if icmp_available():
+            try:
+                return {ip: info['rtt'] for ip, info in icmp_sweep(ips, timeout=self.probe_timeout, retries=0).items()}
+            except OSError:
+                pass
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(32, len(ips))) as executor:
+            replies = executor.map(lambda ip: ping_probe(ip, self.probe_timeout), ips)
+            return {ip: rtt * 1000 if rtt is not None else None for ip, ok, rtt in replies if ok}
+
+    def _probe_tcp(self, ip_ports):
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(32, len(ip_ports))) as executor:
+            alive = executor.map(lambda item: (item[0], _tcp_alive(item[0], item[1], self.probe_timeout)),
+                                 ip_ports.items())
+            return {ip: None for ip, ok in alive if ok}
+
+    def _record(self, device, alive, method, rtt_ms):
+        now = time.time()
+        with self.lock:
+            device['last_checked'] = now
+            if alive:
+                device['tried'] = []
+                device['misses'] = 0
+                device['last_seen'] = now
+                if method != HEARD:
+                    device['method'] = method
+                if rtt_ms is not None:
+                    device['rtt_ms'] = round(rtt_ms, 2)
+            elif len(device['tried']) < len(self._methods(device)):
+                # Try the next probe kind straight away before counting a miss
+                device['next_due'] = time.monotonic()
+                return
+            else:
+                device['tried'] = []
+                device['misses'] += 1
+                if device['online'] and device['misses'] < OFFLINE_AFTER:
+                    device['next_due'] = time.monotonic() + self.min_interval
+                    return
+
+            if device['online'] is None or device['online'] == alive:
+                device['interval'] = min(self.max_interval, device['interval'] * 1.5)
+            else:
+                device['flaps'] += 1
+                device['interval'] = self.min_interval
+            if device['online'] != alive:
+                device['online'] = alive
+                device['changed_at'] = now
+                self._emit(device)
+            device['next_due'] = time.monotonic() + self._spread(device['interval'])
+
+    # --- queries ---
+
+    def snapshot(self):
+        with self.lock:
+            devices = [
+                {key: value for key, value in device.items() if key not in ('next_due', 'tried')}
+                for device in self.devices.values()
+            ]
+        return sorted(devices, key=lambda d: tuple(int(part) for part in d['ip'].split('.')))
+
+    def stats(self):
+        with self.lock:
+            online = sum(1 for d in self.devices.values() if d['online'])
+            return {
+                "active": self.active,
+                "devices": len(self.devices),
+                "online": online,
+                "budget": self.budget,
+                "probes_sent": self.probes_sent
+            }
+
+
+presence_tracker = PresenceTracker()
@@ -0,0 +1,304 @@
+import socket
+import struct
+import select
+import platform
+import threading
+import time
+import random
+import concurrent.futures
+
+_TYPE_PTR = 12
+_CLASS_IN = 1
+_RCODE_NXDOMAIN = 3
+
+_HEADER = struct.Struct('!HHHHHH')  # id, flags, qdcount, ancount, nscount, arcount
+
+
+def _reverse_name(ip):
+    addr = socket.inet_pton(socket.AF_INET6, ip) if ':' in ip else socket.inet_aton(ip)
+    if len(addr) == 4:
+        return '.'.join(str(b) for b in reversed(addr)) + '.in-addr.arpa'
+    nibbles = addr.hex()
+    return '.'.join(reversed(nibbles)) + '.ip6.arpa'
+
+
+def _encode_name(name):
+    out = b''
+    for label in name.rstrip('.').split('.'):
+        out += bytes([len(label)]) + label.encode('ascii')
+    return out + b'\x00'
+
+
+def build_ptr_query(txid, ip):
+    return _HEADER.pack(txid, 0x0100, 1, 0, 0, 0) + _encode_name(_reverse_name(ip)) + struct.pack('!HH', _TYPE_PTR, _CLASS_IN)
+
+
+def _read_name(data, offset):
+    """Decodes a (possibly compressed) domain name; returns (name, offset after it)."""
+    labels = []
+    end = None
+    jumps = 0
+    while True:
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            jumps += 1
+            if jumps > 32:
+                raise ValueError("DNS name compression loop")
+            continue
+        offset += 1
+        if length == 0:
+            break
+        labels.append(data[offset:offset + length].decode('ascii', errors='replace'))
+        offset += length
+    return '.'.join(labels), (end if end is not None else offset)
+
+
+def parse_ptr_response(data):
+    """Returns (txid, qname, rcode, hostname or None, ttl or None) for a PTR response."""
+    txid, flags, qdcount, ancount, _, _ = _HEADER.unpack_from(data, 0)
+    rcode = flags & 0x000F
+    offset = _HEADER.size
+    qname = None
+    for _ in range(qdcount):
+        qname, offset = _read_name(data, offset)
+        offset += 4
+    for _ in range(ancount):
+        _, offset = _read_name(data, offset)
+        rtype, _, ttl, rdlength = struct.unpack_from('!HHIH', data, offset)
+        offset += 10
+        if rtype == _TYPE_PTR:
+            hostname, _ = _read_name(data, offset)
+            return txid, qname, rcode, hostname, ttl
+        offset += rdlength
+    return txid, qname, rcode, None, None
+
+
+def read_nameservers():
+    """Returns the system's configured IPv4 nameservers (resolv.conf or the Windows registry)."""
+    servers = []
+    if platform.system() == 'Windows':
+        try:
+            import winreg
+            key_path = r"SYSTEM\CurrentControlSet\Services\Tcpip\Parameters"
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path) as key:
+                keys = [key]
+                with winreg.OpenKey(key, "Interfaces") as interfaces:
+                    index = 0
+                    while True:
+                        try:
+                            name = winreg.EnumKey(interfaces, index)
+                        except OSError:
+                            break
+                        index += 1
+                        for value_name in ("NameServer", "DhcpNameServer"):
+                            try:
+                                with winreg.OpenKey(interfaces, name) as sub:
+                                    value = winreg.QueryValueEx(sub, value_name)[0]
+                            except OSError:
+                                continue
+                            servers.extend(value.replace(',', ' ').split())
+                for value_name in ("NameServer", "DhcpNameServer"):
+                    try:
+                        servers.extend(winreg.QueryValueEx(keys[0], value_name)[0].replace(',', ' ').split())
+                    except OSError:
+                        pass
+        except Exception:
+            pass
+    else:
+        try:
+            with open('/etc/resolv.conf') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) >= 2 and parts[0] == 'nameserver':
+                        servers.append(parts[1])
+        except OSError:
+            pass
+
+    valid = []
+    for server in servers:
+        try:
+            socket.inet_aton(server)
+        except OSError:
+            continue
+        if server not in valid:
+            valid.append(server)
+    return valid
+
+
+class PtrResolver:
+    """
+    Reverse-DNS resolver that pipelines every PTR query through one UDP socket.
+    Queries are sent as soon as they are submitted and matched to responses by
+    transaction ID, so many lookups share one round-trip window instead of each
+    holding a thread for the OS resolver timeout. Answers are cached for their
+    record TTL (capped at `max_ttl`); NXDOMAIN/no-PTR answers for `negative_ttl`.
+    """
+
+    def __init__(self, nameservers=None, timeout=1.0, retries=1, max_ttl=3600, negative_ttl=300):
+        # Entries may be "ip" or (ip, port), which lets tests point at a stub server
+        self._configured = nameservers
+        self.timeout = timeout
+        self.retries = retries
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.lock = threading.Lock()
+        self._cache = {}        # ip -> (hostname or None, expires_at)
+        self._outstanding = {}  # txid -> query state
+        self._waiting = {}      # ip -> future shared by concurrent callers
+        self._sock = None
+        self._reader = None
+        self._nameservers = None
+
+    @property
+    def nameservers(self):
+        if self._nameservers is None:
+            configured = self._configured if self._configured is not None else read_nameservers()
+            self._nameservers = [s if isinstance(s, tuple) else (s, 53) for s in configured]
+        return self._nameservers
+
+    def available(self):
+        return bool(self.nameservers)
+
+    def cached(self, ip):
+        """Returns (hit, hostname) from the TTL cache."""
+        with self.lock:
+            entry = self._cache.get(ip)
+            if entry and entry[1] > time.monotonic():
+                return True, entry[0]
+        return False, None
+
+    def submit(self, ip, deadline=None):
+        """
+        Queues a PTR lookup and returns a concurrent.futures.Future resolving to
+        the hostname or None. `deadline` (time.monotonic()) bounds retries.
+        """
+        hit, hostname = self.cached(ip)
+        if hit:
+            future = concurrent.futures.Future()
+            future.set_result(hostname)
+            return future
+        if not self.nameservers:
+            raise OSError("No nameservers configured")
+
+        if deadline is None:
+            deadline = time.monotonic() + self.timeout * (self.retries + 1)
+        with self.lock:
+            future = self._waiting.get(ip)
+            if future:
+                return future
+            future = concurrent.futures.Future()
+            self._waiting[ip] = future
+            self._ensure_reader()
+            self._send(ip, attempt=0, deadline=deadline)
+        return future
+
+    def resolve(self, ip, deadline=None):
+        future = self.submit(ip, deadline=deadline)
+        return future.result()
+
+    def resolve_many(self, ips, deadline=None):
+        """Resolves a batch under one overall deadline; returns {ip: hostname or None}."""
+        if deadline is None:
+            deadline = time.monotonic() + self.timeout * (self.retries + 1)
+        futures = {ip: self.submit(ip, deadline=deadline) for ip in dict.fromkeys(ips)}
+        concurrent.futures.wait(list(futures.values()), timeout=max(0.0, deadline - time.monotonic()) + 0.1)
+        return {ip: (f.result() if f.done() else None) for ip, f in futures.items()}
+
+    # --- socket handling (callers hold self.lock) ---
+
+    def _ensure_reader(self):
+        if self._sock is None:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._sock.setblocking(False)
+        if self._reader is None or not self._reader.is_alive():
+            self._reader = threading.Thread(target=self._read_loop, daemon=True, name="ptr-resolver")
+            self._reader.start()
+
+    def _send(self, ip, attempt, deadline):
+        txid = random.getrandbits(16)
+        while txid in self._outstanding:
+            txid = random.getrandbits(16)
+        server = self.nameservers[attempt % len(self.nameservers)]
+        self._outstanding[txid] = {
+            'ip': ip,
+            'qname': _reverse_name(ip).lower(),
+            'server': server,
+            'attempt': attempt,
+            'expires': min(time.monotonic() + self.timeout, deadline),
+            'deadline': deadline
+        }
+        try:
+            self._sock.sendto(build_ptr_query(txid, ip), server)
+        except OSError:
+            # Let the expiry path retry on the next server
+            self._outstanding[txid]['expires'] = 0
+
+    def _finish(self, ip, hostname, ttl):
+        if ttl is not None:
+            self._cache[ip] = (hostname, time.monotonic() + ttl)
+        future = self._waiting.pop(ip, None)
+        if future and not future.done():
+            future.set_result(hostname)
+
+    def _read_loop(self):
+        idle_since = None
+        while True:
+            with self.lock:
+                sock = self._sock
+                if not self._outstanding:
+                    idle_since = idle_since or time.monotonic()
+                    if time.monotonic() - idle_since > 5:
+                        self._reader = None
+                        return
+                else:
+                    idle_since = None
+            try:
+                readable, _, _ = select.select([sock], [], [], 0.05)
+            except (OSError, ValueError):
+                readable = []
+            while readable:
+                try:
+                    data, addr = sock.recvfrom(4096)
+                except (BlockingIOError, InterruptedError, OSError):
+                    break
+                self._handle(data, addr)
+                readable, _, _ = select.select([sock], [], [], 0)
+            self._expire()
+
+    def _handle(self, data, addr):
+        try:
+            txid, qname, rcode, hostname, ttl = parse_ptr_response(data)
+        except (struct.error, IndexError, ValueError):
+            return
+        with self.lock:
+            query = self._outstanding.get(txid)
+            # Ignore anything that isn't the answer to what we asked that server
+            if not query or addr[0] != query['server'][0] or (qname or '').lower() != query['qname']:
+                return
+            del self._outstanding[txid]
+            if hostname:
+                self._finish(query['ip'], hostname.rstrip('.'), min(ttl, self.max_ttl))
+            elif rcode in (0, _RCODE_NXDOMAIN):
+                self._finish(query['ip'], None, self.negative_ttl)
+            elif query['attempt'] < self.retries and time.monotonic() < query['deadline']:
+                self._send(query['ip'], query['attempt'] + 1, query['deadline'])
+            else:
+                self._finish(query['ip'], None, None)
+
+    def _expire(self):
+        now = time.monotonic()
+        with self.lock:
+            for txid, query in list(self._outstanding.items()):
+                if query['expires'] > now:
+                    continue
+                del self._outstanding[txid]
+                if query['attempt'] < self.retries and now < query['deadline']:
+                    self._send(query['ip'], query['attempt'] + 1, query['deadline'])
+                else:
+                    self._finish(query['ip'], None, None)
+
+
+ptr_resolver = PtrResolver()
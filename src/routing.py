@@ -0,0 +1,297 @@
+import socket
+import struct
+import platform
+import threading
+import time
+import ctypes
+
+from src.neighbors import (
+    _NLMSG_HEADER, _RTATTR, _NLMSG_DONE, _NLMSG_ERROR, _NETLINK_ROUTE,
+    _NLM_F_REQUEST, _NLM_F_DUMP, _align, _SOCKADDR_INET
+)
+
+# rtnetlink route constants (linux/rtnetlink.h)
+_RTM_NEWROUTE = 24
+_RTM_GETROUTE = 26
+_RTA_OIF = 4
+_RTA_GATEWAY = 5
+_RTA_PRIORITY = 6
+_RTA_TABLE = 15
+_RT_TABLE_MAIN = 254
+
+# Multicast groups that signal the default route may have changed
+_RTMGRP_LINK = 0x1
+_RTMGRP_IPV4_IFADDR = 0x10
+_RTMGRP_IPV4_ROUTE = 0x40
+
+_RTMSG = struct.Struct('=BBBBBBBBI')  # family, dst_len, src_len, tos, table, protocol, scope, type, flags
+
+# Any public address works: GetBestRoute2 only consults the table, nothing is sent
+_PROBE_DESTINATION = '1.1.1.1'
+
+
+# --- Linux: rtnetlink route dump ---
+
+def _read_netlink_default():
+    best = None
+    sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, _NETLINK_ROUTE)
+    try:
+        sock.bind((0, 0))
+        seq = int(time.time()) & 0xFFFFFFFF
+        request = _RTMSG.pack(socket.AF_INET, 0, 0, 0, 0, 0, 0, 0, 0)
+        header = _NLMSG_HEADER.pack(_NLMSG_HEADER.size + len(request), _RTM_GETROUTE,
+                                    _NLM_F_REQUEST | _NLM_F_DUMP, seq, 0)
+        sock.sendto(header + request, (0, 0))
+
+        while True:
+            data = sock.recv(65536)
+            offset = 0
+            while offset + _NLMSG_HEADER.size <= len(data):
+                msg_len, msg_type, _, msg_seq, _ = _NLMSG_HEADER.unpack_from(data, offset)
+                if msg_len < _NLMSG_HEADER.size:
+                    return best
+                if msg_seq == seq:
+                    if msg_type == _NLMSG_DONE:
+                        return best
+                    if msg_type == _NLMSG_ERROR:
+                        raise OSError("netlink route dump failed")
+                    if msg_type == _RTM_NEWROUTE:
+                        route = _parse_route(data, offset + _NLMSG_HEADER.size, offset + msg_len)
+                        if route and (best is None or route['metric'] < best['metric']):
+                            best = route
+                offset += _align(msg_len)
+    finally:
+        sock.close()
+
+
+def _parse_route(data, start, end):
+    family, dst_len, _, _, table, _, _, _, _ = _RTMSG.unpack_from(data, start)
+    if family != socket.AF_INET or dst_len != 0:
+        return None
+    gateway = None
+    oif = None
+    metric = 0
+    offset = start + _RTMSG.size
+    while offset + _RTATTR.size <= end:
+        attr_len, attr_type = _RTATTR.unpack_from(data, offset)
+        if attr_len < _RTATTR.size:
+            break
+        value = data[offset + _RTATTR.size:offset + attr_len]
+        if attr_type == _RTA_GATEWAY and len(value) == 4:
+            gateway = socket.inet_ntoa(value)
+        elif attr_type == _RTA_OIF and len(value) == 4:
+            oif = struct.unpack('=I', value)[0]
+        elif attr_type == _RTA_PRIORITY and len(value) == 4:
+            metric = struct.unpack('=I', value)[0]
+        elif attr_type == _RTA_TABLE and len(value) == 4:
+            table = struct.unpack('=I', value)[0]
+        offset += _align(attr_len)
+    if not gateway or table != _RT_TABLE_MAIN:
+        return None
+    return {'gateway': gateway, 'interface': _ifname(oif), 'metric': metric}
+
+
+def _read_proc_default():
+    best = None
+    with open('/proc/net/route') as f:
+        next(f, None)  # header
+        for line in f:
+            parts = line.split()
+            # Iface Destination Gateway Flags RefCnt Use Metric Mask ...
+            if len(parts) < 8 or parts[1] != '00000000' or parts[7] != '00000000':
+                continue
+            gateway = socket.inet_ntoa(struct.pack('<I', int(parts[2], 16)))
+            if gateway == '0.0.0.0':
+                continue
+            metric = int(parts[6])
+            if best is None or metric < best['metric']:
+                best = {'gateway': gateway, 'interface': parts[0], 'metric': metric}
+    return best
+
+
+def _ifname(index):
+    if not index:
+        return None
+    try:
+        return socket.if_indextoname(index)
+    except OSError:
+        return None
+
+
+# --- Windows: iphlpapi GetBestRoute2 / GetIpForwardTable2 ---
+
+class _IP_ADDRESS_PREFIX(ctypes.Structure):
+    _fields_ = [("Prefix", _SOCKADDR_INET), ("PrefixLength", ctypes.c_ubyte)]
+
+
+class _MIB_IPFORWARD_ROW2(ctypes.Structure):
+    _fields_ = [
+        ("InterfaceLuid", ctypes.c_uint64),
+        ("InterfaceIndex", ctypes.c_ulong),
+        ("DestinationPrefix", _IP_ADDRESS_PREFIX),
+        ("NextHop", _SOCKADDR_INET),
+        ("SitePrefixLength", ctypes.c_ubyte),
+        ("ValidLifetime", ctypes.c_ulong),
+        ("PreferredLifetime", ctypes.c_ulong),
+        ("Metric", ctypes.c_ulong),
+        ("Protocol", ctypes.c_int),
+        ("Loopback", ctypes.c_ubyte),
+        ("AutoconfigureAddress", ctypes.c_ubyte),
+        ("Publish", ctypes.c_ubyte),
+        ("Immortal", ctypes.c_ubyte),
+        ("Age", ctypes.c_ulong),
+        ("Origin", ctypes.c_int),
+    ]
+
+
+# Size of MIB_IPFORWARD_ROW2 in netioapi.h; a wrong layout would read every NextHop as non-IPv4 without an error
+_MIB_IPFORWARD_ROW2_SIZE = 104
+if platform.system() == 'Windows' and ctypes.sizeof(_MIB_IPFORWARD_ROW2) != _MIB_IPFORWARD_ROW2_SIZE:
+    raise RuntimeError(f"MIB_IPFORWARD_ROW2 is {ctypes.sizeof(_MIB_IPFORWARD_ROW2)} bytes, "
+                       f"expected {_MIB_IPFORWARD_ROW2_SIZE}")
+
+
+def _row_to_route(row):
+    if row.NextHop.family != socket.AF_INET:
+        return None
+    gateway = socket.inet_ntoa(bytes(row.NextHop.data)[0:4])
+    if gateway == '0.0.0.0':
+        return None
+    return {'gateway': gateway, 'interface': row.InterfaceIndex, 'metric': row.Metric}
+
+
+def _read_best_route2():
+    iphlpapi = ctypes.WinDLL('iphlpapi')
+    destination = _SOCKADDR_INET()
+    destination.family = socket.AF_INET
+    ctypes.memmove(destination.data, socket.inet_aton(_PROBE_DESTINATION), 4)
+    row = _MIB_IPFORWARD_ROW2()
+    source = _SOCKADDR_INET()
+    status = iphlpapi.GetBestRoute2(None, 0, None, ctypes.byref(destination), 0,
+                                    ctypes.byref(row), ctypes.byref(source))
+    if status != 0:
+        raise OSError(f"GetBestRoute2 failed with status {status}")
+    return _row_to_route(row)
+
+
+def _read_forward_table2():
+    iphlpapi = ctypes.WinDLL('iphlpapi')
+    table_ptr = ctypes.c_void_p()
+    status = iphlpapi.GetIpForwardTable2(socket.AF_INET, ctypes.byref(table_ptr))
+    if status != 0:
+        raise OSError(f"GetIpForwardTable2 failed with status {status}")
+    best = None
+    try:
+        count = ctypes.c_ulong.from_address(table_ptr.value).value
+        rows = (_MIB_IPFORWARD_ROW2 * count).from_address(table_ptr.value + 8)
+        for row in rows:
+            if row.DestinationPrefix.PrefixLength != 0:
+                continue
+            route = _row_to_route(row)
+            if route and (best is None or route['metric'] < best['metric']):
+                best = route
+    finally:
+        iphlpapi.FreeMibTable(table_ptr)
+    return best
+
+
+def _readers():
+    system = platform.system()
+    if system == 'Windows':
+        return [_read_best_route2, _read_forward_table2]
+    if system == 'Linux':
+        return [_read_netlink_default, _read_proc_default]
+    return []
+
+
+# --- change notification ---
+
+def _watch_netlink(on_change):
+    sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, _NETLINK_ROUTE)
+    sock.bind((0, _RTMGRP_LINK | _RTMGRP_IPV4_IFADDR | _RTMGRP_IPV4_ROUTE))
+    try:
+        while True:
+            sock.recv(65536)
+            on_change()
+    finally:
+        sock.close()
+
+
+def _watch_iphlpapi(on_change):
+    iphlpapi = ctypes.WinDLL('iphlpapi')
+    while True:
+        # With both arguments NULL the call blocks until the next route change
+        status = iphlpapi.NotifyRouteChange(None, None)
+        if status != 0:
+            raise OSError(f"NotifyRouteChange failed with status {status}")
+        on_change()
+
+
+class RouteTable:
+    """
+    Cached default route read straight from the kernel. The cached entry is
+    dropped whenever the OS reports a route/address change; platforms without
+    change notifications fall back to re-reading every `ttl` seconds.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self._route = None
+        self._loaded_at = None
+        self._watcher = None
+        self._watching = False
+
+    def _start_watcher(self):
+        system = platform.system()
+        watch = {'Linux': _watch_netlink, 'Windows': _watch_iphlpapi}.get(system)
+        if not watch or self._watcher:
+            return
+
+        def run():
+            try:
+                watch(self.invalidate)
+            except Exception as e:
+                print(f"\033[93m[WARN] Route change watcher stopped: {e}\033[0m")
+            self._watching = False
+
+        self._watching = True
+        self._watcher = threading.Thread(target=run, daemon=True, name="route-watcher")
+        self._watcher.start()
+
+    def _stale(self):
+        if self._loaded_at is None:
+            return True
+        # Notifications keep the entry fresh; the TTL is only a safety net without them
+        return time.monotonic() - self._loaded_at > (self.ttl if self._watching else min(self.ttl, 30))
+
+    def default_route(self):
+        """Returns {'gateway', 'interface', 'metric'} for the preferred IPv4 default route, or None."""
+        with self.lock:
+            if not self._stale():
+                return self._route
+            self._start_watcher()
+            route = None
+            for reader in _readers():
+                try:
+                    route = reader()
+                except Exception:
+                    continue
+                if route:
+                    break
+            if route and route != self._route:
+                print(f"\033[94m[DEBUG] Default route: {route['gateway']} via {route['interface']}\033[0m")
+            self._route = route
+            self._loaded_at = time.monotonic()
+            return route
+
+    def default_gateway(self):
+        route = self.default_route()
+        return route['gateway'] if route else None
+
+    def invalidate(self):
+        with self.lock:
+            self._loaded_at = None
+
+
+route_table = RouteTable()
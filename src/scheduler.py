@@ -0,0 +1,146 @@
+import random
+import threading
+import time
+
+# No client request for this long counts as idle; each further idle period doubles the interval
+IDLE_AFTER = 15 * 60
+MAX_BACKOFF = 8
+# With nothing cached yet, the first scans run shortly after startup (basic first)
+STARTUP_DELAY = {"basic": 5, "full": 30}
+
+
+class ScanScheduler:
+    """
+    Runs basic scans every `basic_interval` seconds and full scans every
+    `full_interval` seconds in a background thread, each delay stretched by up
+    to +/- `jitter` and backed off while nobody is using the app. The latest
+    result set of each kind is kept in memory so routes can answer instantly;
+    manual scans feed the same store through `store()`.
+
+    `run_scan(kind)` is supplied by the server and returns the result list.
+    """
+
+    def __init__(self, run_scan, basic_interval=300, full_interval=3600, jitter=0.1):
+        self.run_scan = run_scan
+        self.basic_interval = basic_interval
+        self.full_interval = full_interval
+        self.jitter = jitter
+        self.lock = threading.Lock()
+        self.latest = {}  # kind -> {'results', 'finished_at', 'duration', 'source'}
+        self.enabled = False
+        self.last_request = time.time()
+        self._next_run = {}
+        self._wake = threading.Event()
+        self._thread = None
+
+    # --- result store ---
+
+    def store(self, kind, results, duration=None, source="manual"):
+        with self.lock:
+            self.latest[kind] = {
+                'results': results,
+                'finished_at': time.time(),
+                'duration': duration,
+                'source': source
+            }
+            # Re-plan from this result so a manual scan postpones the next scheduled one
+            self._next_run.pop(kind, None)
+            if kind == "full":
+                self._next_run.pop("basic", None)
+
+    def fresh(self, kind, max_age):
+        """
+        Newest cached result set usable for `kind` that is at most `max_age`
+        seconds old, or None. A full scan also answers basic requests.
+        """
+        kinds = ("basic", "full") if kind == "basic" else (kind,)
+        now = time.time()
+        with self.lock:
+            candidates = [dict(self.latest[k], kind=k) for k in kinds if k in self.latest]
+        candidates = [c for c in candidates if now - c['finished_at'] <= max_age]
+        if not candidates:
+            return None
+        best = max(candidates, key=lambda c: c['finished_at'])
+        best['age'] = now - best['finished_at']
+        return best
+
+    def touch(self):
+        """Marks client activity; ends any idle backoff."""
+        was_idle = self._backoff() > 1
+        self.last_request = time.time()
+        if was_idle:
+            # Re-plan with the normal intervals instead of waiting out a long idle delay
+            with self.lock:
+                self._next_run = {}
+            self._wake.set()
+
+    # --- scheduling ---
+
+    def configure(self, enabled, basic_interval=None, full_interval=None, jitter=None):
+        with self.lock:
+            if basic_interval is not None:
+                self.basic_interval = basic_interval
+            if full_interval is not None:
+                self.full_interval = full_interval
+            if jitter is not None:
+                self.jitter = jitter
+            self._next_run = {}
+            self.enabled = enabled
+        if enabled and not (self._thread and self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="scan-scheduler")
+            self._thread.start()
+        self._wake.set()
+
+    def _backoff(self):
+        idle = time.time() - self.last_request
+        if idle < IDLE_AFTER:
+            return 1
+        return min(MAX_BACKOFF, 2 ** int(idle // IDLE_AFTER))
+
+    def _delay(self, interval):
+        spread = interval * self.jitter
+        return max(1.0, interval * self._backoff() + random.uniform(-spread, spread))
+
+    def _plan(self, kind, interval, now):
+        # Caller holds the lock. The next run is measured from the newest result we already have.
+        if kind not in self._next_run:
+            latest = self.latest.get(kind)
+            if latest:
+                self._next_run[kind] = latest['finished_at'] + self._delay(interval)
+            else:
+                self._next_run[kind] = now + STARTUP_DELAY[kind]
+        return self._next_run[kind]
+
+    def _loop(self):
+        while True:
+            with self.lock:
+                if not self.enabled:
+                    self._thread = None
+                    return
+                now = time.time()
+                intervals = {"basic": self.basic_interval, "full": self.full_interval}
+                due = {kind: self._plan(kind, interval, now) for kind, interval in intervals.items() if interval}
+            if not due:
+                self._wake.wait(60)
+                self._wake.clear()
+                continue
+
+            kind = min(due, key=due.get)
+            wait = due[kind] - time.time()
+            if wait > 0:
+                self._wake.wait(wait)
+                self._wake.clear()
+                continue
+
+            started = time.time()
+            try:
+                results = self.run_scan(kind)
+                self.store(kind, results, duration=time.time() - started, source="scheduled")
+                print(f"\033[94m[INFO] Scheduled {kind} scan finished: {len(results)} devices.\033[0m")
+            except Exception as e:
+                print(f"\033[93m[WARN] Scheduled {kind} scan failed: {e}\033[0m")
+            with self.lock:
+                self._next_run[kind] = time.time() + self._delay(intervals[kind])
+                if kind == "full" and intervals["basic"]:
+                    # A full scan is also a fresh basic scan
+                    self._next_run["basic"] = time.time() + self._delay(intervals["basic"])
@@ -0,0 +1,95 @@
+import queue
+import threading
+import concurrent.futures
+
+
+class Flight:
+    """
+    One running operation. Besides its result it keeps every event the job
+    published, so a caller that attaches late can replay them and then follow
+    the live ones. The stream always ends with ("done", result) or
+    ("failed", message).
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.future = concurrent.futures.Future()
+        self.lock = threading.Lock()
+        self.events = []
+        self.subscribers = []
+        self.joined = 0
+
+    def publish(self, kind, data):
+        with self.lock:
+            self.events.append((kind, data))
+            for subscriber in self.subscribers:
+                subscriber.put((kind, data))
+
+    def subscribe(self):
+        """Returns a queue preloaded with the events so far that receives all later ones."""
+        subscriber = queue.Queue()
+        with self.lock:
+            for event in self.events:
+                subscriber.put(event)
+            self.subscribers.append(subscriber)
+        return subscriber
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent operations: the first caller for a key runs
+    the job, everyone else arriving while it is in flight attaches to the same
+    Flight and gets the same result (or exception). Nothing is cached once the
+    job has finished.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._flights = {}
+
+    def do(self, key, job, background=False):
+        """
+        Returns the Flight for `key`, starting `job(publish)` if none is running.
+        The leader runs the job in the calling thread, or in a daemon thread
+        when `background` is set; followers return immediately.
+        """
+        with self.lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.joined += 1
+                return flight
+            flight = self._flights[key] = Flight(key)
+
+        if background:
+            threading.Thread(target=self._run, args=(flight, job), daemon=True, name=f"flight-{key[0]}").start()
+        else:
+            self._run(flight, job)
+        return flight
+
+    def run(self, key, job):
+        """Blocking convenience wrapper: the job's result, shared with identical concurrent calls."""
+        flight = self.do(key, job)
+        return flight.result()
+
+    def in_flight(self, key):
+        with self.lock:
+            return key in self._flights
+
+    def _run(self, flight, job):
+        try:
+            result = job(flight.publish)
+        except Exception as e:
+            flight.future.set_exception(e)
+            flight.publish("failed", str(e))
+        else:
+            flight.future.set_result(result)
+            flight.publish("done", result)
+        finally:
+            with self.lock:
+                if self._flights.get(flight.key) is flight:
+                    del self._flights[flight.key]
+            if flight.joined:
+                print(f"\033[94m[DEBUG] {flight.key[0]}: {flight.joined} duplicate request(s) shared one run.\033[0m")
@@ -0,0 +1,113 @@
+import re
+import heapq
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+
+_TOKEN_RE = re.compile(r'[0-9a-z]+')
+_HEX_DIGITS = set('0123456789abcdef')
+
+
+def _prefix_range(sorted_keys, prefix):
+    # [lo, hi) of the keys starting with `prefix`
+    lo = bisect_left(sorted_keys, prefix)
+    hi = bisect_left(sorted_keys, prefix + '\uffff')
+    return lo, hi
+
+
+class VendorSearchIndex:
+    """
+    Autocomplete index over the 24-bit OUI blocks. Built once per OUI index
+    version: vendors are pre-sorted so a row's position is its rank, name
+    tokens map to ascending rank lists, and OUIs are kept sorted for prefix
+    ranges. A query only touches the matching slices and stops after `limit`
+    results; recent answers are kept in a small LRU.
+    """
+
+    def __init__(self, oui_index, cache_size=256):
+        self.oui_index = oui_index
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+        self._version = None
+        self._rows = []          # [(oui, vendor)] sorted by vendor, then OUI
+        self._tokens = []        # sorted distinct lowercase tokens
+        self._token_ranks = []   # parallel to _tokens: ascending row ranks
+        self._ouis = []          # sorted lowercase OUIs
+        self._oui_ranks = []     # parallel to _ouis
+        self._cache = OrderedDict()
+
+    def _build(self, items):
+        rows = sorted(items, key=lambda kv: (kv[1], kv[0]))
+        postings = {}
+        for rank, (_, vendor) in enumerate(rows):
+            for token in dict.fromkeys(_TOKEN_RE.findall(vendor.lower())):
+                postings.setdefault(token, []).append(rank)
+        by_oui = sorted((oui.lower(), rank) for rank, (oui, _) in enumerate(rows))
+
+        self._rows = rows
+        self._tokens = sorted(postings)
+        self._token_ranks = [postings[token] for token in self._tokens]
+        self._ouis = [oui for oui, _ in by_oui]
+        self._oui_ranks = [rank for _, rank in by_oui]
+        self._cache.clear()
+
+    def _refresh(self):
+        # Caller holds the lock
+        version = self.oui_index.version()
+        if version != self._version:
+            self._build(self.oui_index.items(bits=24) if version is not None else [])
+            self._version = version
+
+    def _span(self, token):
+        # (row count, rank lists) for every name token starting with `token`
+        lo, hi = _prefix_range(self._tokens, token)
+        lists = self._token_ranks[lo:hi]
+        return sum(len(ranks) for ranks in lists), lists
+
+    def _merged(self, lists):
+        # Ascending ranks across the lists, produced lazily so a query stops at `limit`
+        return iter(lists[0]) if len(lists) == 1 else heapq.merge(*lists)
+
+    def _search(self, q, limit):
+        if not q:
+            return self._rows[:limit]
+
+        terms = _TOKEN_RE.findall(q)
+        name_ranks = iter(())
+        if terms:
+            # Every query word has to prefix-match some word of the vendor name:
+            # walk the rarest word's ranks and check the rest against rank sets
+            spans = sorted((self._span(term) for term in terms), key=lambda span: span[0])
+            name_ranks = self._merged(spans[0][1])
+            for _, lists in spans[1:]:
+                name_ranks = filter(set().union(*lists).__contains__, name_ranks)
+
+        oui_ranks = []
+        q_oui = q.replace(':', '').replace('-', '')
+        if q_oui and set(q_oui) <= _HEX_DIGITS:
+            lo, hi = _prefix_range(self._ouis, q_oui)
+            oui_ranks = heapq.nsmallest(limit, self._oui_ranks[lo:hi])
+
+        ranks = []
+        for rank in heapq.merge(name_ranks, oui_ranks):
+            if ranks and ranks[-1] == rank:
+                continue
+            ranks.append(rank)
+            if len(ranks) >= limit:
+                break
+        return [self._rows[rank] for rank in ranks]
+
+    def search(self, q, limit=100):
+        """Returns up to `limit` (oui, vendor) pairs matching `q`, ordered by vendor name."""
+        q = (q or '').strip().lower()
+        with self.lock:
+            self._refresh()
+            key = (q, limit)
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            result = self._search(q, limit)
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return result